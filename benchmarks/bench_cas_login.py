@@ -0,0 +1,182 @@
+"""HITSZJwxtAuth 统一身份认证登录的离线基准
+
+在本地 CAS 替身上测量三种登录路径：
+- full：新会话走完整流程（登录页、解析、AES、提交密码、兑换 ticket）；
+- tgc：已有 CASTGC，服务会话失效后只重新签发并兑换 ticket；
+- captcha：账号需要验证码时，确认客户端不会提交密码。
+每种路径先计时若干次，再在 tracemalloc 下跑几次统计内存分配。
+
+    python -m benchmarks.bench_cas_login --runs 30 --latency 0.01
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+from color_print import ColorPrint
+from hitsz_auth import HITSZAuth, HITSZJwxtAuth, LoginResult
+from latency import LatencyRecorder, percentile
+from session_model import SessionLifetimeModel
+from benchmarks.cas_stub import CASStub
+
+USERNAME = "2024000000"
+PASSWORD = "p@ss-word 密码"
+
+
+def make_auth(stub, recorder, workdir):
+    auth = HITSZJwxtAuth(USERNAME, PASSWORD)
+    auth.base_url = stub.base_url
+    auth.service_url = stub.service_url
+    auth.check_url = f"{stub.base_url}/authentication/main"
+    # 不读写当前目录下的 Cookie 和寿命模型
+    auth.cookies_file = os.path.join(workdir, "cookies.json")
+    auth.session_model = SessionLifetimeModel()
+    auth.latency = recorder
+    return auth
+
+
+def full_login(stub, recorder, workdir, state):
+    auth = make_auth(stub, recorder, workdir)
+    return bool(auth.login())
+
+
+def tgc_relogin(stub, recorder, workdir, state):
+    auth = state.get("auth")
+    if auth is None:
+        auth = state["auth"] = make_auth(stub, recorder, workdir)
+        auth.login()
+    # 服务会话失效，但统一身份认证的 CASTGC 还在
+    stub.state.expire_service_sessions()
+    start = time.perf_counter()
+    redirect_url = auth.request_service_ticket()
+    ok = bool(redirect_url) and auth.visit_service(redirect_url)
+    recorder.record("tgc_relogin", time.perf_counter() - start)
+    return ok and auth.probe_session() is True
+
+
+def captcha_login(stub, recorder, workdir, state):
+    stub.state.require_captcha(USERNAME)
+    HITSZAuth._captcha_backoff.pop(USERNAME, None)
+    auth = make_auth(stub, recorder, workdir)
+    result = auth.login()
+    HITSZAuth._captcha_backoff.pop(USERNAME, None)
+    stub.state.require_captcha(USERNAME, False)
+    return result.status == LoginResult.CAPTCHA_REQUIRED
+
+
+SCENARIOS = {"full": full_login, "tgc": tgc_relogin, "captcha": captcha_login}
+
+
+def run_scenario(name, args):
+    stub = CASStub(
+        {USERNAME: PASSWORD},
+        latency=args.latency,
+        service_redirect=args.service_redirect,
+    ).start()
+    recorder = LatencyRecorder(capacity=100000)
+    workdir = tempfile.mkdtemp()
+    func = SCENARIOS[name]
+    state = {}
+
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        # 预热：建立连接、导入 requests / bs4 / Crypto
+        func(stub, recorder, workdir, state)
+        before = stub.state.stats()
+
+        timings, failures = [], 0
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            if not func(stub, recorder, workdir, state):
+                failures += 1
+            timings.append(time.perf_counter() - start)
+        after = stub.state.stats()
+
+        tracemalloc.start()
+        peaks, blocks = [], []
+        for _ in range(args.mem_runs):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            snapshot = tracemalloc.take_snapshot()
+            func(stub, recorder, workdir, state)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            diff = tracemalloc.take_snapshot().compare_to(snapshot, "filename")
+            blocks.append(sum(stat.count_diff for stat in diff if stat.count_diff > 0))
+        tracemalloc.stop()
+
+    stub.stop()
+    timings.sort()
+    return {
+        "scenario": name,
+        "runs": args.runs,
+        "failures": failures,
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p90_ms": percentile(timings, 90) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "peak_kb": max(peaks) / 1024 if peaks else None,
+        "new_blocks": max(blocks) if blocks else None,
+        "server": {
+            key: after[key] - before[key]
+            for key in ("login_page", "credential_post", "tgc_reuse", "ticket_redeemed")
+        },
+        "crypto_rejected": after["crypto_rejected"],
+        "phases": recorder.percentiles(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统一身份认证登录基准")
+    parser.add_argument("--scenario", default="full,tgc,captcha")
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--mem-runs", type=int, default=3, help="tracemalloc 下运行的次数")
+    parser.add_argument("--latency", type=float, default=0.0, help="替身每个请求的延迟(秒)")
+    parser.add_argument("--service-redirect", action="store_true", help="服务端返回301")
+    parser.add_argument("--json", help="结果输出到JSON文件")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.scenario.split(","):
+        ColorPrint.process(f"场景 {name}，共 {args.runs} 次...")
+        results.append(run_scenario(name, args))
+
+    widths = [10, 8, 10, 10, 10, 12, 10, 10]
+    ColorPrint.table_header(
+        "场景", "失败", "p50(ms)", "p90(ms)", "p99(ms)", "峰值内存(KB)", "新增块", "提交密码",
+        widths=widths,
+    )
+    for r in results:
+        ColorPrint.table_row(
+            r["scenario"],
+            r["failures"],
+            f"{r['p50_ms']:.1f}",
+            f"{r['p90_ms']:.1f}",
+            f"{r['p99_ms']:.1f}",
+            "-" if r["peak_kb"] is None else f"{r['peak_kb']:.0f}",
+            "-" if r["new_blocks"] is None else r["new_blocks"],
+            r["server"]["credential_post"],
+            widths=widths,
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        ColorPrint.success(f"结果已保存到: {args.json}")
+
+    failed = False
+    if any(r["crypto_rejected"] for r in results):
+        ColorPrint.error("认证替身无法解密客户端提交的密码，请检查加密实现")
+        failed = True
+    if any(r["failures"] for r in results):
+        ColorPrint.error("部分登录没有得到预期结果")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""启动导入耗时基准
+
+在子进程里用 `python -X importtime` 导入入口模块，统计累计导入耗时的中位数，
+并检查启动阶段没有提前导入重依赖。超过阈值或导入了禁止的模块时返回 1。
+
+    python -m benchmarks.bench_import --runs 7 --max-ms 60
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from color_print import ColorPrint
+
+# 这些依赖只在登录、抢课等具体操作时才需要，启动时不应该导入
+HEAVY_MODULES = ("requests", "urllib3", "aiohttp", "bs4", "tqdm", "asyncio")
+
+DEFAULT_TARGETS = {"jw": 60, "hitsz_auth": 40}
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 {模块名: 累计微秒}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        modules[parts[2].strip()] = int(parts[1])
+    return modules
+
+
+def measure(module, root):
+    env = dict(os.environ, PYTHONPATH=root)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return parse_importtime(proc.stderr)
+
+
+def bench(module, runs, root):
+    totals = []
+    loaded = set()
+    for _ in range(runs):
+        modules = measure(module, root)
+        totals.append(modules.get(module, 0) / 1000)
+        loaded.update(modules)
+    heavy = sorted(m for m in HEAVY_MODULES if m in loaded)
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": statistics.median(totals),
+        "min_ms": min(totals),
+        "max_ms": max(totals),
+        "heavy_imports": heavy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="入口模块导入耗时基准")
+    parser.add_argument(
+        "--module",
+        action="append",
+        help="要测的模块，可重复；默认测 jw 和 hitsz_auth",
+    )
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--max-ms", type=float, help="中位数阈值(ms)，覆盖默认阈值")
+    parser.add_argument("--json", help="结果输出到JSON文件")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    targets = args.module or list(DEFAULT_TARGETS)
+
+    results = []
+    for module in targets:
+        ColorPrint.process(f"测量 import {module}，共 {args.runs} 次...")
+        result = bench(module, args.runs, root)
+        result["threshold_ms"] = args.max_ms or DEFAULT_TARGETS.get(module, 60)
+        results.append(result)
+
+    widths = [14, 12, 10, 10, 10, 24]
+    ColorPrint.table_header(
+        "模块", "中位数(ms)", "最小", "最大", "阈值", "提前导入", widths=widths
+    )
+    for r in results:
+        ColorPrint.table_row(
+            r["module"],
+            f"{r['median_ms']:.1f}",
+            f"{r['min_ms']:.1f}",
+            f"{r['max_ms']:.1f}",
+            f"{r['threshold_ms']:.0f}",
+            ",".join(r["heavy_imports"]) or "-",
+            widths=widths,
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        ColorPrint.success(f"结果已保存到: {args.json}")
+
+    failed = False
+    for r in results:
+        if r["median_ms"] > r["threshold_ms"]:
+            ColorPrint.error(f"{r['module']} 导入耗时超过阈值")
+            failed = True
+        if r["heavy_imports"]:
+            ColorPrint.error(f"{r['module']} 启动时导入了 {', '.join(r['heavy_imports'])}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
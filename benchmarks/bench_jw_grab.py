@@ -0,0 +1,138 @@
+"""HITSZJwxt 抢课流程的离线基准
+
+在本地教务系统替身上端到端运行 auto_choose_class：替身在 --open-in 秒后开放选课，
+开放后按 --fill-rate 被其他同学抢走名额，并注入延迟和错误。比较不同请求间隔下
+每门课从开放到成功的用时、发出的请求数和每个请求的客户端 CPU 时间。
+
+    python -m benchmarks.bench_jw_grab --interval 1.4,0.5,0.2 --courses 3 --open-in 2
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from color_print import ColorPrint
+from grab_events import EventLog
+from hitsz_auth import HITSZJwxtAuth
+from jw import HITSZJwxt
+from session_model import SessionLifetimeModel
+from benchmarks.jw_stub import JwState, JwStub, make_courses
+
+
+def run_interval(interval, args):
+    state = JwState(
+        make_courses(args.courses, args.seats, args.fill_rate),
+        open_at=time.time() + args.open_in,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        http_error_rate=args.http_error_rate,
+        expire_after=args.expire_after,
+        seed=args.seed,
+    )
+    stub = JwStub(state).start()
+
+    auth = HITSZJwxtAuth()
+    # 不读写当前目录下的 Cookie、寿命模型和事件日志
+    auth.cookies_file = os.path.join(tempfile.mkdtemp(), "cookies.json")
+    auth.session_model = SessionLifetimeModel()
+    stub.login(auth.session)
+    jwxt = HITSZJwxt(auth)
+    jwxt.base_url = stub.base_url
+    jwxt.events = EventLog()
+    jwxt.journal = None
+    jwxt.request_interval = interval
+    jwxt.grab_timeout = args.timeout
+
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        classes = jwxt.get_classes()
+        course_ids = [c["id"] for c in classes["kxrwList"]["list"]]
+        before = dict(state.counters)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        jwxt.auto_choose_class(course_ids)
+        wall = time.perf_counter() - wall
+        cpu = time.thread_time() - cpu
+
+    stats = state.stats()
+    stub.stop()
+
+    requests = stats["counters"].get("/Xsxk/addGouwuche", 0) - before.get(
+        "/Xsxk/addGouwuche", 0
+    )
+    success = {
+        cid: at - stats["open_at"] for cid, at in stats["success_at"].items()
+    }
+    endpoint = jwxt.events.summary()["endpoints"].get("/Xsxk/addGouwuche", {})
+    return {
+        "interval": interval,
+        "courses": len(course_ids),
+        "succeeded": len(success),
+        "time_to_success_s": success,
+        "max_time_to_success_s": max(success.values()) if success else None,
+        "requests": requests,
+        "wall_s": wall,
+        "cpu_per_request_ms": cpu / max(requests, 1) * 1000,
+        "p50_ms": endpoint.get("p50_ms"),
+        "p99_ms": endpoint.get("p99_ms"),
+        "outcomes": endpoint.get("outcomes", {}),
+        "stub_counters": stats["counters"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抢课流程离线基准")
+    parser.add_argument("--interval", default="1.4,0.5", help="请求间隔(秒)，逗号分隔")
+    parser.add_argument("--courses", type=int, default=3)
+    parser.add_argument("--seats", type=int, default=30)
+    parser.add_argument("--fill-rate", type=float, default=2.0)
+    parser.add_argument("--open-in", type=float, default=2.0)
+    parser.add_argument("--latency", type=float, default=0.08)
+    parser.add_argument("--jitter", type=float, default=0.03)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--http-error-rate", type=float, default=0.02)
+    parser.add_argument("--expire-after", type=int, help="会话在多少个请求后过期")
+    parser.add_argument("--timeout", type=float, default=30, help="单次抢课最长秒数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="结果输出到JSON文件")
+    args = parser.parse_args()
+
+    results = []
+    for interval in args.interval.split(","):
+        ColorPrint.process(f"请求间隔 {interval} 秒，运行中...")
+        results.append(run_interval(float(interval), args))
+
+    widths = [10, 8, 14, 8, 12, 10, 10]
+    ColorPrint.table_header(
+        "间隔(s)", "成功", "最长用时(s)", "请求数", "CPU/请求(ms)", "p50(ms)", "p99(ms)",
+        widths=widths,
+    )
+    for r in results:
+        longest = r["max_time_to_success_s"]
+        ColorPrint.table_row(
+            r["interval"],
+            f"{r['succeeded']}/{r['courses']}",
+            "-" if longest is None else f"{longest:.2f}",
+            r["requests"],
+            f"{r['cpu_per_request_ms']:.2f}",
+            "-" if r["p50_ms"] is None else f"{r['p50_ms']:.1f}",
+            "-" if r["p99_ms"] is None else f"{r['p99_ms']:.1f}",
+            widths=widths,
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        ColorPrint.success(f"结果已保存到: {args.json}")
+
+    if any(r["succeeded"] < r["courses"] for r in results):
+        ColorPrint.warning("部分课程在时长上限内没有抢到")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
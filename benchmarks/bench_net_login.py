@@ -0,0 +1,171 @@
+"""HITSZNetAuth 长期服务的离线基准
+
+在本地 SRUN 门户替身上按脚本注入强制下线、断网和慢响应，
+比较不同重连策略的平均恢复时间（MTTR）和探测开销。
+
+    python -m benchmarks.bench_net_login --duration 60 --check-interval 5
+"""
+
+import io
+import sys
+import json
+import time
+import argparse
+import contextlib
+from color_print import ColorPrint
+from net_login import HITSZNetAuth
+from benchmarks.srun_portal_stub import SrunPortalStub
+
+USERNAME = "2024000000"
+PASSWORD = "p@ss-word"
+
+DEFAULT_SCRIPT = [
+    {"at": 6, "kind": "logout"},
+    {"at": 24, "kind": "outage", "duration": 4},
+    {"at": 44, "kind": "slow", "duration": 6, "delay": 1.5},
+    {"at": 45, "kind": "logout"},
+]
+
+
+class CallTimer:
+    """统计某个方法的调用次数、墙钟时间和CPU时间"""
+
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def __call__(self, *args, **kwargs):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            self.calls += 1
+            self.wall += time.perf_counter() - wall
+            self.cpu += time.process_time() - cpu
+
+    def summary(self):
+        calls = max(self.calls, 1)
+        return {
+            "calls": self.calls,
+            "mean_ms": self.wall / calls * 1000,
+            "cpu_ms": self.cpu / calls * 1000,
+        }
+
+
+def run_strategy(strategy, args, script):
+    stub = SrunPortalStub(
+        {USERNAME: PASSWORD}, session_max_seconds=args.session_max
+    ).start()
+    stub.run_script(script)
+
+    auth = HITSZNetAuth(USERNAME, PASSWORD)
+    auth.long_term_mode = True
+    # auto_reconnect 每次都会重新探测本机IP，替身这边也按同一个IP记账
+    client_ip = auth.get_local_ip() or "127.0.0.1"
+    auth.base_url = stub.base_url
+    auth.probe_urls = [f"{stub.base_url}/probe?ip={client_ip}"]
+    auth.ip = client_ip
+    auth.retry_wait = args.retry_wait
+    auth.settle_wait = args.settle_wait
+    auth.session_max_seconds = args.session_max
+    auth.relogin_margin = args.relogin_margin
+
+    probe = auth.check_network_status = CallTimer(auth.check_network_status)
+    info = auth.get_online_info = CallTimer(auth.get_online_info)
+
+    log = io.StringIO()
+    start = time.time()
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        auth.login()
+        next_check = start + args.check_interval
+        next_proactive = start + args.proactive_interval
+        while time.time() - start < args.duration:
+            now = time.time()
+            if now >= next_check:
+                auth.auto_reconnect(max_attempts=3)
+                next_check = time.time() + args.check_interval
+            if strategy == "proactive" and now >= next_proactive:
+                auth.proactive_check()
+                next_proactive = time.time() + args.proactive_interval
+            time.sleep(0.05)
+
+    end = time.time()
+    stats = stub.state.stats()
+    downtimes = list(stats["downtimes"])
+    # 结束时仍未恢复的部分也计入
+    downtimes += [end - since for since in stub.state.down_since.values()]
+    stub.stop()
+
+    total_down = sum(downtimes)
+    return {
+        "strategy": strategy,
+        "incidents": len(downtimes),
+        "mttr_s": total_down / len(downtimes) if downtimes else 0.0,
+        "max_down_s": max(downtimes) if downtimes else 0.0,
+        "availability": 1 - total_down / (end - start),
+        "logins": stats["login_ok"],
+        "crypto_rejected": stats["crypto_rejected"],
+        "probe": probe.summary(),
+        "online_info": info.summary(),
+        "portal_requests": {
+            k: stats[k] for k in ("get_challenge", "srun_portal", "rad_user_info", "probe")
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HITSZNetAuth 恢复时间基准")
+    parser.add_argument("--strategy", default="reactive,proactive")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--check-interval", type=float, default=5)
+    parser.add_argument("--proactive-interval", type=float, default=1)
+    parser.add_argument("--session-max", type=int, default=12)
+    parser.add_argument("--relogin-margin", type=float, default=4)
+    parser.add_argument("--retry-wait", type=float, default=2)
+    parser.add_argument("--settle-wait", type=float, default=0.2)
+    parser.add_argument("--script", help="故障脚本JSON文件，默认使用内置脚本")
+    parser.add_argument("--json", help="结果输出到JSON文件")
+    args = parser.parse_args()
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+
+    results = []
+    for strategy in args.strategy.split(","):
+        ColorPrint.process(f"运行策略 {strategy}，时长 {args.duration} 秒...")
+        results.append(run_strategy(strategy, args, script))
+
+    widths = [12, 8, 10, 10, 10, 8, 12, 12]
+    ColorPrint.table_header(
+        "策略", "故障数", "MTTR(s)", "最长(s)", "可用率", "登录", "探测(ms)", "加密拒绝",
+        widths=widths,
+    )
+    for r in results:
+        ColorPrint.table_row(
+            r["strategy"],
+            r["incidents"],
+            f"{r['mttr_s']:.2f}",
+            f"{r['max_down_s']:.2f}",
+            f"{r['availability']:.2%}",
+            r["logins"],
+            f"{r['probe']['mean_ms']:.1f}",
+            r["crypto_rejected"],
+            widths=widths,
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        ColorPrint.success(f"结果已保存到: {args.json}")
+
+    if any(r["crypto_rejected"] for r in results):
+        ColorPrint.error("门户替身拒绝了客户端的加密参数，请检查加密实现")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
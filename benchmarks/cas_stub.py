@@ -0,0 +1,383 @@
+"""本地统一身份认证（CAS）替身
+
+- GET /authserver/login 返回带 pwdFromId 表单、隐藏字段和 pwdEncryptSalt 的登录页；
+  已有有效 CASTGC 时直接 302 到服务并带上 ticket，不带 service 时 302 到 /authserver/index.do；
+- POST /authserver/login 用 salt 独立解密 AES 密码（去掉 64 位随机前缀）后校验，
+  成功时下发 CASTGC 并 302 到服务（不带 service 时不签发 ticket），失败时返回 401 登录页；
+- GET /authserver/checkNeedCaptcha.htl 按账号返回是否需要验证码；
+- 服务端 /casLogin?ticket=... 兑换一次性 ticket，返回 200，或 301 到 /authentication/main；
+- /authentication/main 按服务 Cookie 返回 200 或跳转到 /authentication/require。
+每个请求可以注入固定延迟。
+
+    python -m benchmarks.cas_stub --port 8803 --user 2024000000:password
+"""
+
+import sys
+import json
+import time
+import base64
+import secrets
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http.cookies import SimpleCookie
+from urllib.parse import urlparse, parse_qs, urlencode
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import unpad
+
+SALT_CHARS = "ABCDEFGHJKMNPQRSTWXYZabcdefhijkmnprstwxyz2345678"
+
+
+def decrypt_password(encrypted, salt):
+    """CBC 模式下 IV 只影响第一块，正好落在 64 位随机前缀里，所以服务端不需要 IV"""
+    raw = base64.b64decode(encrypted)
+    cipher = AES.new(salt.encode("utf-8")[:32], AES.MODE_CBC, b"\0" * 16)
+    plain = unpad(cipher.decrypt(raw), AES.block_size)
+    return plain[64:].decode("utf-8")
+
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>统一身份认证平台</title></head>
+<body>
+<div class="login-box">
+<span id="showErrorTip">{error}</span>
+<form id="pwdFromId" method="post" action="/authserver/login?service={service}">
+<input id="username" name="username" placeholder="用户名" type="text" value="">
+<input id="password" placeholder="密码" type="password" value="">
+<input type="hidden" id="saltPassword" name="password" value="">
+<input type="hidden" id="captcha" name="captcha" value="">
+<input type="hidden" id="_eventId" name="_eventId" value="submit">
+<input type="hidden" id="cllt" name="cllt" value="userNameLogin">
+<input type="hidden" id="dllt" name="dllt" value="generalLogin">
+<input type="hidden" id="lt" name="lt" value="">
+<input type="hidden" id="execution" name="execution" value="{execution}">
+<input type="hidden" id="pwdEncryptSalt" value="{salt}">
+</form>
+</div>
+</body></html>
+"""
+
+
+class CASState:
+    """认证服务器状态：账号、登录流程、TGC、ticket、服务会话以及验证码"""
+
+    def __init__(self, users, latency=0.0, service_redirect=False, ticket_ttl=30):
+        self.users = dict(users)
+        self.latency = latency
+        # 为 True 时服务端兑换 ticket 后返回 301，模拟教务系统的跳转
+        self.service_redirect = service_redirect
+        self.ticket_ttl = ticket_ttl
+        self.lock = threading.Lock()
+        self.executions = {}
+        self.tgcs = {}
+        self.tickets = {}
+        self.service_sessions = {}
+        self.captcha_users = set()
+        self.counters = {
+            "login_page": 0,
+            "tgc_reuse": 0,
+            "tgc_check": 0,
+            "credential_post": 0,
+            "login_ok": 0,
+            "login_rejected": 0,
+            "crypto_rejected": 0,
+            "captcha_check": 0,
+            "ticket_issued": 0,
+            "ticket_redeemed": 0,
+            "ticket_rejected": 0,
+        }
+        self.rejections = []
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def require_captcha(self, username, required=True):
+        with self.lock:
+            if required:
+                self.captcha_users.add(username)
+            else:
+                self.captcha_users.discard(username)
+
+    def needs_captcha(self, username):
+        with self.lock:
+            return username in self.captcha_users
+
+    # ---------- 登录流程 ----------
+    def new_execution(self):
+        execution = secrets.token_urlsafe(96)
+        salt = "".join(secrets.choice(SALT_CHARS) for _ in range(16))
+        with self.lock:
+            self.executions[execution] = salt
+        return execution, salt
+
+    def reject(self, reason, crypto=False):
+        with self.lock:
+            self.counters["login_rejected"] += 1
+            if crypto:
+                self.counters["crypto_rejected"] += 1
+            self.rejections.append(reason)
+
+    def authenticate(self, form):
+        """校验提交的表单，成功时返回新的 CASTGC，失败时返回 (None, 错误提示)"""
+        username = form.get("username", "")
+        with self.lock:
+            salt = self.executions.pop(form.get("execution", ""), None)
+        if salt is None:
+            self.reject("execution无效")
+            return None, "登录流程已过期，请刷新页面"
+        for field, value in (("_eventId", "submit"), ("cllt", "userNameLogin")):
+            if form.get(field) != value:
+                self.reject(f"{field}错误")
+                return None, "非法请求"
+        if self.needs_captcha(username) and not form.get("captcha"):
+            self.reject("缺少验证码")
+            return None, "请输入验证码"
+        try:
+            password = decrypt_password(form.get("password", ""), salt)
+        except Exception as e:
+            self.reject(f"密码解密失败: {e}", True)
+            return None, "您提供的用户名或者密码有误"
+        if self.users.get(username) != password:
+            self.reject("密码错误")
+            return None, "您提供的用户名或者密码有误"
+
+        tgc = "TGT-" + secrets.token_urlsafe(32)
+        with self.lock:
+            self.tgcs[tgc] = username
+            self.counters["login_ok"] += 1
+        return tgc, None
+
+    def tgc_user(self, tgc):
+        with self.lock:
+            return self.tgcs.get(tgc)
+
+    def issue_ticket(self, username, service):
+        ticket = "ST-" + secrets.token_urlsafe(24)
+        with self.lock:
+            self.tickets[ticket] = (username, service, time.time() + self.ticket_ttl)
+            self.counters["ticket_issued"] += 1
+        separator = "&" if "?" in service else "?"
+        return f"{service}{separator}ticket={ticket}"
+
+    def redeem_ticket(self, ticket):
+        """ticket 只能用一次，成功时返回服务端会话号"""
+        with self.lock:
+            username, _, expires = self.tickets.pop(ticket, (None, None, 0))
+            if username is None or time.time() > expires:
+                self.counters["ticket_rejected"] += 1
+                return None
+            self.counters["ticket_redeemed"] += 1
+            session_id = secrets.token_hex(16)
+            self.service_sessions[session_id] = username
+            return session_id
+
+    def service_user(self, session_id):
+        with self.lock:
+            return self.service_sessions.get(session_id)
+
+    def expire_service_sessions(self):
+        with self.lock:
+            self.service_sessions.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                **self.counters,
+                "rejections": list(self.rejections[-20:]),
+            }
+
+
+class CASHandler(BaseHTTPRequestHandler):
+    server_version = "cas-stub/1.0"
+    # 保持连接，和真实服务器一样复用 keep-alive
+    protocol_version = "HTTP/1.1"
+    # 响应头和正文分两次写，不关 Nagle 会被延迟确认拖慢 40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body="", content_type="text/html; charset=utf-8", headers=()):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _cookies(self):
+        cookie = SimpleCookie()
+        cookie.load(self.headers.get("Cookie", ""))
+        return {name: morsel.value for name, morsel in cookie.items()}
+
+    def _query(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query, keep_blank_values=True)
+        return parsed.path, {k: v[0] for k, v in query.items()}
+
+    def _login_page(self, service, status=200, error=""):
+        state = self.server.state
+        execution, salt = state.new_execution()
+        page = LOGIN_PAGE.format(
+            error=error,
+            service=urlencode({"s": service})[2:],
+            execution=execution,
+            salt=salt,
+        )
+        self._send(status, page)
+
+    def _prepare(self):
+        state = self.server.state
+        if state.latency:
+            time.sleep(state.latency)
+        return state
+
+    def do_GET(self):
+        state = self._prepare()
+        path, q = self._query()
+        cookies = self._cookies()
+
+        if path == "/authserver/login":
+            service = q.get("service", "")
+            username = state.tgc_user(cookies.get("CASTGC", ""))
+            if username and service:
+                state.count("tgc_reuse")
+                location = state.issue_ticket(username, service)
+                self._send(302, headers=[("Location", location)])
+                return
+            if username:
+                # 不带 service 时只说明已登录，不签发 ticket
+                state.count("tgc_check")
+                self._send(302, headers=[("Location", "/authserver/index.do")])
+                return
+            state.count("login_page")
+            self._login_page(service)
+        elif path == "/authserver/checkNeedCaptcha.htl":
+            state.count("captcha_check")
+            need = state.needs_captcha(q.get("username", ""))
+            self._send(200, json.dumps({"isNeed": need}), "application/json")
+        elif path == "/casLogin":
+            session_id = state.redeem_ticket(q.get("ticket", ""))
+            if session_id is None:
+                self._send(302, headers=[("Location", "/authentication/require")])
+                return
+            cookie = [("Set-Cookie", f"JSESSIONID={session_id}; Path=/; HttpOnly")]
+            if state.service_redirect:
+                cookie.append(("Location", self._absolute("/authentication/main")))
+                self._send(301, headers=cookie)
+            else:
+                self._send(200, "<html>教务系统</html>", headers=cookie)
+        elif path == "/authentication/main":
+            if state.service_user(cookies.get("JSESSIONID", "")):
+                self._send(200, "<html>教务系统</html>")
+            else:
+                self._send(302, headers=[("Location", "/authentication/require")])
+        elif path == "/authentication/require":
+            self._send(200, "<html>请重新登录</html>")
+        elif path == "/stats":
+            self._send(200, json.dumps(state.stats()), "application/json")
+        else:
+            self._send(404, "not found", "text/plain; charset=utf-8")
+
+    def do_HEAD(self):
+        # 会话探测会先发 HEAD，按 GET 处理，_send 不写正文
+        self.do_GET()
+
+    def do_POST(self):
+        state = self._prepare()
+        path, q = self._query()
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8")
+        form = {k: v[0] for k, v in parse_qs(body, keep_blank_values=True).items()}
+
+        if path != "/authserver/login":
+            self._send(404, "not found", "text/plain; charset=utf-8")
+            return
+        state.count("credential_post")
+        service = q.get("service", "")
+        tgc, error = state.authenticate(form)
+        if tgc is None:
+            self._login_page(service, status=401, error=error)
+            return
+        if service:
+            location = state.issue_ticket(form["username"], service)
+        else:
+            location = "/authserver/index.do"
+        self._send(
+            302,
+            headers=[
+                ("Location", location),
+                ("Set-Cookie", f"CASTGC={tgc}; Path=/authserver; HttpOnly"),
+            ],
+        )
+
+    def _absolute(self, path):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+
+class CASStub:
+    """在后台线程里运行的统一身份认证替身"""
+
+    def __init__(self, users, host="127.0.0.1", port=0, **kwargs):
+        self.state = CASState(users, **kwargs)
+        self.httpd = ThreadingHTTPServer((host, port), CASHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def service_url(self):
+        return f"{self.base_url}/casLogin"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地统一身份认证替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8803)
+    parser.add_argument("--user", action="append", default=[], help="账号:密码，可重复")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求注入的延迟(秒)")
+    parser.add_argument("--service-redirect", action="store_true", help="服务端返回301")
+    parser.add_argument("--captcha", action="append", default=[], help="需要验证码的账号")
+    args = parser.parse_args()
+
+    users = dict(u.split(":", 1) for u in args.user) or {"2024000000": "password"}
+    stub = CASStub(
+        users,
+        args.host,
+        args.port,
+        latency=args.latency,
+        service_redirect=args.service_redirect,
+    ).start()
+    for username in args.captcha:
+        stub.state.require_captcha(username)
+    print(f"统一身份认证替身运行于 {stub.base_url} ，服务地址: {stub.service_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
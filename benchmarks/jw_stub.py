@@ -0,0 +1,325 @@
+"""本地教务系统替身
+
+用 aiohttp 实现 HITSZJwxt 用到的三个接口：
+- /UserManager/queryxsxx 个人信息；
+- /Xsxk/queryKxrw 可选课程，按 pageNum / pageSize 分页；
+- /Xsxk/addGouwuche 选课，按课程记余量，开放前、已选、已满都返回 jg=-1，
+  并可按比例注入 code=500 和 HTTP 503。
+会话 Cookie 没有或不认识时跳转到 /authentication/require，过期时跳转到
+/authentication/invalid。每个响应的延迟按正态分布注入。
+
+    python -m benchmarks.jw_stub --port 8802 --courses 5 --seats 30 --open-in 10
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import secrets
+import argparse
+import threading
+
+from aiohttp import web
+
+STUDENT_ID = "2024000000"
+
+
+class Course:
+    def __init__(self, course_id, name, seats, fill_rate=0.0):
+        self.id = course_id
+        self.name = name
+        self.seats = seats
+        # 开放后其他同学每秒抢走的名额
+        self.fill_rate = fill_rate
+        self.students = set()
+        self.others = 0
+
+    def remaining(self, opened_for):
+        others = int(self.fill_rate * max(0.0, opened_for))
+        self.others = min(others, self.seats - len(self.students))
+        return self.seats - len(self.students) - self.others
+
+    def to_item(self, opened_for):
+        return {
+            "id": self.id,
+            "kcmc": self.name,
+            "kcdm": f"COMP{self.id[-4:]}",
+            "xf": "2.0",
+            "dgjsmc": "测试教师",
+            "krl": self.seats,
+            "yxzrs": self.seats - max(0, self.remaining(opened_for)),
+        }
+
+
+class JwState:
+    """教务系统状态：课程余量、会话、开放时间以及注入的延迟和错误"""
+
+    def __init__(
+        self,
+        courses,
+        open_at=None,
+        latency=0.05,
+        jitter=0.02,
+        error_rate=0.0,
+        http_error_rate=0.0,
+        session_ttl=None,
+        expire_after=None,
+        seed=None,
+    ):
+        self.courses = {c.id: c for c in courses}
+        self.open_at = open_at or time.time()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.http_error_rate = http_error_rate
+        # 会话按时间或按请求数过期，都为 None 时不过期
+        self.session_ttl = session_ttl
+        self.expire_after = expire_after
+        self.random = random.Random(seed)
+        self.sessions = {}
+        self.success_at = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def new_session(self, student=STUDENT_ID):
+        token = secrets.token_hex(16)
+        with self.lock:
+            self.sessions[token] = {
+                "student": student,
+                "issued": time.time(),
+                "requests": 0,
+            }
+        return token
+
+    def check_session(self, token):
+        """返回 (学号, 跳转路径)，会话有效时跳转路径为 None"""
+        with self.lock:
+            sess = self.sessions.get(token)
+            if sess is None:
+                return None, "/authentication/require"
+            sess["requests"] += 1
+            expired = (
+                self.session_ttl and time.time() - sess["issued"] > self.session_ttl
+            ) or (self.expire_after and sess["requests"] > self.expire_after)
+            if expired:
+                return None, "/authentication/invalid"
+            return sess["student"], None
+
+    def delay(self):
+        return max(0.0, self.random.gauss(self.latency, self.jitter))
+
+    def choose(self, student, course_id):
+        now = time.time()
+        course = self.courses.get(course_id)
+        if course is None:
+            return {"jg": "-1", "message": "不在可选课程范围内"}
+        if now < self.open_at:
+            return {"jg": "-1", "message": "选课未开放"}
+        with self.lock:
+            if student in course.students:
+                return {"jg": "-1", "message": "该课程已选"}
+            if course.remaining(now - self.open_at) <= 0:
+                return {"jg": "-1", "message": "课程已满，无余量"}
+            course.students.add(student)
+            self.success_at[course_id] = now
+        return {"jg": "1", "message": "选课成功"}
+
+    def stats(self):
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "open_at": self.open_at,
+                "success_at": dict(self.success_at),
+                "courses": {
+                    cid: {"seats": c.seats, "chosen": len(c.students), "others": c.others}
+                    for cid, c in self.courses.items()
+                },
+            }
+
+
+def _form_value(form, key, default):
+    try:
+        return int(form.get(key, default))
+    except ValueError:
+        return default
+
+
+def make_app(state):
+    app = web.Application(middlewares=[_inject_middleware])
+    app["state"] = state
+    app.router.add_route("*", "/UserManager/queryxsxx", _query_xsxx)
+    app.router.add_route("*", "/Xsxk/queryKxrw", _query_kxrw)
+    app.router.add_post("/Xsxk/addGouwuche", _add_gouwuche)
+    app.router.add_route("*", "/authentication/main", _main_page)
+    app.router.add_get("/authentication/require", _auth_page)
+    app.router.add_get("/authentication/invalid", _auth_page)
+    app.router.add_get("/stats", _stats)
+    return app
+
+
+@web.middleware
+async def _inject_middleware(request, handler):
+    state = request.app["state"]
+    if request.path.startswith("/stats"):
+        return await handler(request)
+    state.count(request.path)
+    await asyncio.sleep(state.delay())
+    if request.path.startswith("/authentication/"):
+        return await handler(request)
+
+    student, redirect = state.check_session(request.cookies.get("JSESSIONID"))
+    if redirect:
+        state.count(redirect)
+        raise web.HTTPFound(redirect)
+    if state.random.random() < state.http_error_rate:
+        state.count("http_503")
+        return web.Response(status=503, text="Service Unavailable")
+    request["student"] = student
+    return await handler(request)
+
+
+async def _query_xsxx(request):
+    return web.json_response(
+        {"xh": request["student"], "xm": "测试同学", "yxmc": "计算机科学与技术学院"}
+    )
+
+
+async def _query_kxrw(request):
+    state = request.app["state"]
+    form = await request.post()
+    page_num = max(1, _form_value(form, "pageNum", 1))
+    page_size = max(1, _form_value(form, "pageSize", 18))
+    opened_for = time.time() - state.open_at
+    items = [c.to_item(opened_for) for c in state.courses.values()]
+    start = (page_num - 1) * page_size
+    return web.json_response(
+        {
+            "kxrwList": {
+                "list": items[start : start + page_size],
+                "total": len(items),
+                "pageNum": page_num,
+                "pageSize": page_size,
+                "pages": -(-len(items) // page_size),
+            }
+        }
+    )
+
+
+async def _add_gouwuche(request):
+    state = request.app["state"]
+    form = await request.post()
+    if state.random.random() < state.error_rate:
+        state.count("code_500")
+        return web.json_response({"code": "500", "message": "系统繁忙"})
+    result = state.choose(request["student"], form.get("p_id", ""))
+    state.count("choose_" + ("ok" if result["jg"] == "1" else "rejected"))
+    return web.json_response(result)
+
+
+async def _main_page(request):
+    return web.Response(text="<html>教务系统</html>", content_type="text/html")
+
+
+async def _auth_page(request):
+    return web.Response(text="<html>请重新登录</html>", content_type="text/html")
+
+
+async def _stats(request):
+    return web.json_response(request.app["state"].stats())
+
+
+def make_courses(count, seats, fill_rate=0.0):
+    return [
+        Course(f"stub{index:04d}{secrets.token_hex(8)}", f"测试课程{index}", seats, fill_rate)
+        for index in range(1, count + 1)
+    ]
+
+
+class JwStub:
+    """在后台线程的事件循环里运行的教务系统替身"""
+
+    def __init__(self, state, host="127.0.0.1", port=0):
+        self.state = state
+        self.host = host
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self._runner = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self._runner = web.AppRunner(make_app(self.state), access_log=None)
+            self.loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, self.host, self.port)
+            self.loop.run_until_complete(site.start())
+            self.port = site._server.sockets[0].getsockname()[1]
+            ready.set()
+            self.loop.run_forever()
+            self.loop.run_until_complete(self._runner.cleanup())
+            self.loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def login(self, session, student=STUDENT_ID):
+        """给 requests 会话发一个有效的 JSESSIONID"""
+        token = self.state.new_session(student)
+        session.cookies.set("JSESSIONID", token, domain=self.host, path="/")
+        return token
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地教务系统替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8802)
+    parser.add_argument("--courses", type=int, default=5)
+    parser.add_argument("--seats", type=int, default=30)
+    parser.add_argument("--fill-rate", type=float, default=0.0, help="开放后每秒被抢走的名额")
+    parser.add_argument("--open-in", type=float, default=0, help="多少秒后开放选课")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--http-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    state = JwState(
+        make_courses(args.courses, args.seats, args.fill_rate),
+        open_at=time.time() + args.open_in,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        http_error_rate=args.http_error_rate,
+    )
+    stub = JwStub(state, args.host, args.port).start()
+    token = state.new_session()
+    print(f"教务系统替身运行于 {stub.base_url}")
+    print(f"JSESSIONID={token}")
+    print(json.dumps({cid: c.name for cid, c in state.courses.items()}, ensure_ascii=False))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""热点路径的微基准用例
+
+每个用例是一个 setup 函数，返回要重复调用的无参函数，由 benchmarks.run 计时。
+数据都在本地构造，不访问网络。
+"""
+
+import json
+import random
+import string
+from urllib.parse import urlencode
+
+CASES = {}
+
+
+def case(name, number):
+    """登记一个用例，number 为每轮调用次数"""
+
+    def register(setup):
+        CASES[name] = (setup, number)
+        return setup
+
+    return register
+
+
+def _random_text(rng, length):
+    return "".join(rng.choice(string.ascii_letters) for _ in range(length))
+
+
+def make_login_page():
+    """和真实登录页差不多大小：表单前后带大段脚本和样式"""
+    from benchmarks.cas_stub import LOGIN_PAGE
+
+    rng = random.Random(1)
+    filler = "\n".join(
+        f'<script type="text/javascript">var v{i} = "{_random_text(rng, 120)}";</script>'
+        for i in range(300)
+    )
+    page = LOGIN_PAGE.format(
+        error="",
+        service="http%3A%2F%2Fjw.hitsz.edu.cn%2FcasLogin",
+        execution=_random_text(rng, 2048),
+        salt=_random_text(rng, 16),
+    )
+    return page.replace("<body>", f"<body>\n{filler}\n", 1)
+
+
+def make_catalog(count, seed=1):
+    rng = random.Random(seed)
+    items = []
+    for index in range(count):
+        items.append(
+            {
+                "id": "".join(rng.choice("0123456789ABCDEF") for _ in range(32)),
+                "kcmc": f"课程{index:05d}-{_random_text(rng, 6)}",
+                "kcdm": f"COMP{index:05d}",
+                "xf": "2.0",
+                "dgjsmc": "教师" + _random_text(rng, 3),
+                "kkyxmc": "计算机科学与技术学院",
+                "sksj": "周一 第1-2节",
+                "krl": rng.randint(30, 200),
+                "yxzrs": rng.randint(0, 200),
+            }
+        )
+    return {"kxrwList": {"list": items, "total": count, "pageNum": 1, "pageSize": count}}
+
+
+def _srun_info(rng):
+    return {
+        "username": "2024000000",
+        "password": _random_text(rng, 12),
+        "ip": "10.249.12.34",
+        "acid": "1",
+        "enc_ver": "srun_bx1",
+    }
+
+
+@case("extract_login_params", number=50)
+def extract_login_params():
+    from hitsz_auth import HITSZAuth
+
+    auth = HITSZAuth()
+    page = make_login_page()
+    return lambda: auth.extract_login_params(page)
+
+
+@case("encrypt_password_with_aes", number=2000)
+def encrypt_password_with_aes():
+    from hitsz_auth import HITSZAuth
+
+    auth = HITSZAuth()
+    auth.encrypt_password_with_aes("warmup", "A" * 16)
+    return lambda: auth.encrypt_password_with_aes("p@ss-word 密码", "rjBFAaHsNkKAhpoi")
+
+
+@case("srun_xxtea", number=2000)
+def srun_xxtea():
+    from net_login import HITSZNetAuth
+
+    net = HITSZNetAuth()
+    rng = random.Random(2)
+    data = json.dumps(_srun_info(rng), separators=(",", ":"))
+    token = "".join(rng.choice("0123456789abcdef") for _ in range(64))
+    return lambda: net.xxtea(data, token)
+
+
+@case("srun_info", number=2000)
+def srun_info():
+    from net_login import HITSZNetAuth
+
+    net = HITSZNetAuth()
+    rng = random.Random(3)
+    info = _srun_info(rng)
+    token = "".join(rng.choice("0123456789abcdef") for _ in range(64))
+    return lambda: net.info_(info, token)
+
+
+@case("catalog_json_decode", number=20)
+def catalog_json_decode():
+    text = json.dumps(make_catalog(3000), ensure_ascii=False)
+    return lambda: json.loads(text)
+
+
+@case("get_class_id_by_name", number=20)
+def get_class_id_by_name():
+    from hitsz_auth import HITSZJwxtAuth
+    from jw import HITSZJwxt
+
+    jwxt = HITSZJwxt(HITSZJwxtAuth())
+    catalog = make_catalog(3000)
+    items = catalog["kxrwList"]["list"]
+    # 大多在目录后半段，再加一个找不到的
+    names = [items[i]["kcmc"] for i in range(1500, 3000, 150)] + ["不存在的课程"]
+    return lambda: jwxt.get_class_id_by_name(names, catalog)
+
+
+@case("course_request_body", number=10000)
+def course_request_body():
+    from hitsz_auth import HITSZJwxtAuth
+    from jw import HITSZJwxt
+
+    jwxt = HITSZJwxt(HITSZJwxtAuth())
+    class_id = "0123456789ABCDEF0123456789ABCDEF"
+
+    def build():
+        # aiohttp 提交表单时同样用 urlencode 编码
+        headers, data = jwxt._course_request(class_id)
+        return headers, urlencode(data)
+
+    return build
+
+
+@case("color_print", number=20000)
+def color_print():
+    from color_print import ColorPrint
+
+    return lambda: ColorPrint.info("第 %d 次请求 - 课程 %s... ", 42, "0123ABCD")
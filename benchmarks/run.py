@@ -0,0 +1,268 @@
+"""基准运行器
+
+每个用例在独立子进程里运行，记录每次调用的耗时、单次调用的 tracemalloc 峰值和
+进程峰值 RSS；宏基准（登录流程、启动导入）调用对应脚本并取其结果。
+结果与提交在仓库里的 benchmarks/baseline.json 比较，超过阈值时返回 1。
+
+    python -m benchmarks.run                        # 全部微基准，与基线比较
+    python -m benchmarks.run --case srun_xxtea --case cas_login_full
+    python -m benchmarks.run --macro                # 加上宏基准
+    python -m benchmarks.run --threshold wall_us=0.5 --json result.json
+    python -m benchmarks.run --update-baseline      # 用本次结果覆盖基线
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+METRICS = ("wall_us", "alloc_peak_kb", "peak_rss_kb")
+DEFAULT_THRESHOLDS = {"wall_us": 0.25, "alloc_peak_kb": 0.25, "peak_rss_kb": 0.5}
+
+# 宏基准：模块、参数、从其 JSON 结果里取指标的函数
+MACRO = {
+    "cas_login_full": (
+        ["benchmarks.bench_cas_login", "--scenario", "full", "--runs", "20"],
+        lambda r: {"wall_us": r[0]["p50_ms"] * 1000, "alloc_peak_kb": r[0]["peak_kb"]},
+    ),
+    "cas_login_tgc": (
+        ["benchmarks.bench_cas_login", "--scenario", "tgc", "--runs", "20"],
+        lambda r: {"wall_us": r[0]["p50_ms"] * 1000, "alloc_peak_kb": r[0]["peak_kb"]},
+    ),
+    "import_jw": (
+        ["benchmarks.bench_import", "--module", "jw", "--runs", "5"],
+        lambda r: {"wall_us": r[0]["median_ms"] * 1000},
+    ),
+}
+
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        # Windows 没有 resource 模块
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 上单位是字节
+    return rss / 1024 if sys.platform == "darwin" else rss
+
+
+def measure(name, repeat):
+    """在当前进程里运行一个微基准用例"""
+    from benchmarks.micro import CASES
+
+    setup, number = CASES[name]
+    func = setup()
+    func()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    func()
+    alloc_peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    return {
+        "case": name,
+        "kind": "micro",
+        "number": number,
+        "repeat": repeat,
+        # 比较用最快一轮，受机器上其他负载的影响最小
+        "wall_us": min(timings) * 1e6,
+        "wall_median_us": statistics.median(timings) * 1e6,
+        "alloc_peak_kb": alloc_peak / 1024,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def worker(name, repeat):
+    # 用例自己的输出（ColorPrint 等）写到空设备，结果 JSON 单独写到真正的 stdout
+    out = sys.stdout
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            result = measure(name, repeat)
+    out.write(json.dumps(result) + "\n")
+
+
+def run_micro(name, repeat):
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--worker", name, "--repeat", str(repeat)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{name}: {proc.stderr.strip().splitlines()[-1]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_macro(name):
+    module_args, extract = MACRO[name]
+    json_file = os.path.join(ROOT, f".bench_{name}.json")
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-m", *module_args, "--json", json_file],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0 or not os.path.exists(json_file):
+            raise RuntimeError(f"{name}: 基准运行失败 ({proc.returncode})")
+        with open(json_file, "r", encoding="utf-8") as f:
+            metrics = extract(json.load(f))
+    finally:
+        if os.path.exists(json_file):
+            os.remove(json_file)
+    return {"case": name, "kind": "macro", **metrics}
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {"thresholds": dict(DEFAULT_THRESHOLDS), "cases": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(result, baseline, thresholds):
+    """返回 [(指标, 基线, 当前, 变化比例, 是否回退)]"""
+    base = baseline.get("cases", {}).get(result["case"])
+    if not base:
+        return []
+    # 单个用例可以在基线里放宽阈值
+    limits = {**thresholds, **base.get("thresholds", {})}
+    rows = []
+    for metric in METRICS:
+        old, new = base.get(metric), result.get(metric)
+        if not old or new is None:
+            continue
+        change = new / old - 1
+        rows.append((metric, old, new, change, change > limits.get(metric, 1e9)))
+    return rows
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热点路径基准运行器")
+    parser.add_argument("--case", action="append", help="只运行指定用例，可重复")
+    parser.add_argument("--macro", action="store_true", help="同时运行宏基准")
+    parser.add_argument("--repeat", type=int, default=7, help="每个微基准的轮数")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument(
+        "--threshold",
+        action="append",
+        default=[],
+        help="回退阈值，如 wall_us=0.3 表示慢 30%% 以上算回退",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", help="结果输出到JSON文件")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.repeat)
+        return
+
+    from color_print import ColorPrint
+    from benchmarks.micro import CASES
+
+    baseline = load_baseline(args.baseline)
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}
+    for item in args.threshold:
+        metric, _, value = item.partition("=")
+        if metric not in METRICS:
+            parser.error(f"未知指标: {metric}，可选 {', '.join(METRICS)}")
+        thresholds[metric] = float(value)
+
+    names = args.case or list(CASES)
+    if args.case:
+        unknown = [n for n in names if n not in CASES and n not in MACRO]
+        if unknown:
+            parser.error(f"未知用例: {', '.join(unknown)}")
+    elif args.macro:
+        names += list(MACRO)
+
+    results = []
+    for name in names:
+        ColorPrint.process(f"运行 {name}...")
+        results.append(run_macro(name) if name in MACRO else run_micro(name, args.repeat))
+
+    widths = [26, 12, 12, 12, 10, 8]
+    ColorPrint.table_header(
+        "用例", "耗时(us)", "分配(KB)", "RSS(KB)", "耗时变化", "结论", widths=widths
+    )
+    regressions = []
+    for result in results:
+        rows = compare(result, baseline, thresholds)
+        wall = next((row for row in rows if row[0] == "wall_us"), None)
+        regressed = [row for row in rows if row[4]]
+        regressions += [(result["case"], row) for row in regressed]
+        rss = result.get("peak_rss_kb")
+        alloc = result.get("alloc_peak_kb")
+        ColorPrint.table_row(
+            result["case"],
+            f"{result['wall_us']:.1f}",
+            "-" if alloc is None else f"{alloc:.1f}",
+            "-" if rss is None else f"{rss:.0f}",
+            "-" if wall is None else f"{wall[3]:+.1%}",
+            "回退" if regressed else ("新增" if not rows else "正常"),
+            widths=widths,
+        )
+
+    output = {"environment": environment(), "thresholds": thresholds, "results": results}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2, ensure_ascii=False)
+        ColorPrint.success(f"结果已保存到: {args.json}")
+
+    if args.update_baseline:
+        cases = baseline.get("cases", {})
+        for result in results:
+            entry = {m: result[m] for m in METRICS if result.get(m) is not None}
+            # 保留手工放宽过的单用例阈值
+            if "thresholds" in cases.get(result["case"], {}):
+                entry["thresholds"] = cases[result["case"]]["thresholds"]
+            cases[result["case"]] = entry
+        data = {
+            "environment": environment(),
+            "thresholds": baseline.get("thresholds", dict(DEFAULT_THRESHOLDS)),
+            "cases": cases,
+        }
+        tmp_file = f"{args.baseline}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.replace(tmp_file, args.baseline)
+        ColorPrint.success(f"基线已更新: {args.baseline}")
+        return
+
+    for case_name, (metric, old, new, change, _) in regressions:
+        ColorPrint.error(f"{case_name} 的 {metric} 从 {old:.1f} 变为 {new:.1f}（{change:+.1%}）")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""本地 SRUN 门户替身
+
+实现 get_challenge / srun_portal / rad_user_info 三个 JSONP 接口，
+独立校验 chksum、{MD5} 密码和 {SRBX1} info（不复用 net_login 的加密代码，
+这样客户端加密出错时能被发现），并支持按脚本注入断网、慢响应和强制下线。
+和真实门户一样，已在线的IP再登录会返回 ip_already_online_error，不会续期。
+
+    python -m benchmarks.srun_portal_stub --port 8801 --user 2024000000:password
+"""
+
+import sys
+import json
+import time
+import hmac
+import base64
+import random
+import string
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+SRBX1_ALPHA = "LVoJPiCN2R8G90yg+hmFHuacZ1OWMnrsSTXkYpUq/3dlbfKwv6xztjI7DeBE45QA"
+STD_ALPHA = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+DELTA = 0x9E3779B9
+MASK = 0xFFFFFFFF
+
+
+def _to_words(data, with_length):
+    words = []
+    for i in range(0, len(data), 4):
+        chunk = data[i : i + 4]
+        word = 0
+        for j, ch in enumerate(chunk):
+            word |= ord(ch) << (8 * j)
+        words.append(word)
+    if with_length:
+        words.append(len(data))
+    return words
+
+
+def _from_words(words, with_length):
+    length = (len(words) - 1) << 2
+    if with_length:
+        m = words[-1]
+        if m < length - 3 or m > length:
+            return None
+        length = m
+    data = "".join(
+        chr(w & 0xFF) + chr(w >> 8 & 0xFF) + chr(w >> 16 & 0xFF) + chr(w >> 24 & 0xFF)
+        for w in words
+    )
+    return data[:length] if with_length else data
+
+
+def _mx(y, z, total, key, p, e):
+    return (z >> 5 ^ y << 2) + ((y >> 3 ^ z << 4) ^ (total ^ y)) + (key[p & 3 ^ e] ^ z)
+
+
+def xxtea_decrypt(data, key):
+    """SRUN 变种 XXTEA 的解密"""
+    if not data:
+        return ""
+    v = _to_words(data, False)
+    k = _to_words(key, False)
+    if len(k) < 4:
+        k = k + [0] * (4 - len(k))
+    n = len(v) - 1
+    rounds = 6 + 52 // (n + 1)
+    total = (rounds * DELTA) & MASK
+    y = v[0]
+    while total:
+        e = total >> 2 & 3
+        for p in range(n, 0, -1):
+            z = v[p - 1]
+            v[p] = (v[p] - _mx(y, z, total, k, p, e)) & MASK
+            y = v[p]
+        z = v[n]
+        v[0] = (v[0] - _mx(y, z, total, k, 0, e)) & MASK
+        y = v[0]
+        total = (total - DELTA) & MASK
+    return _from_words(v, True)
+
+
+def decode_srbx1(info, token):
+    if not info.startswith("{SRBX1}"):
+        raise ValueError("info缺少{SRBX1}前缀")
+    encoded = info[len("{SRBX1}") :].translate(str.maketrans(SRBX1_ALPHA, STD_ALPHA))
+    raw = base64.b64decode(encoded).decode("latin-1")
+    plain = xxtea_decrypt(raw, token)
+    if plain is None:
+        raise ValueError("info解密失败")
+    return json.loads(plain)
+
+
+class PortalState:
+    """门户状态：账号、challenge、在线会话以及注入的故障"""
+
+    def __init__(self, users, session_max_seconds=None, challenge_ttl=60):
+        self.users = dict(users)
+        self.session_max_seconds = session_max_seconds
+        self.challenge_ttl = challenge_ttl
+        self.lock = threading.Lock()
+        self.challenges = {}
+        self.online = {}
+        self.outage_until = 0
+        self.slow_until = 0
+        self.slow_delay = 0
+        # 统计
+        self.counters = {
+            "get_challenge": 0,
+            "srun_portal": 0,
+            "rad_user_info": 0,
+            "probe": 0,
+            "login_ok": 0,
+            "login_rejected": 0,
+            "crypto_rejected": 0,
+            "already_online": 0,
+        }
+        self.rejections = []
+        self.down_since = {}
+        self.downtimes = []
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    # ---------- 故障注入 ----------
+    def force_logout(self, ip=None):
+        now = time.time()
+        with self.lock:
+            for online_ip in list(self.online):
+                if ip is None or online_ip == ip:
+                    del self.online[online_ip]
+                    self.down_since.setdefault(online_ip, now)
+
+    def start_outage(self, duration):
+        self.force_logout()
+        self.outage_until = time.time() + duration
+
+    def start_slow(self, duration, delay):
+        self.slow_delay = delay
+        self.slow_until = time.time() + duration
+
+    def in_outage(self):
+        return time.time() < self.outage_until
+
+    def response_delay(self):
+        return self.slow_delay if time.time() < self.slow_until else 0
+
+    # ---------- 会话 ----------
+    def expire_sessions(self):
+        if not self.session_max_seconds:
+            return
+        now = time.time()
+        with self.lock:
+            for ip, sess in list(self.online.items()):
+                if now - sess["add_time"] >= self.session_max_seconds:
+                    del self.online[ip]
+                    self.down_since.setdefault(ip, sess["add_time"] + self.session_max_seconds)
+
+    def is_online(self, ip):
+        self.expire_sessions()
+        with self.lock:
+            return ip in self.online
+
+    def new_challenge(self, username, ip):
+        token = "".join(random.choice(string.hexdigits.lower()) for _ in range(64))
+        with self.lock:
+            self.challenges[(username, ip)] = (token, time.time() + self.challenge_ttl)
+        return token
+
+    def reject(self, reason, crypto=False):
+        with self.lock:
+            self.counters["login_rejected"] += 1
+            if crypto:
+                self.counters["crypto_rejected"] += 1
+            self.rejections.append(reason)
+        return {"res": "login_error", "error": reason, "ecode": "E2901"}
+
+    def login(self, q):
+        username = q.get("username", "")
+        ip = q.get("ip", "")
+        ac_id = q.get("ac_id", "")
+        n = q.get("n", "")
+        type_ = q.get("type", "")
+        info = q.get("info", "")
+        password = q.get("password", "")
+
+        with self.lock:
+            token, expires = self.challenges.get((username, ip), (None, 0))
+        if not token or time.time() > expires:
+            return self.reject("challenge_expire_error")
+
+        expected_pwd = self.users.get(username)
+        if expected_pwd is None:
+            return self.reject("E2531: User not found.")
+
+        hmd5 = hmac.new(token.encode(), expected_pwd.encode(), hashlib.md5).hexdigest()
+        if password != "{MD5}" + hmd5:
+            return self.reject("E2901: (Third party 1)bind_user2: ldap_bind error", True)
+
+        try:
+            decoded = decode_srbx1(info, token)
+        except Exception as e:
+            return self.reject(f"info_error: {e}", True)
+        if (
+            decoded.get("username") != username
+            or decoded.get("password") != expected_pwd
+            or decoded.get("ip") != ip
+            or decoded.get("acid") != ac_id
+        ):
+            return self.reject("info_error: 字段不匹配", True)
+
+        chk = token + username + token + hmd5 + token + ac_id + token + ip
+        chk += token + n + token + type_ + token + info
+        if q.get("chksum") != hashlib.sha1(chk.encode()).hexdigest():
+            return self.reject("sign_error", True)
+
+        now = time.time()
+        self.expire_sessions()
+        with self.lock:
+            self.challenges.pop((username, ip), None)
+            if ip in self.online:
+                # 和真实门户一样，已在线的IP不能重新登录，会话也不会续期
+                self.counters["already_online"] += 1
+                return {
+                    "res": "ip_already_online_error",
+                    "error": "ip_already_online_error",
+                    "ecode": "E2620",
+                }
+            self.online[ip] = {"user_name": username, "add_time": now}
+            self.counters["login_ok"] += 1
+            down = self.down_since.pop(ip, None)
+            if down is not None:
+                self.downtimes.append(now - down)
+        return {"res": "ok", "error": "ok", "online_ip": ip, "suc_msg": "login_ok"}
+
+    def logout(self, q):
+        ip = q.get("ip", "")
+        with self.lock:
+            existed = self.online.pop(ip, None) is not None
+            # 主动注销到重新登录之间同样算作断网
+            if existed:
+                self.down_since.setdefault(ip, time.time())
+        return {"res": "ok" if existed else "not_online_error", "error": "ok"}
+
+    def user_info(self, ip):
+        self.expire_sessions()
+        with self.lock:
+            sess = self.online.get(ip)
+            if not sess:
+                return {"error": "not_online_error", "client_ip": ip}
+            info = {
+                "error": "ok",
+                "online_ip": ip,
+                "user_name": sess["user_name"],
+                "add_time": int(sess["add_time"]),
+                "keepalive_time": int(time.time()),
+                "sum_seconds": int(time.time() - sess["add_time"]),
+                "sum_bytes": 0,
+            }
+            if self.session_max_seconds:
+                info["remain_seconds"] = max(
+                    int(sess["add_time"] + self.session_max_seconds - time.time()), 0
+                )
+            return info
+
+    def stats(self):
+        with self.lock:
+            return {
+                **self.counters,
+                "online": sorted(self.online),
+                "downtimes": list(self.downtimes),
+                "rejections": list(self.rejections[-20:]),
+            }
+
+
+class PortalHandler(BaseHTTPRequestHandler):
+    server_version = "srun-stub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/plain; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _jsonp(self, q, payload):
+        callback = q.get("callback", "jQuery")
+        self._send(200, f"{callback}({json.dumps(payload)})", "text/javascript")
+
+    def do_GET(self):
+        state = self.server.state
+        parsed = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(parsed.query, keep_blank_values=True).items()}
+
+        delay = state.response_delay()
+        if delay:
+            time.sleep(delay)
+        if state.in_outage():
+            self._send(503, "portal unavailable")
+            return
+
+        path = parsed.path
+        if path == "/cgi-bin/get_challenge":
+            state.count("get_challenge")
+            token = state.new_challenge(q.get("username", ""), q.get("ip", ""))
+            self._jsonp(q, {"challenge": token, "error": "ok", "res": "ok", "client_ip": q.get("ip", "")})
+        elif path == "/cgi-bin/srun_portal":
+            state.count("srun_portal")
+            if q.get("action") == "logout":
+                self._jsonp(q, state.logout(q))
+            else:
+                self._jsonp(q, state.login(q))
+        elif path == "/cgi-bin/rad_user_info":
+            state.count("rad_user_info")
+            self._jsonp(q, state.user_info(q.get("ip") or self.client_address[0]))
+        elif path == "/probe":
+            # 模拟外网探测：只有在线的IP才能访问
+            state.count("probe")
+            ip = q.get("ip") or self.client_address[0]
+            if state.is_online(ip):
+                self._send(200, "ok")
+            else:
+                self._send(403, "not online")
+        elif path == "/stats":
+            self._send(200, json.dumps(state.stats()), "application/json")
+        else:
+            self._send(404, "not found")
+
+
+class SrunPortalStub:
+    """在后台线程里运行的门户替身，并可按脚本注入故障
+
+    script 形如 [{"at": 5, "kind": "logout"}, {"at": 20, "kind": "outage", "duration": 8},
+    {"at": 40, "kind": "slow", "duration": 10, "delay": 2}]，at 为相对启动时间的秒数。
+    """
+
+    def __init__(self, users, host="127.0.0.1", port=0, session_max_seconds=None):
+        self.state = PortalState(users, session_max_seconds=session_max_seconds)
+        self.httpd = ThreadingHTTPServer((host, port), PortalHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self._threads = []
+        self._stop = threading.Event()
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def run_script(self, script):
+        def runner():
+            start = time.time()
+            for event in sorted(script, key=lambda e: e["at"]):
+                if self._stop.wait(max(0, start + event["at"] - time.time())):
+                    return
+                kind = event["kind"]
+                if kind == "logout":
+                    self.state.force_logout(event.get("ip"))
+                elif kind == "outage":
+                    self.state.start_outage(event.get("duration", 5))
+                elif kind == "slow":
+                    self.state.start_slow(event.get("duration", 5), event.get("delay", 1))
+
+        thread = threading.Thread(target=runner, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 SRUN 门户替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8801)
+    parser.add_argument("--user", action="append", default=[], help="账号:密码，可重复")
+    parser.add_argument("--session-max", type=int, default=None, help="会话强制下线秒数")
+    parser.add_argument("--script", help="故障脚本JSON文件")
+    args = parser.parse_args()
+
+    users = dict(u.split(":", 1) for u in args.user) or {"2024000000": "password"}
+    stub = SrunPortalStub(users, args.host, args.port, args.session_max).start()
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            stub.run_script(json.load(f))
+    print(f"SRUN门户替身运行于 {stub.base_url} ，账号: {', '.join(users)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
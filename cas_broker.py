@@ -0,0 +1,168 @@
+import os
+import time
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from color_print import ColorPrint
+from hitsz_auth import HITSZAuth, LoginResult
+
+
+class HITSZCASBroker:
+    """一次统一身份认证，为多个校内服务分别签发 ticket
+
+    用账号密码在 ids.hit.edu.cn 登录一次拿到 CASTGC，之后每个登记的服务
+    只需要 GET /authserver/login?service=... 换一个 ticket，再用各自的会话兑换，
+    多个服务并发进行。每个服务仍然由自己的 HITSZAuth 子类对象持有会话和Cookie文件。
+    """
+
+    def __init__(self, username=None, password=None, max_workers=4):
+        self.auth = HITSZAuth(username, password)
+        self.auth.cookies_file = "hitsz_cas_cookies.json"
+        self.max_workers = max_workers
+        self.consumers = {}
+
+    def register(self, consumer, name=None):
+        """登记一个需要会话的服务，consumer 是 HITSZAuth 或其子类的实例"""
+        name = name or consumer.service_url
+        self.consumers[name] = consumer
+        return consumer
+
+    def _cas_cookies(self):
+        host = urlsplit(self.auth.base_url).hostname
+        return [c for c in self.auth.session.cookies if c.domain.lstrip(".") == host]
+
+    def _has_tgc(self):
+        return any(c.name == "CASTGC" for c in self._cas_cookies())
+
+    def _cas_alive(self):
+        """不带 service 访问登录地址：CASTGC 有效时跳走，失效时返回登录表单，不会签发 ticket"""
+        if not self._has_tgc():
+            return False
+        try:
+            response = self.auth.session.get(
+                f"{self.auth.base_url}/authserver/login",
+                headers=self.auth.headers,
+                allow_redirects=False,
+                timeout=10,
+            )
+        except Exception:
+            return False
+        if response.status_code in (301, 302, 303):
+            return "/authserver/login" not in response.headers.get("Location", "")
+        return response.status_code == 200 and 'id="pwdFromId"' not in response.text
+
+    def authenticate(self):
+        """用账号密码做唯一一次统一身份认证，只拿 CASTGC，已有有效 CASTGC 时跳过"""
+        if not self._cas_cookies() and os.path.exists(self.auth.cookies_file):
+            self.auth.load_cookies()
+        if self._cas_alive():
+            ColorPrint.success("统一身份认证会话仍然有效")
+            return True
+        self.auth.session = self.auth.new_session()
+        return self._login_tgc()
+
+    def _login_tgc(self):
+        """不带 service 提交密码，认证服务器只下发 CASTGC，ticket 兑换统一放到 issue_all 里做"""
+        auth = self.auth
+        if not auth.username or not auth.password:
+            ColorPrint.error("需要用户名和密码进行登录")
+            return LoginResult(LoginResult.BAD_CREDENTIALS, "缺少用户名或密码")
+
+        ColorPrint.subheader("统一身份认证登录", style="bracket")
+        blocked = auth.precheck_login(auth.username)
+        if blocked is not None:
+            return blocked
+
+        # 登录页和表单地址都不带 service
+        auth.service_url = None
+        login_page = auth.get_login_page()
+        if not login_page:
+            return LoginResult(LoginResult.ERROR, "获取登录页面失败")
+        login_params = auth.extract_login_params(login_page)
+        if not login_params:
+            return LoginResult(LoginResult.ERROR, "解析登录参数失败")
+
+        ColorPrint.process("提交统一身份认证信息...")
+        try:
+            response = auth.session.post(
+                f"{auth.base_url}/authserver/login",
+                data=auth.build_login_data(auth.username, auth.password, login_params),
+                headers={**auth.login_post_headers(), "Referer": f"{auth.base_url}/authserver/login"},
+                allow_redirects=False,
+                timeout=15,
+            )
+        except Exception as e:
+            ColorPrint.error(f"统一身份认证异常: {e}")
+            return LoginResult(LoginResult.ERROR, str(e))
+
+        if self._has_tgc():
+            result = LoginResult(LoginResult.OK)
+        else:
+            result = auth.classify_login_failure(response.status_code, response.text)
+        result = auth.note_login_result(auth.username, result)
+        if result:
+            auth.save_cookies(quiet=True)
+            ColorPrint.success("统一身份认证成功")
+        return result
+
+    def issue(self, name):
+        """为一个服务签发并兑换 ticket，服务会话拿到各自的Cookie"""
+        consumer = self.consumers[name]
+        consumer.session = consumer.new_session()
+        # 每个服务一个独立会话，带上 CASTGC 去签发 ticket，线程之间互不共享会话
+        for cookie in self._cas_cookies():
+            consumer.session.cookies.set_cookie(cookie)
+
+        try:
+            redirect_url = consumer.request_service_ticket()
+            if not redirect_url:
+                ColorPrint.error(f"[{name}] 签发ticket失败，统一身份认证会话可能已失效")
+                return False
+            if not consumer.visit_service(redirect_url):
+                ColorPrint.error(f"[{name}] ticket兑换失败")
+                return False
+        except Exception as e:
+            ColorPrint.error(f"[{name}] 签发ticket异常: {e}")
+            return False
+
+        consumer.validated_at = time.time()
+        consumer.session_model.record_login(consumer.validated_at)
+        consumer.remember_validity(True)
+        consumer.save_cookies(quiet=True)
+        ColorPrint.success(f"[{name}] 服务会话就绪")
+        return True
+
+    def issue_all(self):
+        """并发为所有登记的服务签发 ticket，返回 {服务名: 是否成功}"""
+        names = list(self.consumers)
+        if not names:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as pool:
+            results = dict(zip(names, pool.map(self.issue, names)))
+        return results
+
+    def login_all(self):
+        """一次认证加上全部服务的 ticket 兑换，统一身份认证会话失效时重新认证一次"""
+        ColorPrint.subheader("统一身份认证(多服务)", style="bracket")
+        if not self.authenticate():
+            return {name: False for name in self.consumers}
+
+        results = self.issue_all()
+        failed = [name for name, ok in results.items() if not ok]
+        if failed and not self._cas_alive():
+            ColorPrint.warning("统一身份认证会话丢失，重新认证后重试失败的服务")
+            if self.authenticate():
+                for name in failed:
+                    results[name] = self.issue(name)
+
+        ok_count = sum(results.values())
+        ColorPrint.info(f"服务会话: {ok_count}/{len(results)} 成功")
+        self.auth.save_cookies(quiet=True)
+        return results
+
+    def refresh(self, name):
+        """单个服务会话失效时只重新签发 ticket，不再提交密码"""
+        if self.issue(name):
+            return True
+        if self.authenticate():
+            return self.issue(name)
+        return False
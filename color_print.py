@@ -2,6 +2,7 @@ from colorama import Fore, Style, Back, init
 import sys
 import time
 from datetime import datetime
+from log_sink import sink
 
 # 初始化colorama，支持Windows终端彩色输出
 init(autoreset=True)
@@ -51,34 +52,43 @@ class ColorPrint:
         return " ".join(parts)
 
     @staticmethod
-    def success(text, end="\n"):
-        message = f"{Fore.GREEN}✅ {text}{Style.RESET_ALL}"
-        print(message, end=end)
+    def _emit(level, color, icon, text, args, end, stream="stdout"):
+        # 先按级别过滤，被过滤的消息连 % 格式化都不做
+        if not sink.enabled(level):
+            return
+        if args:
+            text = text % args
+        sink.write(f"{color}{icon} {text}{Style.RESET_ALL}", end, stream)
 
     @staticmethod
-    def error(text, end="\n"):
-        message = f"{Fore.RED}❌ {text}{Style.RESET_ALL}"
-        print(message, end=end, file=sys.stderr)
+    def _line(message, end="\n"):
+        # 标题、表格、分隔线等是界面结构（菜单、汇总表），不受级别和 quiet 过滤；
+        # 仍然经过 sink，缓冲期间和其他消息保持顺序，输出不是终端时去掉颜色码
+        sink.write(message, end)
 
     @staticmethod
-    def warning(text, end="\n"):
-        message = f"{Fore.YELLOW}⚠️  {text}{Style.RESET_ALL}"
-        print(message, end=end)
+    def success(text, *args, end="\n"):
+        ColorPrint._emit("success", Fore.GREEN, "✅", text, args, end)
 
     @staticmethod
-    def info(text, end="\n"):
-        message = f"{Fore.CYAN}ℹ️  {text}{Style.RESET_ALL}"
-        print(message, end=end)
+    def error(text, *args, end="\n"):
+        ColorPrint._emit("error", Fore.RED, "❌", text, args, end, "stderr")
 
     @staticmethod
-    def process(text, end="\n"):
-        message = f"{Fore.BLUE}🔄 {text}{Style.RESET_ALL}"
-        print(message, end=end)
+    def warning(text, *args, end="\n"):
+        ColorPrint._emit("warning", Fore.YELLOW, "⚠️ ", text, args, end)
 
     @staticmethod
-    def debug(text, end="\n"):
-        message = f"{Fore.WHITE}{Style.DIM}🐛 {text}{Style.RESET_ALL}"
-        print(message, end=end)
+    def info(text, *args, end="\n"):
+        ColorPrint._emit("info", Fore.CYAN, "ℹ️ ", text, args, end)
+
+    @staticmethod
+    def process(text, *args, end="\n"):
+        ColorPrint._emit("process", Fore.BLUE, "🔄", text, args, end)
+
+    @staticmethod
+    def debug(text, *args, end="\n"):
+        ColorPrint._emit("debug", Fore.WHITE + Style.DIM, "🐛", text, args, end)
 
     @staticmethod
     def header(text, char="═", width=60, style="double"):
@@ -92,21 +102,21 @@ class ColorPrint:
             style: 样式 ("double", "single", "bold", "gradient", "box")
         """
         if style == "double":
-            print(f"\n{Fore.MAGENTA}{Style.BRIGHT}╔{'═' * (width-2)}╗{Style.RESET_ALL}")
-            print(f"{Fore.MAGENTA}{Style.BRIGHT}║{text:^{width-2}}║{Style.RESET_ALL}")
-            print(f"{Fore.MAGENTA}{Style.BRIGHT}╚{'═' * (width-2)}╝{Style.RESET_ALL}\n")
+            ColorPrint._line(f"\n{Fore.MAGENTA}{Style.BRIGHT}╔{'═' * (width-2)}╗{Style.RESET_ALL}")
+            ColorPrint._line(f"{Fore.MAGENTA}{Style.BRIGHT}║{text:^{width-2}}║{Style.RESET_ALL}")
+            ColorPrint._line(f"{Fore.MAGENTA}{Style.BRIGHT}╚{'═' * (width-2)}╝{Style.RESET_ALL}\n")
 
         elif style == "single":
-            print(f"\n{Fore.CYAN}{Style.BRIGHT}┌{'─' * (width-2)}┐{Style.RESET_ALL}")
-            print(f"{Fore.CYAN}{Style.BRIGHT}│{text:^{width-2}}│{Style.RESET_ALL}")
-            print(f"{Fore.CYAN}{Style.BRIGHT}└{'─' * (width-2)}┘{Style.RESET_ALL}\n")
+            ColorPrint._line(f"\n{Fore.CYAN}{Style.BRIGHT}┌{'─' * (width-2)}┐{Style.RESET_ALL}")
+            ColorPrint._line(f"{Fore.CYAN}{Style.BRIGHT}│{text:^{width-2}}│{Style.RESET_ALL}")
+            ColorPrint._line(f"{Fore.CYAN}{Style.BRIGHT}└{'─' * (width-2)}┘{Style.RESET_ALL}\n")
 
         elif style == "bold":
-            print(f"\n{Fore.YELLOW}{Style.BRIGHT}█{'█' * (width-2)}█{Style.RESET_ALL}")
-            print(
+            ColorPrint._line(f"\n{Fore.YELLOW}{Style.BRIGHT}█{'█' * (width-2)}█{Style.RESET_ALL}")
+            ColorPrint._line(
                 f"{Fore.BLACK}{Back.YELLOW}{Style.BRIGHT}{text:^{width}}{Style.RESET_ALL}"
             )
-            print(f"{Fore.YELLOW}{Style.BRIGHT}█{'█' * (width-2)}█{Style.RESET_ALL}\n")
+            ColorPrint._line(f"{Fore.YELLOW}{Style.BRIGHT}█{'█' * (width-2)}█{Style.RESET_ALL}\n")
 
         elif style == "gradient":
             colors = [
@@ -122,25 +132,25 @@ class ColorPrint:
                 color = colors[i % len(colors)]
                 border += f"{color}▆"
 
-            print(f"\n{border}{Style.RESET_ALL}")
-            print(f"{Fore.WHITE}{Style.BRIGHT}{text:^{width}}{Style.RESET_ALL}")
-            print(f"{border}{Style.RESET_ALL}\n")
+            ColorPrint._line(f"\n{border}{Style.RESET_ALL}")
+            ColorPrint._line(f"{Fore.WHITE}{Style.BRIGHT}{text:^{width}}{Style.RESET_ALL}")
+            ColorPrint._line(f"{border}{Style.RESET_ALL}\n")
 
         elif style == "box":
             # 方框样式
-            print(f"\n{Fore.GREEN}{Style.BRIGHT}┏{'━' * (width-2)}┓{Style.RESET_ALL}")
-            print(
+            ColorPrint._line(f"\n{Fore.GREEN}{Style.BRIGHT}┏{'━' * (width-2)}┓{Style.RESET_ALL}")
+            ColorPrint._line(
                 f"{Fore.GREEN}{Style.BRIGHT}┃{' ' * ((width-len(text)-2)//2)}{Fore.WHITE}{Style.BRIGHT}{text}{Fore.GREEN}{' ' * ((width-len(text)-2)//2 + (width-len(text)-2)%2)}┃{Style.RESET_ALL}"
             )
-            print(f"{Fore.GREEN}{Style.BRIGHT}┗{'━' * (width-2)}┛{Style.RESET_ALL}\n")
+            ColorPrint._line(f"{Fore.GREEN}{Style.BRIGHT}┗{'━' * (width-2)}┛{Style.RESET_ALL}\n")
 
         else:
             # 默认样式（原来的风格但优化）
-            print(f"\n{Fore.MAGENTA}{Style.BRIGHT}{'═' * width}{Style.RESET_ALL}")
-            print(
+            ColorPrint._line(f"\n{Fore.MAGENTA}{Style.BRIGHT}{'═' * width}{Style.RESET_ALL}")
+            ColorPrint._line(
                 f"{Fore.WHITE}{Back.MAGENTA}{Style.BRIGHT}{text:^{width}}{Style.RESET_ALL}"
             )
-            print(f"{Fore.MAGENTA}{Style.BRIGHT}{'═' * width}{Style.RESET_ALL}\n")
+            ColorPrint._line(f"{Fore.MAGENTA}{Style.BRIGHT}{'═' * width}{Style.RESET_ALL}\n")
 
     @staticmethod
     def subheader(text, char="─", width=40, style="simple"):
@@ -154,39 +164,39 @@ class ColorPrint:
             style: 样式 ("simple", "bracket", "arrow", "star", "wave")
         """
         if style == "simple":
-            print(f"\n{Fore.CYAN}{Style.BRIGHT}┌{'─' * (width-2)}┐{Style.RESET_ALL}")
-            print(
+            ColorPrint._line(f"\n{Fore.CYAN}{Style.BRIGHT}┌{'─' * (width-2)}┐{Style.RESET_ALL}")
+            ColorPrint._line(
                 f"{Fore.CYAN}│ {Fore.WHITE}{Style.BRIGHT}{text:<{width-4}} {Fore.CYAN}│{Style.RESET_ALL}"
             )
-            print(f"{Fore.CYAN}└{'─' * (width-2)}┘{Style.RESET_ALL}")
+            ColorPrint._line(f"{Fore.CYAN}└{'─' * (width-2)}┘{Style.RESET_ALL}")
 
         elif style == "bracket":
             padding = (width - len(text) - 4) // 2
-            print(
+            ColorPrint._line(
                 f"\n{Fore.YELLOW}{Style.BRIGHT}{'─' * padding}[ {Fore.WHITE}{text} {Fore.YELLOW}]{'─' * padding}{Style.RESET_ALL}"
             )
 
         elif style == "arrow":
-            print(
+            ColorPrint._line(
                 f"\n{Fore.GREEN}{Style.BRIGHT}▶ {Fore.WHITE}{text} {Fore.GREEN}◀{Style.RESET_ALL}"
             )
-            print(f"{Fore.GREEN}{'─' * width}{Style.RESET_ALL}")
+            ColorPrint._line(f"{Fore.GREEN}{'─' * width}{Style.RESET_ALL}")
 
         elif style == "star":
             padding = (width - len(text) - 6) // 2
-            print(
+            ColorPrint._line(
                 f"\n{Fore.YELLOW}{Style.BRIGHT}{'*' * padding}★ {Fore.WHITE}{text} {Fore.YELLOW}★{'*' * padding}{Style.RESET_ALL}"
             )
 
         elif style == "wave":
-            print(f"\n{Fore.BLUE}{Style.BRIGHT}{'～' * width}{Style.RESET_ALL}")
-            print(f"{Fore.CYAN}{Style.BRIGHT}{text:^{width}}{Style.RESET_ALL}")
-            print(f"{Fore.BLUE}{'～' * width}{Style.RESET_ALL}")
+            ColorPrint._line(f"\n{Fore.BLUE}{Style.BRIGHT}{'～' * width}{Style.RESET_ALL}")
+            ColorPrint._line(f"{Fore.CYAN}{Style.BRIGHT}{text:^{width}}{Style.RESET_ALL}")
+            ColorPrint._line(f"{Fore.BLUE}{'～' * width}{Style.RESET_ALL}")
 
         else:
-            print(f"\n{Fore.CYAN}{Style.BRIGHT}{char * width}{Style.RESET_ALL}")
-            print(f"{Fore.WHITE}{Style.BRIGHT}{text:^{width}}{Style.RESET_ALL}")
-            print(f"{Fore.CYAN}{char * width}{Style.RESET_ALL}")
+            ColorPrint._line(f"\n{Fore.CYAN}{Style.BRIGHT}{char * width}{Style.RESET_ALL}")
+            ColorPrint._line(f"{Fore.WHITE}{Style.BRIGHT}{text:^{width}}{Style.RESET_ALL}")
+            ColorPrint._line(f"{Fore.CYAN}{char * width}{Style.RESET_ALL}")
 
     @staticmethod
     def section_divider(text="", char="═", width=60, color=Fore.CYAN):
@@ -196,26 +206,26 @@ class ColorPrint:
             side_len = (width - text_len - 2) // 2
             remainder = (width - text_len - 2) % 2
 
-            print(
+            ColorPrint._line(
                 f"\n{color}{Style.BRIGHT}{char * side_len} {Fore.WHITE}{text} {color}{char * (side_len + remainder)}{Style.RESET_ALL}\n"
             )
         else:
             # 纯分隔线
-            print(f"\n{color}{Style.BRIGHT}{char * width}{Style.RESET_ALL}\n")
+            ColorPrint._line(f"\n{color}{Style.BRIGHT}{char * width}{Style.RESET_ALL}\n")
 
     @staticmethod
     def separator(char="-", width=60, color=Fore.WHITE):
-        print(f"{color}{char*width}{Style.RESET_ALL}")
+        ColorPrint._line(f"{color}{char*width}{Style.RESET_ALL}")
 
     @staticmethod
     def highlight(text, bg_color=Back.YELLOW, text_color=Fore.BLACK):
         message = f"{bg_color}{text_color} {text} {Style.RESET_ALL}"
-        print(message)
+        ColorPrint._line(message)
 
     @staticmethod
     def custom(text, color=Fore.WHITE, bg_color="", style="", icon="", end="\n"):
         message = f"{style}{bg_color}{color}{icon}{text if not icon else ' ' + text}{Style.RESET_ALL}"
-        print(message, end=end)
+        ColorPrint._line(message, end)
 
     @staticmethod
     def rainbow_text(text):
@@ -225,7 +235,7 @@ class ColorPrint:
             color = colors[i % len(colors)]
             result += f"{color}{char}"
         result += Style.RESET_ALL
-        print(result)
+        ColorPrint._line(result)
 
     @staticmethod
     def typing_effect(text, delay=0.05, color=Fore.GREEN):
@@ -245,7 +255,7 @@ class ColorPrint:
         row = "|"
         for i, (col, width, color) in enumerate(zip(columns, widths, colors)):
             row += f" {color}{str(col):<{width-1}}{Style.RESET_ALL}|"
-        print(row)
+        ColorPrint._line(row)
 
     @staticmethod
     def table_header(*headers, widths=None):
@@ -255,13 +265,13 @@ class ColorPrint:
         border = "+"
         for width in widths:
             border += "-" * width + "+"
-        print(f"{Fore.CYAN}{border}{Style.RESET_ALL}")
+        ColorPrint._line(f"{Fore.CYAN}{border}{Style.RESET_ALL}")
 
         ColorPrint.table_row(
             *headers, widths=widths, colors=[Fore.YELLOW + Style.BRIGHT] * len(headers)
         )
 
-        print(f"{Fore.CYAN}{border}{Style.RESET_ALL}")
+        ColorPrint._line(f"{Fore.CYAN}{border}{Style.RESET_ALL}")
 
     @staticmethod
     def ask_yes_no(question, default=None):
@@ -0,0 +1,215 @@
+import json
+import os
+import time
+import threading
+from color_print import ColorPrint
+
+
+def classify_outcome(status, message="", success=False, expired=False):
+    """把一次选课请求的结果归类，便于事后统计"""
+    if expired:
+        return "expired"
+    if success:
+        return "success"
+    if status is None:
+        if "超时" in message:
+            return "timeout"
+        return "error"
+    if status != 200:
+        return "server_error" if status >= 500 else "http_error"
+    if message in ("", "ok"):
+        return "ok"
+    # 冲突和课满要先判断："与已选课程时间冲突"、"已选人数已满" 里也有 "已选"
+    for keyword, outcome in (
+        ("冲突", "conflict"),
+        ("已满", "full"),
+        ("选满", "full"),
+        ("人数", "full"),
+        ("余量", "full"),
+        ("未开放", "not_open"),
+        ("不在", "not_open"),
+        ("内部错误", "server_error"),
+        ("解析失败", "parse_error"),
+    ):
+        if keyword in message:
+            return outcome
+    # 只有明确说这门课已经选上时才算 already
+    if message.startswith("已选") or "该课程已选" in message:
+        return "already"
+    return "rejected"
+
+
+class Histogram:
+    """HDR 风格的对数-线性直方图
+
+    以微秒为单位，每个 2 的幂区间再等分成 2**precision_bits 份，
+    相对误差不超过 1/2**precision_bits，只保存出现过的桶。
+    """
+
+    def __init__(self, precision_bits=5):
+        self.precision_bits = precision_bits
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, micros):
+        shift = max(0, micros.bit_length() - self.precision_bits)
+        return (micros >> shift) << shift, shift
+
+    def record(self, seconds):
+        micros = max(0, int(seconds * 1_000_000))
+        key = self._bucket(micros)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.total += micros
+        self.min = micros if self.min is None else min(self.min, micros)
+        self.max = micros if self.max is None else max(self.max, micros)
+
+    def percentile(self, q):
+        """q 分位所在桶的上界（秒），和 HDR 一样偏保守"""
+        if not self.count:
+            return None
+        target = max(1, -(-self.count * q // 100))
+        seen = 0
+        for lower, shift in sorted(self.buckets):
+            seen += self.buckets[(lower, shift)]
+            if seen >= target:
+                upper = lower + (1 << shift) - 1
+                return min(upper, self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def mean(self):
+        return self.total / self.count / 1_000_000 if self.count else None
+
+
+class EventLog:
+    """抢课请求的结构化事件，写成 JSON Lines，并按接口累计延迟直方图"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._file = None
+        self._closed = False
+        self.lock = threading.Lock()
+        self.start_run()
+
+    def start_run(self, t0=None):
+        """开始新的一轮统计，t0 为选课开始时间，用于计算成功用时"""
+        # close() 之后只有开始新的一轮才重新写文件
+        self._closed = False
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+        self.t0 = t0 or time.time()
+        self.histograms = {}
+        self.outcomes = {}
+        self.attempts = {}
+        self.first_success = {}
+
+    def emit(
+        self,
+        endpoint,
+        status,
+        outcome,
+        latency,
+        course_id=None,
+        attempt=None,
+        **extra,
+    ):
+        now = time.time()
+        with self.lock:
+            if course_id:
+                self.attempts[course_id] = self.attempts.get(course_id, 0) + 1
+                if attempt is None:
+                    attempt = self.attempts[course_id]
+        event = {
+            "ts": round(now, 6),
+            "run": self.run_id,
+            "endpoint": endpoint,
+            "course_id": course_id,
+            "attempt": attempt or 1,
+            "status": status,
+            "outcome": outcome,
+            "latency_ms": round(latency * 1000, 3),
+        }
+        event.update(extra)
+
+        with self.lock:
+            self.histograms.setdefault(endpoint, Histogram()).record(latency)
+            counts = self.outcomes.setdefault(endpoint, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+            if outcome in ("success", "already") and course_id:
+                self.first_success.setdefault(course_id, now - self.t0)
+            if self.path and not self._closed:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+        return event
+
+    def close(self):
+        """关闭文件，之后的事件只计入内存统计，直到下一次 start_run()"""
+        with self.lock:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def summary(self):
+        endpoints = {}
+        for endpoint, hist in self.histograms.items():
+            endpoints[endpoint] = {
+                "count": hist.count,
+                "mean_ms": hist.mean() * 1000,
+                "p50_ms": hist.percentile(50) * 1000,
+                "p90_ms": hist.percentile(90) * 1000,
+                "p99_ms": hist.percentile(99) * 1000,
+                "max_ms": hist.max / 1000,
+                "outcomes": dict(self.outcomes.get(endpoint, {})),
+            }
+        courses = {
+            course_id: {
+                "attempts": attempts,
+                "time_to_success_s": self.first_success.get(course_id),
+            }
+            for course_id, attempts in self.attempts.items()
+        }
+        return {"run": self.run_id, "endpoints": endpoints, "courses": courses}
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary["endpoints"]:
+            return summary
+
+        ColorPrint.subheader("请求统计", style="bracket")
+        widths = [20, 8, 10, 10, 10, 10]
+        ColorPrint.table_header(
+            "接口", "次数", "p50(ms)", "p90(ms)", "p99(ms)", "最大(ms)", widths=widths
+        )
+        for endpoint, item in sorted(summary["endpoints"].items()):
+            ColorPrint.table_row(
+                endpoint,
+                item["count"],
+                f"{item['p50_ms']:.1f}",
+                f"{item['p90_ms']:.1f}",
+                f"{item['p99_ms']:.1f}",
+                f"{item['max_ms']:.1f}",
+                widths=widths,
+            )
+            outcomes = "，".join(
+                f"{k} {v}" for k, v in sorted(item["outcomes"].items())
+            )
+            ColorPrint.info(f"{endpoint} 结果分布: {outcomes}")
+
+        for course_id, item in summary["courses"].items():
+            elapsed = item["time_to_success_s"]
+            if elapsed is None:
+                ColorPrint.warning(
+                    f"课程 {course_id[:8]}... 请求 {item['attempts']} 次，未成功"
+                )
+            else:
+                ColorPrint.success(
+                    f"课程 {course_id[:8]}... 请求 {item['attempts']} 次，"
+                    f"开始后 {elapsed:.2f} 秒成功"
+                )
+        if self.path:
+            ColorPrint.info(f"详细事件已写入: {os.path.abspath(self.path)}")
+        return summary
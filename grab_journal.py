@@ -0,0 +1,101 @@
+"""抢课断点日志
+
+每门课有了确定结果（选上、已选、永久失败）时追加一行 JSON 并 fsync，进程崩溃、被杀
+或 Ctrl+C 后重新运行同一账号同一学期的抢课，会跳过日志里已经选上和永久失败的课。
+只追加不改写，最后一行写了一半时读取会忽略它；clear() 追加一条重置记录，
+之前的记录对该范围不再生效。
+"""
+
+import os
+import json
+import time
+import threading
+
+# 这些结果重试也不会成功，记为永久失败；课满、未开放等会变化的结果不记
+PERMANENT_FAILURES = ("conflict",)
+SUCCEEDED = ("success", "already")
+
+
+def final_state(outcome):
+    """classify_outcome 的分类对应的确定结果: "succeeded" / "failed"，还要重试时为 None"""
+    if outcome in SUCCEEDED:
+        return "succeeded"
+    if outcome in PERMANENT_FAILURES:
+        return "failed"
+    return None
+
+
+class GrabJournal:
+    def __init__(self, path, max_age=24 * 3600):
+        self.path = path
+        # 太久以前的记录不再使用，下一轮选课不受上一轮影响
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self._file = None
+
+    def load(self, scope):
+        """返回 {课程ID: "succeeded" | "failed"}，同一门课以最后一条为准"""
+        states = {}
+        if not os.path.exists(self.path):
+            return states
+        oldest = time.time() - self.max_age
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 写到一半时被中断的行
+                if record.get("scope") != scope or record.get("ts", 0) < oldest:
+                    continue
+                if record.get("reset"):
+                    states = {}
+                    continue
+                states[record["course_id"]] = record["state"]
+        return states
+
+    def record(self, scope, course_id, state, outcome, message=""):
+        """追加一门课的确定结果，写入磁盘后才返回"""
+        self._append(
+            {
+                "ts": round(time.time(), 3),
+                "scope": scope,
+                "course_id": course_id,
+                "state": state,
+                "outcome": outcome,
+                "message": message,
+            }
+        )
+
+    def clear(self, scope):
+        """丢弃该范围之前的所有记录，下次抢课重新请求所有课程"""
+        self._append({"ts": round(time.time(), 3), "scope": scope, "reset": True})
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            if self._file is None:
+                torn = self._torn_tail()
+                self._file = open(self.path, "a", encoding="utf-8")
+                if torn:
+                    # 上次写到一半的行补上换行，新记录从新的一行开始
+                    self._file.write("\n")
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _torn_tail(self):
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return False
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except FileNotFoundError:
+            return False
+
+    def close(self):
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
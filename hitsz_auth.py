@@ -1,36 +1,111 @@
-import requests
-from bs4 import BeautifulSoup
 import base64
+import hashlib
 import json
 import os
+import tempfile
+import threading
 import time
 from color_print import ColorPrint
+import latency
+from session_model import SessionLifetimeModel
+
+COOKIE_SNAPSHOT_VERSION = 2
+
+# 需要验证码时按账号退避：首次 60 秒，之后每次翻倍，最长 30 分钟
+CAPTCHA_BACKOFF_BASE = 60
+CAPTCHA_BACKOFF_MAX = 1800
+
+
+class LoginResult:
+    """登录结果，可以直接当 bool 用，失败时带上原因"""
+
+    OK = "ok"
+    BAD_CREDENTIALS = "bad_credentials"
+    CAPTCHA_REQUIRED = "captcha_required"
+    THROTTLED = "throttled"
+    ERROR = "error"
+
+    def __init__(self, status, message="", retry_after=0):
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+    def __bool__(self):
+        return self.status == self.OK
+
+    @property
+    def retryable(self):
+        """验证码、退避和密码错误重试也没用，只有普通错误值得立即重试"""
+        return self.status == self.ERROR
+
+    def __repr__(self):
+        return f"LoginResult({self.status!r}, {self.message!r})"
 
 
 class HITSZAuth:
+    # 用户名 -> (退避截止时间, 连续需要验证码的次数)，同一进程内所有对象共享
+    _captcha_backoff = {}
 
     def __init__(self, username=None, password=None, service_url=None):
-        self.session = requests.Session()
+        # 登录各阶段的耗时，默认所有认证对象共用一个记录器
+        self.latency = latency.default_recorder
+        # 会话在第一次用到时才创建，启动时不用导入 requests
+        self._session = None
         self.base_url = "https://ids.hit.edu.cn"
         self.service_url = service_url or "http://jw.hitsz.edu.cn/casLogin"
         self.cookies_file = "hitsz_cookies.json"
         self.username = username
         self.password = password
+        # 上次验证Cookie有效的时间，以及在多久内可以免验证直接使用
+        self.validated_at = None
+        self.cookie_fresh_seconds = 600
+        # 会话寿命模型，用于保活和预测性刷新
+        self.session_model = SessionLifetimeModel("hitsz_session_model.json")
+        self.session_model.load()
+        # 探测会话有效性和保活用的地址（由子类按服务设置），以及探测结论的缓存时间
+        self.check_url = None
+        self.validity_ttl = 30
+        self._validity_cache = None
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
             "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
         }
 
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = self.new_session()
+        return self._session
+
+    @session.setter
+    def session(self, value):
+        self._session = value
+
+    def new_session(self):
+        """从共享连接池新建一个会话，Cookie 独立"""
+        from http_transport import get_transport
+
+        return get_transport().session()
+
+    def latency_stats(self, qs=(50, 90, 99)):
+        """登录各阶段耗时的百分位，单位秒"""
+        return self.latency.percentiles(qs=qs)
+
+    def dump_latency(self, path="hitsz_latency.json"):
+        self.latency.dump(path)
+        ColorPrint.info(f"登录耗时已保存到 {path}")
+
     def get_login_page(self):
         ColorPrint.process("访问统一身份认证登录页面...")
         login_url = f"{self.base_url}/authserver/login"
         params = {"service": self.service_url}
 
         try:
-            response = self.session.get(
-                login_url, params=params, headers=self.headers, timeout=10
-            )
+            with self.latency.span("login_page"):
+                response = self.session.get(
+                    login_url, params=params, headers=self.headers, timeout=10
+                )
             if response.status_code == 200:
                 ColorPrint.success("成功获取登录页面")
                 return response.text
@@ -43,6 +118,7 @@ class HITSZAuth:
 
     def extract_login_params(self, html_content):
         ColorPrint.process("解析登录页面参数...")
+        from bs4 import BeautifulSoup
 
         try:
             soup = BeautifulSoup(html_content, "html.parser")
@@ -109,16 +185,14 @@ class HITSZAuth:
             ColorPrint.warning(f"AES加密失败，使用原密码: {e}")
             return password
 
-    def perform_login(self, username, password, login_params):
-        ColorPrint.process("提交统一身份认证信息...")
-        login_url = f"{self.base_url}/authserver/login"
-
+    def build_login_data(self, username, password, login_params):
         # 加密密码
-        encrypted_pwd = self.encrypt_password_with_aes(
-            password, login_params.get("pwdEncryptSalt", "")
-        )
+        with self.latency.span("aes"):
+            encrypted_pwd = self.encrypt_password_with_aes(
+                password, login_params.get("pwdEncryptSalt", "")
+            )
 
-        login_data = {
+        return {
             "username": username,
             "password": encrypted_pwd,
             "_eventId": login_params["_eventId"],
@@ -129,81 +203,164 @@ class HITSZAuth:
             "rememberMe": "true",
         }
 
-        params = {"service": self.service_url}
-        headers = {
+    def login_post_headers(self):
+        return {
             "User-Agent": self.headers["User-Agent"],
             "Referer": f"{self.base_url}/authserver/login?service={self.service_url}",
             "Origin": self.base_url,
             "Content-Type": "application/x-www-form-urlencoded",
         }
 
-        try:
-            response = self.session.post(
-                login_url,
-                params=params,
-                data=login_data,
-                headers=headers,
+    def visit_service(self, redirect_url):
+        """用带 ticket 的重定向地址访问目标服务，换取服务自己的Cookie"""
+        ColorPrint.process("访问目标服务获取Cookie...")
+        with self.latency.span("ticket_redirect"):
+            # ticket 只能兑换一次，网关 502/503/504 时服务端可能已经收下了，不能重发
+            target_response = self.session.get(
+                redirect_url,
+                headers=self.headers,
                 allow_redirects=False,
                 timeout=15,
+                retry_status=False,
             )
 
+        if target_response.status_code == 200:
+            ColorPrint.success("目标服务访问成功")
+            return True
+        elif target_response.status_code == 301:
+            # 处理301重定向
+            ColorPrint.warning("目标服务被永久重定向")
+            new_url = target_response.headers.get("Location")
+            if new_url:
+                ColorPrint.info(f"重定向到: {new_url}")
+                with self.latency.span("service_301"):
+                    target_response = self.session.get(
+                        new_url, headers=self.headers, timeout=15
+                    )
+                if target_response.status_code == 200:
+                    ColorPrint.success("重定向访问成功")
+                    return True
+                else:
+                    ColorPrint.error(
+                        f"重定向访问失败，状态码: {target_response.status_code}"
+                    )
+                    return False
+        else:
+            ColorPrint.error(f"目标服务访问失败，状态码: {target_response.status_code}")
+            return False
+
+    def request_service_ticket(self, service_url=None):
+        """凭已有的统一身份认证会话(CASTGC)为服务签发 ticket，返回带 ticket 的重定向地址"""
+        login_url = f"{self.base_url}/authserver/login"
+        response = self.session.get(
+            login_url,
+            params={"service": service_url or self.service_url},
+            headers=self.headers,
+            allow_redirects=False,
+            timeout=10,
+            retry_status=False,
+        )
+        redirect_url = response.headers.get("Location", "")
+        if response.status_code == 302 and "ticket=" in redirect_url:
+            return redirect_url
+        # 返回登录页说明统一身份认证会话已失效
+        return None
+
+    def perform_login(self, username, password, login_params):
+        ColorPrint.process("提交统一身份认证信息...")
+        login_url = f"{self.base_url}/authserver/login"
+
+        login_data = self.build_login_data(username, password, login_params)
+        params = {"service": self.service_url}
+        headers = self.login_post_headers()
+
+        try:
+            with self.latency.span("credential_post"):
+                response = self.session.post(
+                    login_url,
+                    params=params,
+                    data=login_data,
+                    headers=headers,
+                    allow_redirects=False,
+                    timeout=15,
+                )
+
             if response.status_code == 302:
                 redirect_url = response.headers.get("Location")
                 ColorPrint.info(f"收到重定向: {redirect_url[:50]}...")
 
                 if redirect_url and "ticket=" in redirect_url:
                     ColorPrint.success("统一身份认证成功")
-                    # 访问目标服务获取Cookie
-                    ColorPrint.process("访问目标服务获取Cookie...")
-                    target_response = self.session.get(
-                        redirect_url,
-                        headers=self.headers,
-                        allow_redirects=False,
-                        timeout=15,
-                    )
-
-                    if target_response.status_code == 200:
-                        ColorPrint.success("目标服务访问成功")
-                        return True
-                    elif target_response.status_code == 301:
-                        # 处理301重定向
-                        ColorPrint.warning("目标服务被永久重定向")
-                        new_url = target_response.headers.get("Location")
-                        if new_url:
-                            ColorPrint.info(f"重定向到: {new_url}")
-                            target_response = self.session.get(
-                                new_url, headers=self.headers, timeout=15
-                            )
-                            if target_response.status_code == 200:
-                                ColorPrint.success("重定向访问成功")
-                                return True
-                            else:
-                                ColorPrint.error(
-                                    f"重定向访问失败，状态码: {target_response.status_code}"
-                                )
-                                return False
-                    else:
-                        ColorPrint.error(
-                            f"目标服务访问失败，状态码: {target_response.status_code}"
-                        )
-                        return False
+                    if self.visit_service(redirect_url):
+                        return LoginResult(LoginResult.OK)
+                    return LoginResult(LoginResult.ERROR, "目标服务访问失败")
                 else:
                     ColorPrint.error("重定向URL中没有找到ticket参数")
-                    return False
+                    return LoginResult(LoginResult.ERROR, "没有ticket")
             else:
-                if "您提供的用户名或者密码有误" in response.text:
-                    ColorPrint.error("账号或密码错误")
-                elif "验证码" in response.text:
-                    ColorPrint.error("需要验证码，请稍后重试")
-                else:
-                    ColorPrint.error(
-                        f"统一身份认证失败，状态码: {response.status_code}"
-                    )
-                return False
+                return self.classify_login_failure(response.status_code, response.text)
 
         except Exception as e:
             ColorPrint.error(f"统一身份认证异常: {e}")
-            return False
+            return LoginResult(LoginResult.ERROR, str(e))
+
+    def classify_login_failure(self, status_code, text):
+        if "您提供的用户名或者密码有误" in text:
+            ColorPrint.error("账号或密码错误")
+            return LoginResult(LoginResult.BAD_CREDENTIALS, "账号或密码错误")
+        elif "验证码" in text:
+            ColorPrint.error("需要验证码，请稍后重试")
+            return LoginResult(LoginResult.CAPTCHA_REQUIRED, "需要验证码")
+        else:
+            ColorPrint.error(f"统一身份认证失败，状态码: {status_code}")
+            return LoginResult(LoginResult.ERROR, f"状态码 {status_code}")
+
+    def check_need_captcha(self, username):
+        """提交密码前询问认证服务器该账号是否需要验证码，查询失败时返回None"""
+        url = f"{self.base_url}/authserver/checkNeedCaptcha.htl"
+        params = {"username": username, "_": int(time.time() * 1000)}
+        try:
+            with self.latency.span("captcha_check"):
+                response = self.session.get(
+                    url, params=params, headers=self.headers, timeout=5
+                )
+            if response.status_code != 200:
+                return None
+            return bool(response.json().get("isNeed"))
+        except Exception:
+            return None
+
+    def captcha_backoff_remaining(self, username=None):
+        username = username or self.username
+        until, _ = self._captcha_backoff.get(username, (0, 0))
+        return max(0, until - time.time())
+
+    def note_login_result(self, username, result):
+        """按账号记录验证码退避：需要验证码时延长退避，登录成功时清零"""
+        if result:
+            self._captcha_backoff.pop(username, None)
+        elif result.status == LoginResult.CAPTCHA_REQUIRED:
+            _, strikes = self._captcha_backoff.get(username, (0, 0))
+            strikes += 1
+            wait = min(CAPTCHA_BACKOFF_BASE * 2 ** (strikes - 1), CAPTCHA_BACKOFF_MAX)
+            self._captcha_backoff[username] = (time.time() + wait, strikes)
+            result.retry_after = wait
+            ColorPrint.warning(f"账号需要验证码，{wait} 秒内不再尝试登录")
+        return result
+
+    def precheck_login(self, username):
+        """提交密码前的检查：退避期内或需要验证码时直接返回失败结果，可以登录时返回None"""
+        remaining = self.captcha_backoff_remaining(username)
+        if remaining > 0:
+            ColorPrint.warning(f"账号处于验证码退避期，{int(remaining)} 秒后再试")
+            return LoginResult(
+                LoginResult.THROTTLED, "验证码退避中", retry_after=remaining
+            )
+        if self.check_need_captcha(username):
+            return self.note_login_result(
+                username, LoginResult(LoginResult.CAPTCHA_REQUIRED, "需要验证码")
+            )
+        return None
 
     def login(self, username=None, password=None, service_url=None):
         if username:
@@ -215,29 +372,53 @@ class HITSZAuth:
 
         if not self.username or not self.password:
             ColorPrint.error("需要用户名和密码进行登录")
-            return False
+            return LoginResult(LoginResult.BAD_CREDENTIALS, "缺少用户名或密码")
 
         ColorPrint.subheader(f"统一身份认证登录", style="bracket")
         ColorPrint.info(f"目标服务: {self.service_url}")
 
+        start = time.perf_counter()
+        result = self._login_steps()
+        self.latency.record(
+            "login" if result else "login_failed", time.perf_counter() - start
+        )
+        return result
+
+    def _login_steps(self):
+        # 需要验证码时提交密码只会白白失败，还可能加重锁定
+        blocked = self.precheck_login(self.username)
+        if blocked is not None:
+            return blocked
+
         # 获取登录页面
         login_page = self.get_login_page()
         if not login_page:
-            return False
+            return LoginResult(LoginResult.ERROR, "获取登录页面失败")
 
         # 解析登录参数
-        login_params = self.extract_login_params(login_page)
+        with self.latency.span("parse"):
+            login_params = self.extract_login_params(login_page)
         if not login_params:
-            return False
+            return LoginResult(LoginResult.ERROR, "解析登录参数失败")
 
         # 执行登录
-        if self.perform_login(self.username, self.password, login_params):
+        result = self.note_login_result(
+            self.username,
+            self.perform_login(self.username, self.password, login_params),
+        )
+        if result:
+            self.validated_at = time.time()
+            self.session_model.record_login(self.validated_at)
+            self.remember_validity(True)
             self.save_cookies()
             ColorPrint.success("🎉 统一身份认证登录成功！")
-            return True
         else:
             ColorPrint.error("统一身份认证登录失败")
-            return False
+        return result
+
+    def failover(self):
+        """切换到热备会话，基类没有热备会话"""
+        return False
 
     def auto_reconnect(self):
         if not self.username or not self.password:
@@ -247,13 +428,18 @@ class HITSZAuth:
         ColorPrint.warning("检测到会话失效，开始自动重连...")
 
         # 重置session
-        self.session = requests.Session()
+        self.session = self.new_session()
+        self.validated_at = None
 
         for attempt in range(3):
             ColorPrint.process(f"第 {attempt + 1} 次尝试重新登录...")
-            if self.login(self.username, self.password):
+            result = self.login(self.username, self.password)
+            if result:
                 ColorPrint.success("自动重新登录成功！")
                 return True
+            if not result.retryable:
+                ColorPrint.error(f"自动重连中止: {result.message}")
+                return False
             if attempt < 2:
                 ColorPrint.info("等待2秒后重试...")
                 time.sleep(2)
@@ -261,21 +447,61 @@ class HITSZAuth:
         ColorPrint.error("自动重连失败，已达到最大重试次数")
         return False
 
-    def save_cookies(self, custom_file=None):
+    def _cookie_snapshot(self):
+        cookies = []
+        for cookie in self.session.cookies:
+            cookies.append(
+                {
+                    "name": cookie.name,
+                    "value": cookie.value,
+                    "domain": cookie.domain,
+                    "domain_specified": cookie.domain_specified,
+                    "path": cookie.path,
+                    "expires": cookie.expires,
+                    "secure": cookie.secure,
+                    "rest": dict(cookie._rest),
+                }
+            )
+        return {
+            "version": COOKIE_SNAPSHOT_VERSION,
+            "service_url": self.service_url,
+            "saved_at": time.time(),
+            "validated_at": self.validated_at,
+            "cookies": cookies,
+        }
+
+    def save_cookies(self, custom_file=None, quiet=False):
         try:
             cookies_file = custom_file or self.cookies_file
-            cookies = {cookie.name: cookie.value for cookie in self.session.cookies}
-
-            with open(cookies_file, "w", encoding="utf-8") as f:
-                json.dump(cookies, f, indent=2, ensure_ascii=False)
-
-            ColorPrint.success(f"Cookies已保存到: {cookies_file}")
+            snapshot = self._cookie_snapshot()
+
+            # 先写同目录下的临时文件再替换，避免中途退出留下半个文件；
+            # 临时文件名各不相同，多个线程同时保存也不会互相覆盖
+            fd, tmp_file = tempfile.mkstemp(
+                prefix=f"{os.path.basename(cookies_file)}.",
+                suffix=".tmp",
+                dir=os.path.dirname(os.path.abspath(cookies_file)),
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, cookies_file)
+            except BaseException:
+                os.unlink(tmp_file)
+                raise
+
+            if not quiet:
+                ColorPrint.success(f"Cookies已保存到: {cookies_file}")
             return True
         except Exception as e:
             ColorPrint.error(f"保存Cookies失败: {e}")
             return False
 
     def load_cookies(self, custom_file=None):
+        from requests.cookies import create_cookie
+
         cookies_file = custom_file or self.cookies_file
 
         if not os.path.exists(cookies_file):
@@ -284,41 +510,150 @@ class HITSZAuth:
 
         try:
             with open(cookies_file, "r", encoding="utf-8") as f:
-                cookies = json.load(f)
+                data = json.load(f)
+
+            if isinstance(data, dict) and isinstance(data.get("cookies"), list):
+                now = time.time()
+                for item in data["cookies"]:
+                    if item.get("expires") and item["expires"] <= now:
+                        continue
+                    self.session.cookies.set_cookie(
+                        create_cookie(
+                            item["name"],
+                            item["value"],
+                            domain=item.get("domain", ""),
+                            path=item.get("path", "/"),
+                            expires=item.get("expires"),
+                            secure=item.get("secure", False),
+                            rest=item.get("rest") or {},
+                        )
+                    )
+                self.validated_at = data.get("validated_at")
+            else:
+                # 旧格式：只有 {name: value}
+                self.session.cookies.update(data)
+                self.validated_at = None
 
-            self.session.cookies.update(cookies)
             ColorPrint.success(f"Cookies已从 {cookies_file} 加载")
             return True
         except Exception as e:
             ColorPrint.error(f"加载Cookies失败: {e}")
             return False
 
-    def test_cookie(self, test_url=None):
-        ColorPrint.process("测试Cookie有效性...")
+    def cookie_fingerprint(self):
+        """当前Cookie的指纹，Cookie一变缓存的有效性结论就作废"""
+        items = sorted(f"{c.domain}|{c.name}={c.value}" for c in self.session.cookies)
+        return hashlib.sha1("\n".join(items).encode("utf-8")).hexdigest()
 
-        # 默认测试URL
-        if not test_url:
-            test_url = "http://jw.hitsz.edu.cn/authentication/main"
+    def remember_validity(self, valid):
+        self._validity_cache = (self.cookie_fingerprint(), valid, time.time())
 
-        try:
+    def cached_validity(self):
+        """TTL 内且Cookie未变时返回上次的结论，否则返回None"""
+        if not self._validity_cache:
+            return None
+        fingerprint, valid, checked_at = self._validity_cache
+        if time.time() - checked_at > self.validity_ttl:
+            return None
+        if fingerprint != self.cookie_fingerprint():
+            return None
+        return valid
+
+    def mark_validated(self, min_interval=60):
+        """记录一次成功的有效性验证，min_interval 秒内重复调用不落盘"""
+        now = time.time()
+        self.session_model.record_valid(now)
+        self.remember_validity(True)
+        if self.validated_at and now - self.validated_at < min_interval:
+            return
+        self.validated_at = now
+        self.save_cookies(quiet=True)
+        self.session_model.save()
+
+    def mark_invalid(self):
+        """记录一次会话失效（被重定向到登录页）"""
+        self.validated_at = None
+        self.session_model.record_invalid()
+        self.remember_validity(False)
+
+    def probe_session(self, url=None):
+        """用 HEAD 请求探测会话，不下载页面；返回 True/False，无法判断时返回None"""
+        url = url or self.check_url
+        if not url:
+            # 没有可以探测的服务地址
+            return None
+        response = self.session.head(
+            url, headers=self.headers, timeout=10, allow_redirects=False
+        )
+        if response.status_code in (405, 501):
+            # 不支持 HEAD 时退回 GET，但只读响应头
             response = self.session.get(
-                test_url, headers=self.headers, timeout=10, allow_redirects=False
+                url,
+                headers=self.headers,
+                timeout=10,
+                allow_redirects=False,
+                stream=True,
             )
+            response.close()
 
-            # 检查是否被重定向到登录页面
-            if response.status_code == 302 and "authserver" in response.headers.get(
-                "Location", ""
-            ):
-                ColorPrint.warning("Cookie已失效，需要重新登录")
-                return False
-            elif "require" in response.url or "invalid" in response.url:
-                ColorPrint.warning("Cookie无效")
-                return False
-            elif response.status_code == 200:
+        location = response.headers.get("Location", "")
+        if response.status_code in (301, 302, 303) and (
+            "authserver" in location or "require" in location or "invalid" in location
+        ):
+            self.mark_invalid()
+            return False
+        if response.status_code == 200:
+            self.mark_validated()
+            return True
+        return None
+
+    def keepalive(self):
+        """发一个轻量请求刷新服务端的空闲计时，返回会话是否仍然有效
+
+        无法判断时返回None，并让会话模型推迟下一次保活，避免每次轮询都重发
+        """
+        try:
+            valid = self.probe_session()
+        except Exception as e:
+            ColorPrint.warning(f"保活请求异常: {e}")
+            valid = None
+        if valid is None:
+            self.session_model.record_inconclusive()
+        return valid
+
+    def session_expires_before(self, deadline):
+        """按会话寿命模型判断当前会话是否会在 deadline 之前失效"""
+        return self.session_model.expires_before(deadline)
+
+    def is_cookie_cache_fresh(self, max_age=None):
+        """最近一次验证在 max_age 秒内时认为缓存可以直接使用"""
+        max_age = self.cookie_fresh_seconds if max_age is None else max_age
+        if not self.validated_at or not len(self.session.cookies):
+            return False
+        return time.time() - self.validated_at < max_age
+
+    def test_cookie(self, test_url=None, use_cache=True):
+        ColorPrint.process("测试Cookie有效性...")
+
+        if use_cache:
+            cached = self.cached_validity()
+            if cached is not None:
+                if cached:
+                    ColorPrint.success("Cookie有效（刚验证过）")
+                else:
+                    ColorPrint.warning("Cookie已失效，需要重新登录")
+                return cached
+
+        try:
+            valid = self.probe_session(test_url)
+            if valid:
                 ColorPrint.success("Cookie有效")
                 return True
+            elif valid is False:
+                ColorPrint.warning("Cookie已失效，需要重新登录")
+                return False
             else:
-                ColorPrint.warning(f"未知状态，状态码: {response.status_code}")
+                ColorPrint.warning("无法确定Cookie状态")
                 return False
 
         except Exception as e:
@@ -368,9 +703,89 @@ class HITSZJwxtAuth(HITSZAuth):
     def __init__(self, username=None, password=None):
         super().__init__(username, password, "http://jw.hitsz.edu.cn/casLogin")
         self.cookies_file = "hitsz_jwxt_cookies.json"
+        self.check_url = "http://jw.hitsz.edu.cn/authentication/main"
+        self.session_model = SessionLifetimeModel("hitsz_jwxt_session_model.json")
+        self.session_model.load()
 
-    def test_cookie(self):
-        return super().test_cookie("http://jw.hitsz.edu.cn/authentication/main")
+    def test_cookie(self, use_cache=True):
+        return super().test_cookie(self.check_url, use_cache=use_cache)
+
+    # ---------- 热备会话 ----------
+    def enable_standby(self, check_interval=120):
+        """后台再登录一个独立的会话备用，主会话失效时 failover() 直接换上"""
+        if getattr(self, "_standby_thread", None) and self._standby_thread.is_alive():
+            return True
+        if not self.username or not self.password:
+            ColorPrint.warning("没有账号密码，无法准备备用会话")
+            return False
+        self.standby = None
+        self._standby_lock = threading.Lock()
+        self._standby_stop = threading.Event()
+        self._standby_wakeup = threading.Event()
+        self._standby_thread = threading.Thread(
+            target=self._standby_loop, args=(check_interval,), daemon=True
+        )
+        self._standby_thread.start()
+        ColorPrint.info("已启动备用会话，主会话失效时可以立即切换")
+        return True
+
+    def disable_standby(self):
+        if getattr(self, "_standby_thread", None):
+            self._standby_stop.set()
+            self._standby_wakeup.set()
+            self._standby_thread = None
+        self.standby = None
+
+    def standby_ready(self):
+        standby = getattr(self, "standby", None)
+        return bool(standby and standby.cached_validity() is not False)
+
+    def _new_standby(self):
+        standby = HITSZJwxtAuth(self.username, self.password)
+        standby.base_url = self.base_url
+        standby.service_url = self.service_url
+        standby.check_url = self.check_url
+        standby.cookies_file = "hitsz_jwxt_standby_cookies.json"
+        # 备用会话的登录时间单独记，不混进主会话的寿命模型
+        standby.session_model = SessionLifetimeModel()
+        standby.latency = self.latency
+        if standby.login():
+            return standby
+        return None
+
+    def _standby_loop(self, check_interval):
+        while not self._standby_stop.is_set():
+            with self._standby_lock:
+                standby = self.standby
+            if standby is None or standby.probe_session() is False:
+                standby = self._new_standby()
+                with self._standby_lock:
+                    if not self._standby_stop.is_set():
+                        self.standby = standby
+            # 主会话也按同一节奏验证。这里只记下失效，不在后台切换：使用方（jw 的请求、
+            # 抢课里的 aiohttp 会话）各自持有会话对象，由它们下次发现失效时调用 failover()
+            self.keepalive()
+            # 刚切换掉备用会话时会被唤醒，立刻补上新的
+            self._standby_wakeup.wait(check_interval if self.standby else 30)
+            self._standby_wakeup.clear()
+
+    def failover(self):
+        """把热备会话换成主会话，只交换会话对象，不发任何请求"""
+        if not self.standby_ready():
+            return False
+        with self._standby_lock:
+            standby = self.standby
+            if not standby or standby.cached_validity() is False:
+                return False
+            self.session = standby.session
+            self.standby = None
+        self.validated_at = time.time()
+        self.session_model.record_login(standby.session_model.login_at)
+        self.remember_validity(True)
+        self._standby_wakeup.set()
+        ColorPrint.success("主会话失效，已切换到备用会话")
+        self.save_cookies(quiet=True)
+        return True
 
 
 # 统一身份认证不知道为什么无法使用
@@ -382,96 +797,34 @@ class HITSZNetworkAuth(HITSZAuth):
         self.network_base_url = "https://net.hitsz.edu.cn"
         self.current_ticket = None
 
-    def perform_login(self, username, password, login_params):
-        """重写登录方法，添加校园网认证流程"""
-        ColorPrint.process("提交统一身份认证信息...")
-        login_url = f"{self.base_url}/authserver/login"
-
-        # 加密密码
-        encrypted_pwd = self.encrypt_password_with_aes(
-            password, login_params.get("pwdEncryptSalt", "")
+    def visit_service(self, redirect_url):
+        """重写目标服务访问，添加校园网认证流程"""
+        # 提取ticket
+        import re
+
+        ticket_match = re.search(r"ticket=([^&]+)", redirect_url)
+        if ticket_match:
+            self.current_ticket = ticket_match.group(1)
+            ColorPrint.success(f"获取到ticket: {self.current_ticket[:20]}...")
+
+        # 先访问重定向URL获取基础cookie
+        ColorPrint.process("访问校园网认证页面...")
+        initial_response = self.session.get(
+            redirect_url,
+            headers=self.headers,
+            allow_redirects=True,
+            timeout=15,
+            retry_status=False,
         )
 
-        login_data = {
-            "username": username,
-            "password": encrypted_pwd,
-            "_eventId": login_params["_eventId"],
-            "cllt": login_params["cllt"],
-            "dllt": login_params["dllt"],
-            "lt": login_params["lt"],
-            "execution": login_params["execution"],
-            "rememberMe": "true",
-        }
-
-        params = {"service": self.service_url}
-        headers = {
-            "User-Agent": self.headers["User-Agent"],
-            "Referer": f"{self.base_url}/authserver/login?service={self.service_url}",
-            "Origin": self.base_url,
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
-
-        try:
-            response = self.session.post(
-                login_url,
-                params=params,
-                data=login_data,
-                headers=headers,
-                allow_redirects=False,
-                timeout=15,
+        if initial_response.status_code == 200:
+            ColorPrint.success("校园网认证页面访问成功")
+            # 执行完整的校园网认证流程
+            return self.complete_srun_authentication()
+        else:
+            ColorPrint.error(
+                f"校园网认证页面访问失败，状态码: {initial_response.status_code}"
             )
-
-            if response.status_code == 302:
-                redirect_url = response.headers.get("Location")
-                ColorPrint.info(f"收到重定向: {redirect_url[:50]}...")
-
-                if redirect_url and "ticket=" in redirect_url:
-                    # 提取ticket
-                    import re
-
-                    ticket_match = re.search(r"ticket=([^&]+)", redirect_url)
-                    if ticket_match:
-                        self.current_ticket = ticket_match.group(1)
-                        ColorPrint.success(
-                            f"获取到ticket: {self.current_ticket[:20]}..."
-                        )
-
-                    ColorPrint.success("统一身份认证成功")
-
-                    # 先访问重定向URL获取基础cookie
-                    ColorPrint.process("访问校园网认证页面...")
-                    initial_response = self.session.get(
-                        redirect_url,
-                        headers=self.headers,
-                        allow_redirects=True,
-                        timeout=15,
-                    )
-
-                    if initial_response.status_code == 200:
-                        ColorPrint.success("校园网认证页面访问成功")
-                        # 执行完整的校园网认证流程
-                        return self.complete_srun_authentication()
-                    else:
-                        ColorPrint.error(
-                            f"校园网认证页面访问失败，状态码: {initial_response.status_code}"
-                        )
-                        return False
-                else:
-                    ColorPrint.error("重定向URL中没有找到ticket参数")
-                    return False
-            else:
-                if "您提供的用户名或者密码有误" in response.text:
-                    ColorPrint.error("账号或密码错误")
-                elif "验证码" in response.text:
-                    ColorPrint.error("需要验证码，请稍后重试")
-                else:
-                    ColorPrint.error(
-                        f"统一身份认证失败，状态码: {response.status_code}"
-                    )
-                return False
-
-        except Exception as e:
-            ColorPrint.error(f"统一身份认证异常: {e}")
             return False
 
     def complete_srun_authentication(self):
@@ -555,7 +908,7 @@ class HITSZNetworkAuth(HITSZAuth):
         }
         try:
             response = self.session.get(
-                sso_url, params=params, headers=headers, timeout=15
+                sso_url, params=params, headers=headers, timeout=15, retry_status=False
             )
             if response.status_code == 200:
                 ColorPrint.success("SRUN单点登录验证成功")
@@ -610,16 +963,28 @@ class HITSZNetworkAuth(HITSZAuth):
             ColorPrint.error(f"校园网认证确认异常: {e}")
             return False
 
-    def test_cookie(self):
+    def test_cookie(self, use_cache=True):
         """测试校园网认证状态"""
         ColorPrint.process("测试校园网认证状态...")
+        if use_cache:
+            cached = self.cached_validity()
+            if cached is not None:
+                return cached
         # 直接测试网络连通性
-        return self.check_network_status()
+        online = self.check_network_status()
+        self.remember_validity(online)
+        return online
+
+    def keepalive(self):
+        """校园网没有可以探测的服务页面，以能否联网判断认证是否有效"""
+        return self.test_cookie(use_cache=False)
 
     def check_network_status(self):
         ColorPrint.process("检查网络连接状态...")
         try:
-            response = requests.get("https://www.baidu.com", timeout=5)
+            from http_transport import get_transport
+
+            response = get_transport().probe("https://www.baidu.com", method="HEAD")
             if response.status_code == 200:
                 ColorPrint.success("网络连接正常，已联网")
                 return True
@@ -0,0 +1,232 @@
+import time
+import asyncio
+import aiohttp
+from http.cookies import SimpleCookie
+from yarl import URL
+from color_print import ColorPrint
+from hitsz_auth import LoginResult
+from http_transport import get_transport
+
+
+def requests_to_aiohttp_jar(requests_jar, aio_jar=None):
+    """把 requests 的 CookieJar 按域名和路径导入 aiohttp 的 CookieJar"""
+    if aio_jar is None:
+        aio_jar = aiohttp.CookieJar(unsafe=True)
+    for cookie in requests_jar:
+        morsel = SimpleCookie()
+        morsel[cookie.name] = cookie.value
+        morsel[cookie.name]["path"] = cookie.path or "/"
+        domain = cookie.domain.lstrip(".")
+        if cookie.domain_specified:
+            morsel[cookie.name]["domain"] = domain
+        scheme = "https" if cookie.secure else "http"
+        aio_jar.update_cookies(morsel, URL(f"{scheme}://{domain}{cookie.path or '/'}"))
+    return aio_jar
+
+
+def aiohttp_to_requests_jar(aio_jar, requests_jar):
+    """把 aiohttp 的 CookieJar 写回 requests 的 CookieJar，保留域名和路径"""
+    for morsel in aio_jar:
+        requests_jar.set(
+            morsel.key,
+            morsel.value,
+            domain=morsel["domain"],
+            path=morsel["path"] or "/",
+            secure=bool(morsel["secure"]),
+        )
+    return requests_jar
+
+
+class AsyncHITSZAuth:
+    """HITSZAuth 统一身份认证流程的 aiohttp 实现
+
+    账号、目标服务、页面解析和密码加密都复用传入的 HITSZAuth，
+    登录得到的 Cookie 直接落在 aiohttp 会话的 CookieJar 里，异步抢课可以原样使用。
+    """
+
+    def __init__(self, auth):
+        self.auth = auth
+        self.page_timeout = aiohttp.ClientTimeout(total=10)
+        self.login_timeout = aiohttp.ClientTimeout(total=15)
+
+    def new_session(self, **kwargs):
+        """创建一个带有当前 requests 会话 Cookie 的 aiohttp 会话"""
+        jar = requests_to_aiohttp_jar(self.auth.session.cookies)
+        return get_transport().aiohttp_session(cookie_jar=jar, **kwargs)
+
+    async def get_login_page(self, session):
+        ColorPrint.process("访问统一身份认证登录页面...")
+        login_url = f"{self.auth.base_url}/authserver/login"
+        params = {"service": self.auth.service_url}
+
+        try:
+            async with session.get(
+                login_url,
+                params=params,
+                headers=self.auth.headers,
+                timeout=self.page_timeout,
+            ) as response:
+                if response.status == 200:
+                    ColorPrint.success("成功获取登录页面")
+                    return await response.text()
+                else:
+                    ColorPrint.error(f"访问登录页面失败，状态码: {response.status}")
+                    return None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            ColorPrint.error(f"访问登录页面异常: {e}")
+            return None
+
+    async def _visit_service(self, session, redirect_url):
+        ColorPrint.process("访问目标服务获取Cookie...")
+        async with session.get(
+            redirect_url,
+            headers=self.auth.headers,
+            allow_redirects=False,
+            timeout=self.login_timeout,
+        ) as target_response:
+            status = target_response.status
+            new_url = target_response.headers.get("Location")
+
+        if status == 200:
+            ColorPrint.success("目标服务访问成功")
+            return True
+        elif status == 301 and new_url:
+            # 处理301重定向
+            ColorPrint.warning("目标服务被永久重定向")
+            ColorPrint.info(f"重定向到: {new_url}")
+            async with session.get(
+                new_url, headers=self.auth.headers, timeout=self.login_timeout
+            ) as target_response:
+                if target_response.status == 200:
+                    ColorPrint.success("重定向访问成功")
+                    return True
+                ColorPrint.error(f"重定向访问失败，状态码: {target_response.status}")
+                return False
+        else:
+            ColorPrint.error(f"目标服务访问失败，状态码: {status}")
+            return False
+
+    async def perform_login(self, session, username, password, login_params):
+        ColorPrint.process("提交统一身份认证信息...")
+        auth = self.auth
+        login_url = f"{auth.base_url}/authserver/login"
+        login_data = auth.build_login_data(username, password, login_params)
+
+        try:
+            async with session.post(
+                login_url,
+                params={"service": auth.service_url},
+                data=login_data,
+                headers=auth.login_post_headers(),
+                allow_redirects=False,
+                timeout=self.login_timeout,
+            ) as response:
+                status = response.status
+                redirect_url = response.headers.get("Location")
+                text = "" if status == 302 else await response.text()
+
+            if status == 302:
+                ColorPrint.info(f"收到重定向: {(redirect_url or '')[:50]}...")
+                if redirect_url and "ticket=" in redirect_url:
+                    ColorPrint.success("统一身份认证成功")
+                    if await self._visit_service(session, redirect_url):
+                        return LoginResult(LoginResult.OK)
+                    return LoginResult(LoginResult.ERROR, "目标服务访问失败")
+                ColorPrint.error("重定向URL中没有找到ticket参数")
+                return LoginResult(LoginResult.ERROR, "没有ticket")
+
+            return auth.classify_login_failure(status, text)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            ColorPrint.error(f"统一身份认证异常: {e}")
+            return LoginResult(LoginResult.ERROR, str(e))
+
+    async def check_need_captcha(self, session, username):
+        url = f"{self.auth.base_url}/authserver/checkNeedCaptcha.htl"
+        params = {"username": username, "_": int(time.time() * 1000)}
+        try:
+            async with session.get(
+                url, params=params, headers=self.auth.headers, timeout=self.page_timeout
+            ) as response:
+                if response.status != 200:
+                    return None
+                data = await response.json(content_type=None)
+                return bool(data.get("isNeed"))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return None
+
+    async def login(self, session):
+        """在给定的 aiohttp 会话里完成统一身份认证，Cookie 写入该会话的 CookieJar"""
+        auth = self.auth
+        if not auth.username or not auth.password:
+            ColorPrint.error("需要用户名和密码进行登录")
+            return LoginResult(LoginResult.BAD_CREDENTIALS, "缺少用户名或密码")
+
+        ColorPrint.subheader("统一身份认证登录(异步)", style="bracket")
+        ColorPrint.info(f"目标服务: {auth.service_url}")
+
+        remaining = auth.captcha_backoff_remaining(auth.username)
+        if remaining > 0:
+            ColorPrint.warning(f"账号处于验证码退避期，{int(remaining)} 秒后再试")
+            return LoginResult(
+                LoginResult.THROTTLED, "验证码退避中", retry_after=remaining
+            )
+        if await self.check_need_captcha(session, auth.username):
+            return auth.note_login_result(
+                auth.username, LoginResult(LoginResult.CAPTCHA_REQUIRED, "需要验证码")
+            )
+
+        login_page = await self.get_login_page(session)
+        if not login_page:
+            return LoginResult(LoginResult.ERROR, "获取登录页面失败")
+
+        # bs4 解析是纯 CPU 操作，放到线程里避免卡住事件循环
+        login_params = await asyncio.to_thread(auth.extract_login_params, login_page)
+        if not login_params:
+            return LoginResult(LoginResult.ERROR, "解析登录参数失败")
+
+        result = auth.note_login_result(
+            auth.username,
+            await self.perform_login(session, auth.username, auth.password, login_params),
+        )
+        if result:
+            ColorPrint.success("🎉 统一身份认证登录成功！")
+        else:
+            ColorPrint.error("统一身份认证登录失败")
+        return result
+
+    def sync_to_requests(self, session):
+        """把 aiohttp 会话里的 Cookie 同步回 HITSZAuth 的 requests 会话并落盘"""
+        aiohttp_to_requests_jar(session.cookie_jar, self.auth.session.cookies)
+        self.auth.validated_at = time.time()
+        self.auth.session_model.record_login(self.auth.validated_at)
+        self.auth.remember_validity(True)
+        self.auth.save_cookies()
+
+    def login_sync(self, username=None, password=None):
+        """菜单等同步场景使用：跑一遍异步登录，再把 Cookie 写回 requests 会话"""
+        if username:
+            self.auth.username = username
+        if password:
+            self.auth.password = password
+
+        async def runner():
+            transport = get_transport()
+            try:
+                async with transport.aiohttp_session(
+                    cookie_jar=aiohttp.CookieJar(unsafe=True)
+                ) as session:
+                    ok = await self.login(session)
+                    if ok:
+                        self.sync_to_requests(session)
+                    return ok
+            finally:
+                await transport.close_connector()
+
+        return asyncio.run(runner())
@@ -0,0 +1,319 @@
+"""统一的 HTTP 传输层
+
+hitsz_auth、jw、net_login 的请求都从这里拿会话：
+- 同步：所有 requests 会话共用一个连接池（keep-alive、按主机限制连接数），
+  GET/HEAD 遇到建连失败和 502/503/504 自动重试（SRUN 门户会话只重试建连失败），默认超时统一设置；
+- 异步：同一个事件循环里的 aiohttp 会话共用一个 TCPConnector；
+- DNS 解析结果按 TTL 缓存，同步和异步两边都不会反复解析同一个域名；
+- 请求/响应钩子和 latency 计时都挂在这一层，调优只改这里。
+"""
+
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+import latency
+
+DEFAULT_TIMEOUT = (5, 15)  # (建连, 读取) 秒
+
+
+class DNSCache:
+    """getaddrinfo 结果按 TTL 缓存，解析失败不缓存"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def getaddrinfo(self, host, port, *args, **kwargs):
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry and now - entry[0] < self.ttl:
+            return entry[1]
+        infos = socket.getaddrinfo(host, port, *args, **kwargs)
+        with self.lock:
+            self.entries[key] = (now, infos)
+        return infos
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# 本次请求新建连接时各阶段的耗时，只在发请求的线程上有效
+_timings = threading.local()
+
+# 建连时用的 DNS 缓存，所有连接池共用
+_dns_cache = DNSCache()
+
+
+class _TimedConnectionMixin:
+    """把 DNS 解析和 TCP 建连拆开计时，结果放到当前线程上"""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            infos = _dns_cache.getaddrinfo(
+                self._dns_host, self.port, type=socket.SOCK_STREAM
+            )
+        except OSError:
+            # 解析失败交给 urllib3 报出它自己的异常
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        _timings.dns = resolved - start
+
+        original_host = self._dns_host
+        self._dns_host = infos[0][4][0]
+        try:
+            sock = super()._new_conn()
+        except Exception:
+            # 第一个地址连不上时退回 urllib3 的多地址尝试
+            self._dns_host = original_host
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = original_host
+        _timings.connect = time.perf_counter() - resolved
+        return sock
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        total = time.perf_counter() - start
+        setup = getattr(_timings, "dns", 0) + getattr(_timings, "connect", 0)
+        _timings.tls = max(0.0, total - setup)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """在当前 span 下记录每个请求的 DNS / 建连 / TLS / 首字节耗时，复用连接时只有首字节"""
+
+    def __init__(self, recorder=None, **kwargs):
+        self.recorder = recorder or latency.default_recorder
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        _timings.dns = _timings.connect = _timings.tls = 0.0
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        # 适配器只读到响应头就返回，这段时间就是建连加首字节
+        elapsed = time.perf_counter() - start
+        phase = latency.current_phase()
+        if phase:
+            dns, connect, tls = _timings.dns, _timings.connect, _timings.tls
+            if connect:
+                self.recorder.record(f"{phase}.dns", dns)
+                self.recorder.record(f"{phase}.connect", connect)
+            if tls:
+                self.recorder.record(f"{phase}.tls", tls)
+            ttfb = elapsed - dns - connect - tls
+            self.recorder.record(f"{phase}.ttfb", max(0.0, ttfb))
+        return response
+
+
+class TransportSession(requests.Session):
+    """没有显式传 timeout 时使用传输层的默认超时，并调用请求钩子
+
+    单个请求传 retry_status=False 时，这次请求（包括跟随的重定向）502/503/504 不自动重发
+    """
+
+    def __init__(self, transport):
+        super().__init__()
+        self.transport = transport
+        self._local = threading.local()
+
+    def request(self, method, url, *args, retry_status=True, **kwargs):
+        kwargs.setdefault("timeout", self.transport.timeout)
+        for hook in self.transport.request_hooks:
+            hook(method, url, kwargs)
+        if retry_status:
+            return super().request(method, url, *args, **kwargs)
+        self._local.no_status_retry = True
+        try:
+            return super().request(method, url, *args, **kwargs)
+        finally:
+            self._local.no_status_retry = False
+
+    def get_adapter(self, url):
+        if getattr(self._local, "no_status_retry", False):
+            return self.transport.no_status_retry_adapter
+        return super().get_adapter(url)
+
+
+class HTTPTransport:
+    def __init__(
+        self,
+        pool_connections=8,
+        pool_maxsize=16,
+        retries=2,
+        backoff_factor=0.3,
+        timeout=DEFAULT_TIMEOUT,
+        dns_ttl=300,
+        limit_per_host=8,
+        recorder=None,
+    ):
+        self.timeout = timeout
+        self.dns_ttl = dns_ttl
+        self.limit_per_host = limit_per_host
+        self.pool_maxsize = pool_maxsize
+        self.recorder = recorder or latency.default_recorder
+        self.dns = _dns_cache
+        self.dns.ttl = dns_ttl
+        self.request_hooks = []
+        self.response_hooks = []
+        # 只重试幂等请求；选课、提交密码这类 POST 不能自动重发
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        self.adapter = TimedHTTPAdapter(
+            self.recorder,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+        )
+        # SRUN 门户的登录/注销、CAS ticket 的签发和兑换是带副作用的 GET，
+        # 502/503/504 时服务端可能已经处理过，只在建连失败（请求还没发出去）时重试
+        self.no_status_retry_adapter = TimedHTTPAdapter(
+            self.recorder,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=retries,
+                connect=retries,
+                read=0,
+                status=0,
+                backoff_factor=backoff_factor,
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                raise_on_status=False,
+            ),
+        )
+        # 联网探测要的是快速给出结论，不重试
+        self.probe_adapter = TimedHTTPAdapter(
+            self.recorder, pool_connections=4, pool_maxsize=4, max_retries=0
+        )
+        self._probe_session = None
+        self._connectors = {}
+
+    # ---------- 同步 ----------
+    def session(self, retry_status=True):
+        """新建一个会话，Cookie 独立，连接池共享
+
+        retry_status=False 时 502/503/504 不自动重发，用于 GET 也有副作用的接口
+        """
+        adapter = self.adapter if retry_status else self.no_status_retry_adapter
+        session = TransportSession(self)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.hooks["response"].append(self._dispatch_response)
+        return session
+
+    def probe(self, url, timeout=5, method="GET", **kwargs):
+        """不带 Cookie、不重试的探测请求，用于判断是否联网"""
+        if self._probe_session is None:
+            session = TransportSession(self)
+            session.mount("http://", self.probe_adapter)
+            session.mount("https://", self.probe_adapter)
+            session.hooks["response"].append(self._dispatch_response)
+            self._probe_session = session
+        return self._probe_session.request(method, url, timeout=timeout, **kwargs)
+
+    def _dispatch_response(self, response, *args, **kwargs):
+        # 会话只挂这一个分发函数，之后添加的钩子对已有会话同样生效
+        for hook in self.response_hooks:
+            hook(response)
+
+    def add_hook(self, event, hook):
+        """event 为 request 时 hook(method, url, kwargs)，为 response 时 hook(response)"""
+        if event == "request":
+            self.request_hooks.append(hook)
+        elif event == "response":
+            self.response_hooks.append(hook)
+        else:
+            raise ValueError(f"未知的钩子类型: {event}")
+
+    # ---------- 异步 ----------
+    def connector(self):
+        """当前事件循环共用的 aiohttp 连接器，必须在事件循环里调用"""
+        import asyncio
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        connector = self._connectors.get(loop)
+        if connector is None or connector.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_maxsize,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+            )
+            self._connectors[loop] = connector
+        return connector
+
+    def aiohttp_session(self, **kwargs):
+        """共用连接器的 aiohttp 会话，关闭会话不会关闭连接器"""
+        import aiohttp
+
+        kwargs.setdefault(
+            "timeout",
+            aiohttp.ClientTimeout(
+                total=sum(self.timeout), sock_connect=self.timeout[0]
+            ),
+        )
+        return aiohttp.ClientSession(
+            connector=self.connector(), connector_owner=False, **kwargs
+        )
+
+    async def close_connector(self):
+        """事件循环结束前调用，关闭这个循环上的连接器"""
+        import asyncio
+
+        connector = self._connectors.pop(asyncio.get_running_loop(), None)
+        if connector is not None:
+            await connector.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """进程内共用的传输层"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HTTPTransport()
+    return _transport
@@ -1,17 +1,55 @@
 import os
+import sys
 import time
-from tqdm import tqdm
-import asyncio
-import aiohttp
+import threading
 from color_print import ColorPrint
 from hitsz_auth import HITSZJwxtAuth
 
+# tqdm、asyncio、aiohttp 只在等待和抢课时才用到，事件日志、断点日志和剖析也只在
+# 发请求、抢课和启动剖析时才用到，都放到对应函数里导入，菜单启动更快
+
+# 选课学期参数：p_xn/p_xq 为选课学年学期，p_dqxn/p_dqxq 为当前学年学期，
+# p_xkfsdm 为选课方式。换学期时改这里，或在批量计划里覆盖
+DEFAULT_TERM = {
+    "p_xn": "2025-2026",
+    "p_xq": "1",
+    "p_dqxn": "2024-2025",
+    "p_dqxq": "3",
+    "p_xkfsdm": "sx-b-b",
+}
+
 
 class HITSZJwxt:
     def __init__(self, auth):
+        from grab_events import EventLog
+        from grab_journal import GrabJournal
+
         self.auth = auth
         self.session = auth.get_session()
         self.base_url = "http://jw.hitsz.edu.cn"
+        # 每个请求的结构化事件，默认只在内存里统计，设置 HITSZ_EVENT_LOG 时才追加到文件
+        self.events = EventLog(os.environ.get("HITSZ_EVENT_LOG"))
+        # 每门课的确定结果写入断点日志，中断后重新抢课时跳过已选上和永久失败的课
+        self.journal = GrabJournal(
+            os.environ.get("HITSZ_GRAB_JOURNAL", "hitsz_grab_journal.jsonl")
+        )
+        # 为 True 时下一次抢课先清掉本账号本学期的断点记录，重新请求所有课程
+        self.fresh_start = False
+        # 只用Cookie登录时从个人信息里取到的学号
+        self._student_id = None
+        self._resume_scope = None
+        self.choose_start_time = None
+        # 两次选课请求之间的间隔（秒），以及抢课最长持续时间，None 表示直到全部成功
+        self.request_interval = 1.4
+        self.grab_timeout = None
+        # 多账号共用一个事件循环时由 jw_multi 设置，按全局速率预算发请求，代替固定间隔
+        self.rate_limiter = None
+        # 每个选课请求有结果后调用 on_result(class_id, result, state)，state 同 _checkpoint
+        # 的返回值，jw_service 用来记录进度
+        self.on_result = None
+        self.term = dict(DEFAULT_TERM)
+        # prepare_course_requests() 预先编码好的选课请求
+        self._course_templates = {}
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
@@ -19,20 +57,48 @@ class HITSZJwxt:
         }
 
     def _request_with_retry(self, method, url, **kwargs):
+        from grab_events import classify_outcome
+
+        endpoint = url[len(self.base_url) :] if url.startswith(self.base_url) else url
         for attempt in range(3):
+            start = time.perf_counter()
+            emitted = False
             try:
                 response = getattr(self.session, method.lower())(url, **kwargs)
+                expired = "require" in response.url or "invalid" in response.url
+                self.events.emit(
+                    endpoint,
+                    response.status_code,
+                    classify_outcome(response.status_code, expired=expired),
+                    time.perf_counter() - start,
+                    attempt=attempt + 1,
+                )
+                emitted = True
 
-                if "require" in response.url or "invalid" in response.url:
-                    if attempt < 2 and self.auth.auto_reconnect():
+                if expired:
+                    self.auth.mark_invalid()
+                    if attempt < 2 and (
+                        self.auth.failover() or self.auth.auto_reconnect()
+                    ):
                         self.session = self.auth.get_session()
                         continue
                     else:
                         raise Exception("Cookie失效且重连失败")
 
+                if response.status_code == 200:
+                    self.auth.mark_validated()
                 return response
 
             except Exception as e:
+                if not emitted:
+                    self.events.emit(
+                        endpoint,
+                        None,
+                        classify_outcome(None, str(e)),
+                        time.perf_counter() - start,
+                        attempt=attempt + 1,
+                        error=str(e),
+                    )
                 if attempt < 2:
                     ColorPrint.warning(f"请求失败，第 {attempt + 1} 次重试")
                     time.sleep(1)
@@ -56,11 +122,7 @@ class HITSZJwxt:
             ColorPrint.error("获取个人信息异常")
             return None
 
-    def get_classes(self):
-        ColorPrint.process("查询课程...")
-        url = f"{self.base_url}/Xsxk/queryKxrw"
-        # body 每次选课都需要更换
-        body = "cxsfmt=0&p_pylx=1&mxpylx=1&p_sfgldjr=0&p_sfredis=0&p_sfsyxkgwc=0&p_xktjz=&p_chaxunxh=&p_gjz=&p_skjs=&p_xn=2025-2026&p_xq=1&p_xnxq=2025-20261&p_dqxn=2024-2025&p_dqxq=3&p_dqxnxq=2024-20253&p_xkfsdm=sx-b-b&p_xiaoqu=&p_kkyx=&p_kclb=&p_xkxs=&p_dyc=&p_kkxnxq=&p_id=&p_sfhlctkc=1&p_sfhllrlkc=1&p_kxsj_xqj=&p_kxsj_ksjc=&p_kxsj_jsjc=&p_kcdm_js=&p_kcdm_cxrw=&p_kcdm_cxrw_zckc=&p_kc_gjz=&p_xzcxtjz_nj=&p_xzcxtjz_yx=&p_xzcxtjz_zy=&p_xzcxtjz_zyfx=&p_xzcxtjz_bj=&p_sfxsgwckb=1&p_skyy=&p_chaxunxkfsdm=&pageNum=1&pageSize=100"
+    def _xk_headers(self):
         headers = self.headers.copy()
         headers.update(
             {
@@ -71,8 +133,65 @@ class HITSZJwxt:
                 "rolecode": "null",
             }
         )
+        return headers
+
+    def _xk_form(self, p_xktjz="", p_id="", page_num=1, page_size=18):
+        """查询课程和选课共用的表单，学期参数取自 self.term"""
+        term = self.term
+        return {
+            "cxsfmt": "0",
+            "p_pylx": "1",
+            "mxpylx": "1",
+            "p_sfgldjr": "0",
+            "p_sfredis": "0",
+            "p_sfsyxkgwc": "0",
+            "p_xktjz": p_xktjz,
+            "p_chaxunxh": "",
+            "p_gjz": "",
+            "p_skjs": "",
+            "p_xn": term["p_xn"],
+            "p_xq": term["p_xq"],
+            "p_xnxq": term["p_xn"] + term["p_xq"],
+            "p_dqxn": term["p_dqxn"],
+            "p_dqxq": term["p_dqxq"],
+            "p_dqxnxq": term["p_dqxn"] + term["p_dqxq"],
+            "p_xkfsdm": term["p_xkfsdm"],
+            "p_xiaoqu": "",
+            "p_kkyx": "",
+            "p_kclb": "",
+            "p_xkxs": "",
+            "p_dyc": "",
+            "p_kkxnxq": "",
+            "p_id": p_id,
+            "p_sfhlctkc": "1",
+            "p_sfhllrlkc": "1",
+            "p_kxsj_xqj": "",
+            "p_kxsj_ksjc": "",
+            "p_kxsj_jsjc": "",
+            "p_kcdm_js": "",
+            "p_kcdm_cxrw": "",
+            "p_kcdm_cxrw_zckc": "",
+            "p_kc_gjz": "",
+            "p_xzcxtjz_nj": "",
+            "p_xzcxtjz_yx": "",
+            "p_xzcxtjz_zy": "",
+            "p_xzcxtjz_zyfx": "",
+            "p_xzcxtjz_bj": "",
+            "p_sfxsgwckb": "1",
+            "p_skyy": "",
+            "p_chaxunxkfsdm": "",
+            "pageNum": str(page_num),
+            "pageSize": str(page_size),
+        }
+
+    def get_classes(self, page_num=1, page_size=100):
+        ColorPrint.process("查询课程...")
+        url = f"{self.base_url}/Xsxk/queryKxrw"
+        body = self._xk_form(page_num=page_num, page_size=page_size)
         try:
-            response = self._request_with_retry("POST", url, headers=headers, data=body)
+            response = self._request_with_retry(
+                "POST", url, headers=self._xk_headers(), data=body
+            )
             if response and response.status_code == 200:
                 return response.json()
             else:
@@ -84,6 +203,21 @@ class HITSZJwxt:
             ColorPrint.error(f"查询课程异常: {str(e)}")
             return None
 
+    def get_all_classes(self, page_size=100, max_pages=50):
+        """逐页查询，合并成和 get_classes 相同的结构"""
+        courses = []
+        for page_num in range(1, max_pages + 1):
+            page = self.get_classes(page_num, page_size)
+            if page is None:
+                return None if page_num == 1 else {"kxrwList": {"list": courses}}
+            kxrw = page.get("kxrwList", {})
+            items = kxrw.get("list", [])
+            courses.extend(items)
+            total = kxrw.get("total")
+            if len(items) < page_size or (total and len(courses) >= total):
+                break
+        return {"kxrwList": {"list": courses, "total": len(courses)}}
+
     def get_class_id_by_name(self, class_names, all_classes):
         ColorPrint.process("根据课程名称获取课程ID...")
         class_ids = []
@@ -100,48 +234,61 @@ class HITSZJwxt:
                 ColorPrint.warning(f"未找到课程: {name}")
         return class_ids
 
+    def _refresh_session(self, pbar, reason):
+        pbar.set_description(f"{ColorPrint.YELLOW}🔄 重新登录中")
+        ColorPrint.warning(f"{reason}，开始重新登录刷新Cookie...")
+        if self.auth.failover() or self.auth.auto_reconnect():
+            ColorPrint.success("Cookie刷新成功！")
+            self.session = self.auth.get_session()
+        else:
+            ColorPrint.error("Cookie刷新失败，将使用现有Cookie继续")
+        pbar.set_description(f"{ColorPrint.CYAN}⏳ 等待中")
+
     def wait_for_choose_time(self, start_time):
+        """start_time 为当天的 "HH:MM"，或者时间戳（jw_batch 已经换算好的开抢时间）"""
         if start_time:
-            ColorPrint.info(f"等待选课时间: {start_time}")
             # 解析时间
             try:
-                target_time = time.strptime(start_time, "%H:%M")
-                now = time.localtime()
-                target_time = time.struct_time(
-                    (
-                        now.tm_year,
-                        now.tm_mon,
-                        now.tm_mday,
-                        target_time.tm_hour,
-                        target_time.tm_min,
-                        0,
-                        0,
-                        0,
-                        -1,
+                if isinstance(start_time, str):
+                    target_time = time.strptime(start_time, "%H:%M")
+                    now = time.localtime()
+                    t0 = time.mktime(
+                        (
+                            now.tm_year,
+                            now.tm_mon,
+                            now.tm_mday,
+                            target_time.tm_hour,
+                            target_time.tm_min,
+                            0,
+                            0,
+                            0,
+                            -1,
+                        )
                     )
+                else:
+                    t0 = float(start_time)
+                ColorPrint.info(
+                    f"等待选课时间: {time.strftime('%Y-%m-%d %H:%M', time.localtime(t0))}"
                 )
                 advance = 30  # 提前30秒开始预备选课
-                wait_seconds = time.mktime(target_time) - time.mktime(now) - advance
+                self.choose_start_time = t0
+                wait_seconds = t0 - time.time() - advance
 
                 if wait_seconds > 0:
                     ColorPrint.info(
                         f"距离选课开始还有 {int(wait_seconds)} 秒，提前{advance}秒开始..."
                     )
-                    long_wait_threshold = 60
-                    refresh_advance_seconds = 40
+                    # 抢课开始后这段时间内会话必须有效
+                    critical_window = 600
+                    refresh_advance_seconds = 90
                     # 重新登录一定要输入用户名和密码
-                    should_refresh = (wait_seconds > long_wait_threshold) and (
-                        self.auth.username and self.auth.password
-                    )
-                    refresh_time = (
-                        wait_seconds - refresh_advance_seconds
-                        if should_refresh
-                        else None
+                    can_relogin = bool(self.auth.username and self.auth.password)
+                    model = self.auth.session_model
+                    ColorPrint.info(
+                        f"会话保活间隔约 {int(model.keepalive_interval())} 秒"
                     )
-                    if should_refresh:
-                        ColorPrint.warning(
-                            f"检测到长时间等待，将在倒计时剩余 {refresh_advance_seconds} 秒时重新登录刷新Cookie"
-                        )
+                    from tqdm import tqdm
+
                     # 添加进度条
                     with tqdm(
                         total=int(wait_seconds),
@@ -149,7 +296,7 @@ class HITSZJwxt:
                         bar_format="{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]",
                         colour="cyan",
                     ) as pbar:
-                        target_timestamp = time.mktime(target_time) - advance
+                        target_timestamp = t0 - advance
                         refresh_done = False
 
                         while True:
@@ -157,26 +304,23 @@ class HITSZJwxt:
                             remaining_seconds = target_timestamp - time.time()
                             if remaining_seconds <= 0:
                                 break
-                            # 检查是否需要重新登录
+                            # 空闲太久时发保活请求，发现已失效就立即重新登录
+                            if remaining_seconds > 10 and model.needs_keepalive():
+                                if self.auth.keepalive() is False and can_relogin:
+                                    self._refresh_session(pbar, "保活发现会话已失效")
+                            # 只有预计会在抢课窗口内过期时才提前重新登录
                             if (
-                                should_refresh
+                                can_relogin
                                 and not refresh_done
                                 and remaining_seconds <= refresh_advance_seconds
                             ):
-                                pbar.set_description(
-                                    f"{ColorPrint.YELLOW}🔄 重新登录中"
-                                )
-                                ColorPrint.warning("开始重新登录刷新Cookie...")
-                                # 重新登录
-                                if self.auth.auto_reconnect():
-                                    ColorPrint.success("Cookie刷新成功！")
-                                    self.session = self.auth.get_session()
-                                else:
-                                    ColorPrint.error(
-                                        "Cookie刷新失败，将使用现有Cookie继续"
+                                if self.auth.session_expires_before(
+                                    target_timestamp + critical_window
+                                ):
+                                    self._refresh_session(
+                                        pbar, "会话预计在抢课期间过期"
                                     )
                                 refresh_done = True
-                                pbar.set_description(f"{ColorPrint.CYAN}⏳ 等待中")
                             elif remaining_seconds <= 10 and remaining_seconds > 0:
                                 pbar.set_description(
                                     f"{ColorPrint.GREEN}🚀 准备就绪 {remaining_seconds:.1f}秒"
@@ -207,27 +351,159 @@ class HITSZJwxt:
             ColorPrint.info("立即开始选课")
 
     def auto_choose_class(self, choose_classes, start_time=None):
+        # 等待期间准备一个热备会话，开抢时主会话失效可以直接切换
+        use_standby = bool(start_time and self.auth.username and self.auth.password)
+        if use_standby:
+            self.auth.enable_standby()
+        try:
+            return self._auto_choose_class(choose_classes, start_time)
+        finally:
+            if use_standby:
+                self.auth.disable_standby()
+
+    def _auto_choose_class(self, choose_classes, start_time=None):
         # 等待选课时间
+        self.choose_start_time = None
         self.wait_for_choose_time(start_time)
 
         if not choose_classes:
             ColorPrint.error("没有课程ID可供选择")
-            return
+            return set()
 
+        import asyncio
+
+        if self.journal:
+            # 只用Cookie登录时在进入事件循环前查好学号，断点日志按学号区分
+            self.student_id()
         ColorPrint.process("开始自动选课...")
-        asyncio.run(self._async_auto_choose(choose_classes))
+        return asyncio.run(self._run_async_auto_choose(choose_classes))
+
+    async def _run_async_auto_choose(self, choose_classes):
+        from http_transport import get_transport
+        from log_sink import sink
+
+        # 成功用时从选课开始时间算起，没有设定开始时间时从现在算起
+        self.events.start_run(self.choose_start_time)
+        # 抢课期间日志交给写线程输出，终端慢也不会拖住事件循环
+        try:
+            with sink.buffered():
+                completed = await self._async_auto_choose(choose_classes)
+        finally:
+            await get_transport().close_connector()
+        summary = sink.summary()
+        if summary:
+            ColorPrint.info(summary)
+        self.events.print_summary()
+        self.events.close()
+        if self.journal:
+            self.journal.close()
+        return completed
+
+    async def _async_relogin(self, async_auth, session):
+        from hitsz_auth_async import requests_to_aiohttp_jar
+
+        # 有热备会话时直接换上，不用重新登录
+        if self.auth.failover():
+            session.cookie_jar.clear()
+            requests_to_aiohttp_jar(self.auth.session.cookies, session.cookie_jar)
+            self.session = self.auth.get_session()
+            return True
+        ColorPrint.warning("检测到会话失效，后台重新登录中，已发出的请求继续进行...")
+        result = await async_auth.login(session)
+        if result:
+            async_auth.sync_to_requests(session)
+            self.session = self.auth.get_session()
+            ColorPrint.success("后台重新登录成功！")
+            return True
+        ColorPrint.error(f"后台重新登录失败: {result.message}")
+        return False
+
+    def student_id(self):
+        """当前账号的学号；只用Cookie登录时查询个人信息，查不到时返回 None"""
+        if self.auth.username:
+            return self.auth.username
+        if self._student_id is None:
+            info = self.get_person_info()
+            if isinstance(info, dict):
+                self._student_id = info.get("xh") or info.get("XH")
+        return self._student_id
+
+    def _journal_scope(self):
+        """断点日志只对同一账号、同一选课学期生效，不知道学号时返回 None"""
+        student = self.student_id()
+        if not student:
+            return None
+        return f"{student}:{self.term['p_xn']}-{self.term['p_xq']}"
+
+    def _checkpoint(self, class_id, result):
+        """有确定结果的请求写入断点日志，返回 "succeeded" / "failed"，还要重试时为 None"""
+        from grab_events import classify_outcome
+        from grab_journal import final_state
+
+        outcome = classify_outcome(
+            result.get("status"),
+            result["message"],
+            success=result["success"],
+            expired=result.get("expired", False),
+        )
+        state = final_state(outcome)
+        if state and self._resume_scope:
+            self.journal.record(
+                self._resume_scope, class_id, state, outcome, result["message"]
+            )
+        return state
 
     async def _async_auto_choose(self, choose_classes):
-        completed_classes = set()
+        import asyncio
+        from hitsz_auth_async import AsyncHITSZAuth
 
-        # 获取现有cookies
-        cookies = {cookie.name: cookie.value for cookie in self.session.cookies}
+        completed_classes = set()
+        # 重试也不会成功的课（如时间冲突），不再发请求
+        failed_classes = set()
+        self._resume_scope = self._journal_scope() if self.journal else None
+        if self.journal and not self._resume_scope:
+            ColorPrint.warning("无法确定学号，本次抢课不使用断点日志")
+        if self._resume_scope and self.fresh_start:
+            self.journal.clear(self._resume_scope)
+            self.fresh_start = False
+            ColorPrint.info("已清除断点日志里本账号本学期的记录，重新请求所有课程")
+        if self._resume_scope:
+            resumed = self.journal.load(self._resume_scope)
+            for class_id in choose_classes:
+                if resumed.get(class_id) == "succeeded":
+                    completed_classes.add(class_id)
+                elif resumed.get(class_id) == "failed":
+                    failed_classes.add(class_id)
+            if completed_classes or failed_classes:
+                ColorPrint.info(
+                    f"从断点日志恢复：跳过已选上 {len(completed_classes)} 门、"
+                    f"无法选上 {len(failed_classes)} 门（加 --fresh 重新请求所有课程）"
+                )
+        async_auth = AsyncHITSZAuth(self.auth)
+        relogin_task = None
+        session_lost = False
 
-        async with aiohttp.ClientSession(cookies=cookies) as session:
+        # 带域名和路径导入现有cookies
+        async with async_auth.new_session() as session:
             request_count = 0
             pending_tasks = []  # 存储待处理的任务
+            deadline = (
+                time.monotonic() + self.grab_timeout if self.grab_timeout else None
+            )
+
+            while len(completed_classes) + len(failed_classes) < len(choose_classes):
+                if deadline and time.monotonic() >= deadline:
+                    ColorPrint.warning(
+                        f"已达到抢课时长上限 {self.grab_timeout} 秒，停止发送请求"
+                    )
+                    break
+
+                if self.rate_limiter is not None:
+                    # 先拿到配额再检查完成情况，配额不会花在刚选上的课上
+                    await self.rate_limiter.acquire(
+                        self.auth.username or id(self), self.request_interval
+                    )
 
-            while len(completed_classes) < len(choose_classes):
                 # 清理已完成的任务
                 finished_tasks = []
                 for task, class_id in pending_tasks:
@@ -239,11 +515,36 @@ class HITSZJwxt:
                     if class_id not in completed_classes:
                         try:
                             result = await task
-                            if result.get("success"):
+                            state = self._checkpoint(class_id, result)
+                            if self.on_result:
+                                self.on_result(class_id, result, state)
+                            if state == "succeeded":
                                 completed_classes.add(class_id)
                                 ColorPrint.success(
                                     f"课程 {class_id[:8]}... 选课成功！: {result['message']}"
                                 )
+                            elif state == "failed":
+                                failed_classes.add(class_id)
+                                ColorPrint.error(
+                                    f"课程 {class_id[:8]}... 无法选上，不再重试: {result['message']}"
+                                )
+                            elif result.get("expired"):
+                                # 会话失效时在后台重新登录，不阻塞后续请求；
+                                # 重新登录进行中时返回的失效结果是旧会话发出的，不再记录
+                                if relogin_task is None or relogin_task.done():
+                                    if not session_lost:
+                                        self.auth.mark_invalid()
+                                    # 没有账号密码时无法恢复，失效只记录一次
+                                    session_lost = not (
+                                        self.auth.username and self.auth.password
+                                    )
+                                    if not session_lost:
+                                        relogin_task = asyncio.create_task(
+                                            self._async_relogin(async_auth, session)
+                                        )
+                                ColorPrint.warning(
+                                    f"课程 {class_id[:8]}... 会话失效: {result['message']}"
+                                )
                             else:
                                 ColorPrint.error(
                                     f"课程 {class_id[:8]}... 选课失败: {result['message']}"
@@ -254,7 +555,9 @@ class HITSZJwxt:
                             )
 
                 remaining_classes = [
-                    cid for cid in choose_classes if cid not in completed_classes
+                    cid
+                    for cid in choose_classes
+                    if cid not in completed_classes and cid not in failed_classes
                 ]
 
                 if not remaining_classes:
@@ -270,22 +573,30 @@ class HITSZJwxt:
                 )
                 pending_tasks.append((task, current_class))
 
+                # 热循环里用 % 参数，被级别过滤时不做格式化
                 ColorPrint.info(
-                    f"第 {request_count} 次请求 - 课程 {current_class[:8]}... "
+                    "第 %d 次请求 - 课程 %s... ", request_count, current_class[:8]
                 )
 
                 # 显示进度
                 ColorPrint.info(
-                    f"已完成 {len(completed_classes)}/{len(choose_classes)} 个课程，待处理任务: {len(pending_tasks)}"
+                    "已完成 %d/%d 个课程，待处理任务: %d",
+                    len(completed_classes),
+                    len(choose_classes),
+                    len(pending_tasks),
                 )
-                await asyncio.sleep(1.4)
+                if self.rate_limiter is None:
+                    await asyncio.sleep(self.request_interval)
 
             if pending_tasks:
                 ColorPrint.info("等待剩余请求完成...")
                 for task, class_id in pending_tasks:
                     try:
                         result = await task
-                        if result.get("success") and class_id not in completed_classes:
+                        state = self._checkpoint(class_id, result)
+                        if self.on_result:
+                            self.on_result(class_id, result, state)
+                        if state == "succeeded" and class_id not in completed_classes:
                             completed_classes.add(class_id)
                             ColorPrint.success(
                                 f"课程 {class_id[:8]}... 选课成功！: {result['message']}"
@@ -293,10 +604,35 @@ class HITSZJwxt:
                     except Exception as e:
                         ColorPrint.warning(f"课程 {class_id[:8]}... 请求异常: {str(e)}")
 
-            ColorPrint.success("🎉 所有课程处理完毕！")
+            if relogin_task and not relogin_task.done():
+                relogin_task.cancel()
+
+            if len(completed_classes) + len(failed_classes) == len(choose_classes):
+                ColorPrint.success("🎉 所有课程处理完毕！")
+        return completed_classes
 
     async def _send_course_request_simple(self, session, class_id):
-        url = f"{self.base_url}/Xsxk/addGouwuche"
+        from grab_events import classify_outcome
+
+        start = time.perf_counter()
+        result = await self._add_gouwuche(session, class_id)
+        self.events.emit(
+            "/Xsxk/addGouwuche",
+            result.get("status"),
+            classify_outcome(
+                result.get("status"),
+                result["message"],
+                success=result["success"],
+                expired=result.get("expired", False),
+            ),
+            time.perf_counter() - start,
+            course_id=class_id,
+            message=result["message"],
+        )
+        return result
+
+    def _course_request(self, class_id):
+        """选课请求的请求头和表单"""
         headers = {
             "Accept": "*/*",
             "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
@@ -305,57 +641,36 @@ class HITSZJwxt:
             "rolecode": "null",
             "User-Agent": self.headers["User-Agent"],
         }
+        return headers, self._xk_form("rwtjzyx", class_id, 1, 18)
 
-        data = {
-            "cxsfmt": "0",
-            "p_pylx": "1",
-            "mxpylx": "1",
-            "p_sfgldjr": "0",
-            "p_sfredis": "0",
-            "p_sfsyxkgwc": "0",
-            "p_xktjz": "rwtjzyx",
-            "p_chaxunxh": "",
-            "p_gjz": "",
-            "p_skjs": "",
-            "p_xn": "2025-2026",
-            "p_xq": "1",
-            "p_xnxq": "2025-20261",
-            "p_dqxn": "2024-2025",
-            "p_dqxq": "3",
-            "p_dqxnxq": "2024-20253",
-            "p_xkfsdm": "sx-b-b",
-            "p_xiaoqu": "",
-            "p_kkyx": "",
-            "p_kclb": "",
-            "p_xkxs": "",
-            "p_dyc": "",
-            "p_kkxnxq": "",
-            "p_id": class_id,
-            "p_sfhlctkc": "1",
-            "p_sfhllrlkc": "1",
-            "p_kxsj_xqj": "",
-            "p_kxsj_ksjc": "",
-            "p_kxsj_jsjc": "",
-            "p_kcdm_js": "",
-            "p_kcdm_cxrw": "",
-            "p_kcdm_cxrw_zckc": "",
-            "p_kc_gjz": "",
-            "p_xzcxtjz_nj": "",
-            "p_xzcxtjz_yx": "",
-            "p_xzcxtjz_zy": "",
-            "p_xzcxtjz_zyfx": "",
-            "p_xzcxtjz_bj": "",
-            "p_sfxsgwckb": "1",
-            "p_skyy": "",
-            "p_chaxunxkfsdm": "",
-            "pageNum": "1",
-            "pageSize": "18",
-        }
+    def prepare_course_requests(self, class_ids):
+        """开抢前把每门课的请求头和编码好的表单准备好，抢课时直接发送"""
+        from urllib.parse import urlencode
+
+        self._course_templates = {}
+        for class_id in class_ids:
+            headers, data = self._course_request(class_id)
+            self._course_templates[class_id] = (headers, urlencode(data).encode())
+        return self._course_templates
+
+    async def _add_gouwuche(self, session, class_id):
+        import asyncio
+
+        url = f"{self.base_url}/Xsxk/addGouwuche"
+        template = self._course_templates.get(class_id)
+        headers, data = template or self._course_request(class_id)
 
         try:
             async with session.post(
                 url, headers=headers, data=data, timeout=15
             ) as response:
+                if "require" in str(response.url) or "invalid" in str(response.url):
+                    return {
+                        "success": False,
+                        "message": "Cookie失效",
+                        "expired": True,
+                        "status": response.status,
+                    }
                 if response.status == 200:
                     try:
                         result = await response.json()
@@ -363,18 +678,32 @@ class HITSZJwxt:
                             return {
                                 "success": False,
                                 "message": result.get("message", "选课失败"),
+                                "status": response.status,
                             }
                         elif result.get("code") == "500":
-                            return {"success": False, "message": "服务器内部错误"}
+                            return {
+                                "success": False,
+                                "message": "服务器内部错误",
+                                "status": response.status,
+                            }
                         else:
                             return {
                                 "success": True,
                                 "message": result.get("message", "选课成功"),
+                                "status": response.status,
                             }
                     except:
-                        return {"success": False, "message": "响应解析失败"}
+                        return {
+                            "success": False,
+                            "message": "响应解析失败",
+                            "status": response.status,
+                        }
                 else:
-                    return {"success": False, "message": f"HTTP {response.status}"}
+                    return {
+                        "success": False,
+                        "message": f"HTTP {response.status}",
+                        "status": response.status,
+                    }
 
         except asyncio.TimeoutError:
             return {"success": False, "message": "请求超时"}
@@ -388,6 +717,17 @@ class MenuSystem:
         self.auth = auth
         self.jwxt = jwxt
         self.running = True
+        self.keepalive_stop = threading.Event()
+
+    def _keepalive_loop(self):
+        """菜单停留期间在后台按寿命模型保活，避免回来时会话已空闲超时"""
+        model = self.auth.session_model
+        while not self.keepalive_stop.wait(30):
+            if model.needs_keepalive():
+                self.auth.keepalive()
+
+    def start_keepalive(self):
+        threading.Thread(target=self._keepalive_loop, daemon=True).start()
 
     def show_menu(self):
         """显示主菜单"""
@@ -569,12 +909,21 @@ class MenuSystem:
     def run(self):
         ColorPrint.success("🎉 登录成功，菜单")
 
-        # 初始检查
+        # 初始检查，同时完成对缓存Cookie的延迟验证
         person_info = self.jwxt.get_person_info()
+        if not person_info and not (self.auth.username and self.auth.password):
+            ColorPrint.warning("缓存的Cookie已失效，请重新登录")
+            try:
+                if prompt_login(self.auth):
+                    self.jwxt.session = self.auth.get_session()
+                    person_info = self.jwxt.get_person_info()
+            except KeyboardInterrupt:
+                ColorPrint.warning("\n用户取消登录")
         if not person_info:
             ColorPrint.error("获取个人信息失败，可能需要重新登录")
         else:
             ColorPrint.success("系统状态正常")
+            self.start_keepalive()
 
         while self.running:
             try:
@@ -612,8 +961,50 @@ class MenuSystem:
                 ColorPrint.info("\n检测到EOF，退出程序")
                 break
 
+        self.keepalive_stop.set()
+
+
+def prompt_login(auth):
+    username = ColorPrint.input_with_validation(
+        "请输入学号/工号",
+        validator=lambda x: len(x) > 0,
+        error_msg="学号/工号不能为空",
+    )
+
+    if not username:
+        ColorPrint.error("用户取消输入")
+        return False
+
+    password = ColorPrint.input_with_validation(
+        "请输入密码", validator=lambda x: len(x) > 0, error_msg="密码不能为空"
+    )
+
+    if not password:
+        ColorPrint.error("用户取消输入")
+        return False
+
+    if not auth.login(username, password):
+        ColorPrint.error("登录失败")
+        return False
+    return True
+
 
 def main():
+    import profiling
+
+    # HITSZ_PROFILE 或 --profile 打开时剖析菜单功能、抢课和登录，默认不做任何事
+    profiling.install(
+        [
+            (MenuSystem, "show_personal_info"),
+            (MenuSystem, "show_all_classes"),
+            (MenuSystem, "choose_class_by_name"),
+            (MenuSystem, "choose_class_by_id"),
+            (MenuSystem, "refresh_login"),
+            (HITSZJwxt, "auto_choose_class"),
+            (HITSZJwxtAuth, "login"),
+        ],
+        argv=sys.argv,
+    )
     ColorPrint.header("哈尔滨工业大学（深圳）教务辅助选课工具")
 
     ColorPrint.warning(
@@ -632,8 +1023,12 @@ def main():
     if os.path.exists(auth.cookies_file):
         try:
             use_saved = ColorPrint.ask_yes_no("检测到已保存的Cookie，是否使用？")
-            if use_saved:
-                if auth.load_cookies() and auth.test_cookie():
+            if use_saved and auth.load_cookies():
+                # 最近验证过的Cookie直接使用，真正失效时由首次请求发现
+                if auth.is_cookie_cache_fresh():
+                    ColorPrint.success("Cookie最近验证过，跳过检测直接使用")
+                    use_pwd = False
+                elif auth.test_cookie():
                     ColorPrint.success("使用保存的Cookie成功登录！")
                     use_pwd = False
                 else:
@@ -646,39 +1041,26 @@ def main():
     # 输入用户名密码
     if use_pwd:
         try:
-            username = ColorPrint.input_with_validation(
-                "请输入学号/工号",
-                validator=lambda x: len(x) > 0,
-                error_msg="学号/工号不能为空",
-            )
-
-            if not username:
-                ColorPrint.error("用户取消输入")
-                return
-
-            password = ColorPrint.input_with_validation(
-                "请输入密码", validator=lambda x: len(x) > 0, error_msg="密码不能为空"
-            )
-
-            if not password:
-                ColorPrint.error("用户取消输入")
+            if not prompt_login(auth):
                 return
-
-            if not auth.login(username, password):
-                ColorPrint.error("登录失败")
-                return
-
         except KeyboardInterrupt:
             ColorPrint.info("\n拜拜喵！")
             return
 
     # 初始化教务系统
     jwxt = HITSZJwxt(auth)
+    # --fresh：忽略断点日志里之前的结果，重新请求所有课程
+    jwxt.fresh_start = "--fresh" in sys.argv
 
     # 创建并运行菜单系统
     menu = MenuSystem(auth, jwxt)
     menu.run()
 
+    # 设置了 HITSZ_LATENCY_FILE 时把本次登录各阶段耗时写出来
+    latency_file = os.environ.get("HITSZ_LATENCY_FILE")
+    if latency_file:
+        auth.dump_latency(latency_file)
+
 
 if __name__ == "__main__":
     main()
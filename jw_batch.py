@@ -0,0 +1,311 @@
+"""jw.py 的无人值守批量模式
+
+从计划文件读取账号、学期参数、要抢的课程（名称或ID，带优先级）和开抢时间，
+提前完成会话校验、课程目录查询、名称到ID的解析和选课请求预编码，
+然后交给 HITSZJwxt.auto_choose_class 等待并抢课，全程不需要输入。
+
+    python jw_batch.py plan.json
+    python jw_batch.py plan.json --dry-run     # 只做准备工作，打印解析结果
+    python jw_batch.py plan.json --fresh       # 忽略断点日志，重新请求所有课程
+
+计划文件示例：
+
+    {
+      "account": {"username": "学号", "password": "密码", "cookies_file": "hitsz_jwxt_cookies.json"},
+      "term": {"p_xn": "2025-2026", "p_xq": "1"},
+      "courses": [
+        {"name": "高等数学", "priority": 1},
+        {"id": "0123456789ABCDEF0123456789ABCDEF", "priority": 2}
+      ],
+      "start_time": "2025-07-01 12:30",
+      "request_interval": 1.4,
+      "grab_timeout": 600
+    }
+
+start_time 可以写 "YYYY-MM-DD HH:MM"，也可以只写 "HH:MM"：只写时刻时取离现在最近的
+一次，今天的这个时刻已经过去 12 小时以上就顺延到明天（提前一晚准备第二天早上的计划）。
+密码也可以不写在文件里，改用环境变量 HITSZ_JW_PASSWORD。
+返回值：0 全部选上，1 有课程没选上，2 计划或准备阶段出错。
+"""
+
+import os
+import sys
+import json
+import time
+from datetime import datetime, timedelta
+from color_print import ColorPrint
+from hitsz_auth import HITSZJwxtAuth
+from jw import HITSZJwxt, DEFAULT_TERM
+
+
+class PlanError(ValueError):
+    pass
+
+
+def parse_number(plan, key, default, allow_none=False):
+    """取一个正数配置项，类型不对时抛 PlanError"""
+    value = plan.get(key, default)
+    if value is None and allow_none:
+        return None
+    # bool 是 int 的子类，要单独排除
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise PlanError(f"{key} 必须是正数: {value!r}")
+    return float(value)
+
+
+def parse_term(term):
+    """学期参数覆盖 DEFAULT_TERM，只允许已知的键"""
+    term = term or {}
+    if not isinstance(term, dict):
+        raise PlanError("term 必须是 JSON 对象")
+    bad = [key for key, value in term.items() if not isinstance(value, str)]
+    if bad:
+        raise PlanError(f"学期参数必须是字符串: {', '.join(bad)}")
+    unknown = [key for key in term if key not in DEFAULT_TERM]
+    if unknown:
+        raise PlanError(f"未知的学期参数: {', '.join(unknown)}")
+    return {**DEFAULT_TERM, **term}
+
+
+def parse_courses(items):
+    """课程列表按优先级排序，每项为课程名称字符串或 {name|id, priority}"""
+    if items is not None and not isinstance(items, list):
+        raise PlanError("courses 必须是列表")
+    courses = []
+    for index, item in enumerate(items or []):
+        if isinstance(item, str):
+            item = {"name": item}
+        if not isinstance(item, dict):
+            raise PlanError(f"courses[{index}] 必须是课程名称或 JSON 对象")
+        if not (item.get("id") or item.get("name")):
+            raise PlanError(f"courses[{index}] 需要 name 或 id")
+        for key in ("id", "name"):
+            if item.get(key) is not None and not isinstance(item[key], str):
+                raise PlanError(f"courses[{index}].{key} 必须是字符串")
+        # 没写优先级的按出现顺序排在后面
+        priority = item.get("priority", 1000 + index)
+        if isinstance(priority, bool) or not isinstance(priority, (int, float)):
+            raise PlanError(f"courses[{index}].priority 必须是数字")
+        courses.append({**item, "priority": priority})
+    if not courses:
+        raise PlanError("courses 不能为空")
+    courses.sort(key=lambda c: c["priority"])
+    return courses
+
+
+def parse_start_at(value, now=None):
+    """开抢时间转成时间戳：时间戳、"YYYY-MM-DD HH:MM[:SS]" 或当天的 "HH:MM"，空值为现在"""
+    now = now or time.time()
+    if value is None or value == "":
+        return now
+    if isinstance(value, bool):
+        raise PlanError(f"start_time 格式错误: {value!r}")
+    if isinstance(value, (int, float)):
+        # 时间戳只接受前后一年内的，防止把 12 这样的数字当成 1970 年
+        if not now - 366 * 86400 < value < now + 366 * 86400:
+            raise PlanError(f"start_time 时间戳超出范围: {value!r}")
+        return float(value)
+    if not isinstance(value, str):
+        raise PlanError(f"start_time 格式错误: {value!r}")
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            pass
+    try:
+        clock = datetime.strptime(value, "%H:%M")
+    except ValueError:
+        raise PlanError(f"start_time 格式错误: {value}")
+    today = datetime.fromtimestamp(now)
+    return today.replace(hour=clock.hour, minute=clock.minute, second=0, microsecond=0).timestamp()
+
+
+def parse_start_time(start_time):
+    """校验计划里的开抢时间，原样返回；开抢前用 resolve_start_time 换成时间戳"""
+    if start_time is not None and not isinstance(start_time, str):
+        raise PlanError(f"start_time 必须是字符串: {start_time!r}")
+    if start_time:
+        try:
+            parse_start_at(start_time)
+        except PlanError:
+            raise PlanError(
+                f"start_time 格式错误: {start_time}，请使用 HH:MM 或 YYYY-MM-DD HH:MM"
+            )
+    return start_time
+
+
+def resolve_start_time(start_time, now=None):
+    """开抢时间换成时间戳，没有设置时返回 None
+
+    只写了 HH:MM 时取离现在最近的一次：今天的这个时刻过去不到 12 小时按今天算
+    （中断后重新运行时立即开抢），更早的顺延到明天。
+    """
+    if not start_time:
+        return None
+    now = now or time.time()
+    t0 = parse_start_at(start_time, now)
+    if len(start_time) <= 5 and now - t0 > 12 * 3600:
+        t0 = (datetime.fromtimestamp(t0) + timedelta(days=1)).timestamp()
+        ColorPrint.warning(
+            f"今天的 {start_time} 已经过去，改为明天 "
+            f"{datetime.fromtimestamp(t0).strftime('%Y-%m-%d %H:%M')} 开抢"
+        )
+    return t0
+
+
+def load_plan(path, environ=None):
+    """读取并校验计划文件，返回补全默认值后的计划"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+    except (OSError, ValueError) as e:
+        raise PlanError(f"无法读取计划文件 {path}: {e}")
+    return parse_plan(plan, environ)
+
+
+def parse_plan(plan, environ=None):
+    """校验已经解析好的计划字典，jw_service 接收提交时也用它"""
+    environ = os.environ if environ is None else environ
+    if not isinstance(plan, dict):
+        raise PlanError("计划必须是 JSON 对象")
+
+    account = plan.get("account") or {}
+    if not isinstance(account, dict):
+        raise PlanError("account 必须是 JSON 对象")
+    account = dict(account)
+    if not account.get("password"):
+        account["password"] = environ.get("HITSZ_JW_PASSWORD")
+    for key in ("username", "password", "cookies_file"):
+        if account.get(key) is not None and not isinstance(account[key], str):
+            raise PlanError(f"account.{key} 必须是字符串")
+    if not account.get("username"):
+        raise PlanError("account.username 不能为空")
+
+    return {
+        "account": account,
+        "term": parse_term(plan.get("term")),
+        "courses": parse_courses(plan.get("courses")),
+        "start_time": parse_start_time(plan.get("start_time")),
+        "request_interval": parse_number(plan, "request_interval", 1.4),
+        "grab_timeout": parse_number(plan, "grab_timeout", None, allow_none=True),
+    }
+
+
+def prepare_session(auth):
+    """先用保存的Cookie，失效时再用账号密码登录"""
+    if os.path.exists(auth.cookies_file) and auth.load_cookies():
+        if auth.test_cookie(use_cache=False):
+            ColorPrint.success("保存的Cookie有效")
+            return True
+        ColorPrint.warning("保存的Cookie无效，将重新登录")
+    if not auth.password:
+        ColorPrint.error("Cookie无效且没有提供密码（account.password 或 HITSZ_JW_PASSWORD）")
+        return False
+    return bool(auth.login())
+
+
+def resolve_courses(jwxt, courses, catalog=None):
+    """按优先级返回课程ID列表；只有计划里写了课程名称且没有传入目录时才查询课程目录"""
+    if catalog is None and any(not c.get("id") for c in courses):
+        catalog = jwxt.get_all_classes()
+        if catalog is None:
+            raise PlanError("查询课程目录失败")
+
+    class_ids, missing = [], []
+    for course in courses:
+        if course.get("id"):
+            class_ids.append(course["id"])
+            continue
+        found = jwxt.get_class_id_by_name([course["name"]], catalog)
+        if found:
+            class_ids.append(found[0])
+        else:
+            missing.append(course["name"])
+    if missing:
+        raise PlanError(f"课程目录里找不到: {', '.join(missing)}")
+    # 名称和ID可能指向同一门课，保留优先级最高的那次
+    return list(dict.fromkeys(class_ids))
+
+
+def run(plan, dry_run=False, fresh=False):
+    account = plan["account"]
+    auth = HITSZJwxtAuth(account["username"], account.get("password"))
+    if account.get("cookies_file"):
+        auth.cookies_file = account["cookies_file"]
+
+    ColorPrint.process("校验会话...")
+    if not prepare_session(auth):
+        ColorPrint.error("登录失败")
+        return 2
+
+    jwxt = HITSZJwxt(auth)
+    jwxt.term = plan["term"]
+    jwxt.request_interval = plan["request_interval"]
+    jwxt.grab_timeout = plan["grab_timeout"]
+    jwxt.fresh_start = fresh
+
+    try:
+        class_ids = resolve_courses(jwxt, plan["courses"])
+    except PlanError as e:
+        ColorPrint.error(str(e))
+        return 2
+    jwxt.prepare_course_requests(class_ids)
+
+    ColorPrint.subheader("抢课计划", style="bracket")
+    for priority, class_id in enumerate(class_ids, 1):
+        ColorPrint.info(f"{priority}. {class_id}")
+    t0 = resolve_start_time(plan["start_time"])
+    ColorPrint.info(
+        f"开抢时间: {datetime.fromtimestamp(t0).strftime('%Y-%m-%d %H:%M') if t0 else '立即'}"
+    )
+    if dry_run:
+        ColorPrint.success("准备完成（--dry-run，不抢课）")
+        return 0
+
+    completed = jwxt.auto_choose_class(class_ids, t0)
+    if completed is not None and len(completed) == len(class_ids):
+        return 0
+    failed = [c for c in class_ids if not completed or c not in completed]
+    ColorPrint.warning(f"{len(failed)} 门课程没有选上")
+    return 1
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="教务系统无人值守抢课")
+    parser.add_argument("plan", help="JSON计划文件")
+    parser.add_argument("--dry-run", action="store_true", help="只做准备工作，不抢课")
+    parser.add_argument(
+        "--fresh", action="store_true", help="忽略断点日志里之前的结果，重新请求所有课程"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="cprofile",
+        help="剖析登录和抢课（cprofile 或 sample），也可设置 HITSZ_PROFILE",
+    )
+    args = parser.parse_args(argv)
+
+    import profiling
+
+    profiling.install(
+        [(HITSZJwxt, "auto_choose_class"), (HITSZJwxtAuth, "login")], mode=args.profile
+    )
+
+    ColorPrint.header("哈尔滨工业大学（深圳）教务无人值守抢课")
+    try:
+        plan = load_plan(args.plan)
+    except PlanError as e:
+        ColorPrint.error(str(e))
+        return 2
+
+    try:
+        return run(plan, dry_run=args.dry_run, fresh=args.fresh)
+    except KeyboardInterrupt:
+        ColorPrint.info("\n拜拜喵！")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,364 @@
+"""多账号抢课：一个进程、一个事件循环同时为多个账号抢课
+
+每个账号有自己的 HITSZJwxtAuth、Cookie 文件和 aiohttp 会话（Cookie 互不影响），
+底层共用 http_transport 的连接池和 aiohttp 连接器；所有账号的选课请求共享一个
+全局速率预算（每秒请求数），在账号之间轮流分配，对教务系统的总压力可以预估。
+
+    python jw_multi.py multi.json
+    python jw_multi.py multi.json --dry-run
+    python jw_multi.py multi.json --fresh      # 忽略断点日志，重新请求所有课程
+
+配置文件示例：
+
+    {
+      "term": {"p_xn": "2025-2026", "p_xq": "1"},
+      "start_time": "12:30",
+      "rate": 3,
+      "request_interval": 1.4,
+      "grab_timeout": 600,
+      "accounts": [
+        {"username": "学号1", "password": "密码1", "courses": ["高等数学", {"id": "...", "priority": 0}]},
+        {"username": "学号2", "password": "密码2", "courses": ["大学物理"]}
+      ]
+    }
+
+rate 是所有账号加起来每秒最多发出的选课请求数，request_interval 是单个账号两次请求
+之间的最小间隔。Cookie 默认保存到 hitsz_jwxt_cookies_<学号>.json，会话寿命模型保存到
+hitsz_jwxt_session_model_<学号>.json；设置了 HITSZ_EVENT_LOG 时事件日志按账号写到
+<HITSZ_EVENT_LOG 去掉扩展名>_<学号>.jsonl。返回值同 jw_batch.py。
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+from color_print import ColorPrint
+from log_sink import sink
+from grab_events import EventLog
+from hitsz_auth import HITSZJwxtAuth
+from session_model import SessionLifetimeModel
+from jw import HITSZJwxt
+from jw_batch import (
+    PlanError,
+    parse_term,
+    parse_courses,
+    parse_number,
+    parse_start_time,
+    prepare_session,
+    resolve_start_time,
+    resolve_courses,
+)
+
+
+def event_log_path(username):
+    """按账号区分的事件日志文件，多个账号同时抢课时不写同一个文件；没有设置 HITSZ_EVENT_LOG 时为 None"""
+    base = os.environ.get("HITSZ_EVENT_LOG")
+    if not base:
+        return None
+    root, ext = os.path.splitext(base)
+    return f"{root}_{username}{ext or '.jsonl'}"
+
+
+def use_account_files(auth, username, cookies_file=None):
+    """每个账号单独的 Cookie 文件和会话寿命模型，多个账号互不覆盖"""
+    auth.cookies_file = cookies_file or f"hitsz_jwxt_cookies_{username}.json"
+    auth.session_model = SessionLifetimeModel(
+        f"hitsz_jwxt_session_model_{username}.json"
+    )
+    auth.session_model.load()
+    return auth
+
+
+class FairRateLimiter:
+    """全局请求速率预算，在账号之间轮流分配
+
+    相邻两次发放至少间隔 1/rate 秒；同一账号两次之间至少间隔 account_interval 秒，
+    调用方也可以按账号传入自己的间隔。
+    asyncio.Lock 按先来后到唤醒，每个账号的抢课循环同一时间只排一个请求，
+    所以繁忙时各账号依次轮流拿到配额，不会有账号被饿死。
+    """
+
+    def __init__(self, rate, account_interval=0.0):
+        self.interval = 1.0 / rate
+        self.account_interval = account_interval
+        self._lock = None
+        self._next = 0.0
+        self._last = {}
+
+    async def acquire(self, account, interval=None):
+        if interval is None:
+            interval = self.account_interval
+        # 账号自己的间隔在排队前等，不占着全局队列
+        wait = self._last.get(account, 0) + interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            wait = self._next - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            now = time.monotonic()
+            self._next = now + self.interval
+            self._last[account] = now
+
+
+class GrabAccount:
+    """一个账号及其抢课计划"""
+
+    def __init__(self, username, password, courses, cookies_file=None):
+        self.username = username
+        self.courses = courses
+        self.auth = use_account_files(
+            HITSZJwxtAuth(username, password), username, cookies_file
+        )
+        self.jwxt = None
+        self.class_ids = []
+        self.completed = set()
+        self.ready = False
+        self.refresh_done = False
+        self.error = None
+
+    def status_row(self):
+        requests = 0
+        if not self.ready:
+            state = self.error or "未就绪"
+        else:
+            state = "全部选上" if len(self.completed) == len(self.class_ids) else "部分未选上"
+            endpoint = self.jwxt.events.summary()["endpoints"].get("/Xsxk/addGouwuche")
+            requests = endpoint["count"] if endpoint else 0
+        return (
+            self.username,
+            f"{len(self.completed)}/{len(self.class_ids)}",
+            state,
+            requests,
+        )
+
+
+class HITSZJwxtMulti:
+    """在一个事件循环里为多个账号抢课，共用连接池和全局速率预算"""
+
+    def __init__(self, rate=3.0, request_interval=1.4, grab_timeout=None, term=None):
+        self.rate = rate
+        self.request_interval = request_interval
+        self.grab_timeout = grab_timeout
+        self.term = term
+        # 为 True 时各账号忽略断点日志里之前的结果
+        self.fresh = False
+        self.accounts = []
+        self.limiter = None
+
+    def add_account(self, username, password, courses, cookies_file=None):
+        account = GrabAccount(username, password, courses, cookies_file)
+        self.accounts.append(account)
+        return account
+
+    def load_config(self, config_file):
+        try:
+            with open(config_file, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            raise PlanError(f"无法读取配置文件 {config_file}: {e}")
+
+        if not isinstance(config, dict):
+            raise PlanError("配置必须是 JSON 对象")
+        self.term = parse_term(config.get("term"))
+        self.rate = parse_number(config, "rate", self.rate)
+        self.request_interval = parse_number(
+            config, "request_interval", self.request_interval
+        )
+        self.grab_timeout = parse_number(
+            config, "grab_timeout", self.grab_timeout, allow_none=True
+        )
+        accounts = config.get("accounts") or []
+        if not isinstance(accounts, list):
+            raise PlanError("accounts 必须是列表")
+        for index, item in enumerate(accounts):
+            if not isinstance(item, dict):
+                raise PlanError(f"accounts[{index}] 必须是 JSON 对象")
+            if not isinstance(item.get("username"), str) or not item["username"]:
+                raise PlanError(f"accounts[{index}] 缺少 username")
+            if item["username"] in (a.username for a in self.accounts):
+                raise PlanError(f"账号 {item['username']} 重复")
+            self.add_account(
+                item["username"],
+                item.get("password"),
+                parse_courses(item.get("courses")),
+                item.get("cookies_file"),
+            )
+        if not self.accounts:
+            raise PlanError("accounts 不能为空")
+        return {**config, "start_time": parse_start_time(config.get("start_time"))}
+
+    def prepare(self):
+        """逐个账号校验会话、解析课程ID并预编码选课请求，返回就绪的账号数"""
+        for account in self.accounts:
+            ColorPrint.subheader(f"准备账号 {account.username}", style="bracket")
+            if not prepare_session(account.auth):
+                account.error = "登录失败"
+                ColorPrint.error(f"账号 {account.username} 登录失败，跳过")
+                continue
+            jwxt = HITSZJwxt(account.auth)
+            if self.term:
+                jwxt.term = dict(self.term)
+            jwxt.request_interval = self.request_interval
+            jwxt.grab_timeout = self.grab_timeout
+            jwxt.fresh_start = self.fresh
+            jwxt.events = EventLog(event_log_path(account.username))
+            try:
+                account.class_ids = resolve_courses(jwxt, account.courses)
+            except PlanError as e:
+                account.error = "课程解析失败"
+                ColorPrint.error(f"账号 {account.username}: {e}")
+                continue
+            jwxt.prepare_course_requests(account.class_ids)
+            account.jwxt = jwxt
+            account.ready = True
+        return sum(1 for a in self.accounts if a.ready)
+
+    def _refresh(self, account, reason):
+        ColorPrint.warning(f"账号 {account.username} {reason}，重新登录...")
+        if account.auth.auto_reconnect():
+            account.jwxt.session = account.auth.get_session()
+        else:
+            ColorPrint.error(f"账号 {account.username} 重新登录失败，将使用现有Cookie继续")
+
+    def wait_for_choose_time(self, t0, advance=30):
+        """等到开抢前 advance 秒，期间给每个账号保活，预计在抢课期间过期的提前重新登录
+
+        t0 是 resolve_start_time 换算好的开抢时间戳，None 表示立即开抢。
+        """
+        ready = [a for a in self.accounts if a.ready]
+        if not t0:
+            return None
+        ColorPrint.info(
+            f"等待选课时间: {time.strftime('%Y-%m-%d %H:%M', time.localtime(t0))}，"
+            f"共 {len(ready)} 个账号"
+        )
+        # 抢课开始后这段时间内会话必须有效，和单账号的 wait_for_choose_time 一致
+        critical_window = 600
+        refresh_advance_seconds = 90
+        while True:
+            remaining = t0 - advance - time.time()
+            if remaining <= 0:
+                break
+            for account in ready:
+                auth = account.auth
+                can_relogin = bool(auth.username and auth.password)
+                if remaining > 10 and auth.session_model.needs_keepalive():
+                    if auth.keepalive() is False and can_relogin:
+                        self._refresh(account, "保活发现会话已失效")
+                if (
+                    can_relogin
+                    and not account.refresh_done
+                    and remaining <= refresh_advance_seconds
+                ):
+                    if auth.session_expires_before(t0 - advance + critical_window):
+                        self._refresh(account, "会话预计在抢课期间过期")
+                    account.refresh_done = True
+            time.sleep(min(remaining, 5.0 if remaining > 300 else 1.0 if remaining > 60 else 0.2))
+        ColorPrint.success("⏰ 选课时间到，开始执行选课！")
+        return t0
+
+    async def _grab(self, account):
+        try:
+            account.completed = await account.jwxt._async_auto_choose(account.class_ids)
+        except Exception as e:
+            ColorPrint.error(f"账号 {account.username} 抢课异常: {e}")
+
+    async def _run(self, t0):
+        from http_transport import get_transport
+
+        ready = [a for a in self.accounts if a.ready]
+        self.limiter = FairRateLimiter(self.rate, self.request_interval)
+        for account in ready:
+            account.jwxt.rate_limiter = self.limiter
+            account.jwxt.choose_start_time = t0
+            account.jwxt.events.start_run(t0)
+        try:
+            with sink.buffered():
+                await asyncio.gather(*(self._grab(a) for a in ready))
+        finally:
+            await get_transport().close_connector()
+        summary = sink.summary()
+        if summary:
+            ColorPrint.info(summary)
+        for account in ready:
+            ColorPrint.subheader(f"账号 {account.username}", style="bracket")
+            account.jwxt.events.print_summary()
+            account.jwxt.events.close()
+            if account.jwxt.journal:
+                account.jwxt.journal.close()
+
+    def run(self, t0=None):
+        t0 = self.wait_for_choose_time(t0)
+        ColorPrint.process(
+            f"开始为 {sum(1 for a in self.accounts if a.ready)} 个账号抢课，"
+            f"全局每秒最多 {self.rate:g} 个请求..."
+        )
+        asyncio.run(self._run(t0))
+
+    def show_status(self):
+        widths = [16, 10, 12, 10]
+        ColorPrint.table_header("账号", "已选上", "状态", "请求数", widths=widths)
+        for account in self.accounts:
+            ColorPrint.table_row(*account.status_row(), widths=widths)
+
+    def exit_code(self):
+        if not all(a.ready for a in self.accounts):
+            return 2
+        done = all(len(a.completed) == len(a.class_ids) for a in self.accounts)
+        return 0 if done else 1
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="教务系统多账号抢课")
+    parser.add_argument("config", help="JSON配置文件")
+    parser.add_argument("--dry-run", action="store_true", help="只做准备工作，不抢课")
+    parser.add_argument(
+        "--fresh", action="store_true", help="忽略断点日志里之前的结果，重新请求所有课程"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="cprofile",
+        help="剖析登录和抢课（cprofile 或 sample），也可设置 HITSZ_PROFILE",
+    )
+    args = parser.parse_args(argv)
+
+    import profiling
+
+    profiling.install(
+        [(HITSZJwxtMulti, "run"), (HITSZJwxtAuth, "login")], mode=args.profile
+    )
+
+    ColorPrint.header("哈尔滨工业大学（深圳）教务多账号抢课")
+    multi = HITSZJwxtMulti()
+    multi.fresh = args.fresh
+    try:
+        config = multi.load_config(args.config)
+    except PlanError as e:
+        ColorPrint.error(str(e))
+        return 2
+
+    if not multi.prepare():
+        ColorPrint.error("没有可用的账号")
+        return 2
+    if args.dry_run:
+        multi.show_status()
+        ColorPrint.success("准备完成（--dry-run，不抢课）")
+        return 0
+
+    try:
+        multi.run(resolve_start_time(config["start_time"]))
+    except KeyboardInterrupt:
+        ColorPrint.info("\n收到停止信号...")
+    multi.show_status()
+    return multi.exit_code()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,547 @@
+"""常驻的抢课任务服务
+
+通过本地 HTTP 接口提交抢课任务（计划格式同 jw_batch.py），任务和每门课的进度保存在
+SQLite 数据库里，服务重启后继续：已经选上的课不再请求，未到时间的任务重新排队。
+每个任务在开抢前 warmup 秒预热（校验会话、解析课程ID、预编码请求），同一时间段内
+学期参数相同的任务共用一次课程目录查询；到点后在全局并发上限和速率预算下抢课。
+
+    python jw_service.py --port 8765 --rate 3 --max-running 4
+
+所有接口都要带令牌。令牌取自环境变量 HITSZ_JW_SERVICE_TOKEN，没有设置时服务启动时生成，
+写到 hitsz_jw_service.token（权限 600，只有启动服务的用户能读）：
+
+    AUTH="Authorization: Bearer $(cat hitsz_jw_service.token)"
+    curl -H "$AUTH" -X POST http://127.0.0.1:8765/jobs -d @plan.json      # 提交，返回任务ID
+    curl -H "$AUTH" http://127.0.0.1:8765/jobs                             # 全部任务
+    curl -H "$AUTH" http://127.0.0.1:8765/jobs/1                           # 任务及每门课的进度
+    curl -H "$AUTH" -X DELETE http://127.0.0.1:8765/jobs/1                 # 取消
+
+start_time 可以是 "HH:MM"（当天）、"YYYY-MM-DD HH:MM" 或时间戳。
+接口里会提交账号密码，默认只监听本机，监听其他地址需要加 --allow-remote。
+数据库里保存了账号密码用于抢课期间重新登录，文件权限为 600，任务结束后清除密码。
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import secrets
+import sqlite3
+import ipaddress
+import asyncio
+import threading
+from datetime import datetime
+from color_print import ColorPrint
+from grab_events import EventLog
+from hitsz_auth import HITSZJwxtAuth
+from jw import HITSZJwxt
+from jw_batch import (
+    PlanError,
+    parse_plan,
+    parse_start_at,
+    prepare_session,
+    resolve_courses,
+)
+from jw_multi import FairRateLimiter, event_log_path, use_account_files
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    password TEXT,
+    plan TEXT NOT NULL,
+    start_at REAL NOT NULL,
+    state TEXT NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS courses (
+    job_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    class_id TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    message TEXT,
+    updated_at REAL,
+    PRIMARY KEY (job_id, position)
+);
+"""
+
+# 任务状态：pending 排队 → warming 预热 → ready 等待开抢 → running 抢课 → 结束状态
+FINISHED = ("done", "partial", "failed", "cancelled")
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def load_token(path, environ=None):
+    """接口令牌：优先用环境变量，否则读取或生成只有当前用户可读的令牌文件"""
+    environ = os.environ if environ is None else environ
+    token = environ.get("HITSZ_JW_SERVICE_TOKEN")
+    if token:
+        return token
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            token = f.read().strip()
+        if token:
+            return token
+    token = secrets.token_urlsafe(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    return token
+
+
+class JobStore:
+    """任务和课程进度的 SQLite 存储，只在事件循环线程里使用"""
+
+    def __init__(self, path="hitsz_jw_jobs.db"):
+        self.path = path
+        new_file = path != ":memory:" and not os.path.exists(path)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        if new_file:
+            # 库里有账号密码，只允许当前用户读写
+            os.chmod(path, 0o600)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def add_job(self, plan, start_at):
+        account = plan["account"]
+        now = time.time()
+        saved = {k: v for k, v in plan.items() if k != "account"}
+        saved["account"] = {k: v for k, v in account.items() if k != "password"}
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO jobs (username, password, plan, start_at, state, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, 'pending', ?, ?)",
+                (
+                    account["username"],
+                    account.get("password"),
+                    json.dumps(saved, ensure_ascii=False),
+                    start_at,
+                    now,
+                    now,
+                ),
+            )
+            job_id = cursor.lastrowid
+            self.db.executemany(
+                "INSERT INTO courses (job_id, position, name, class_id, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (job_id, position, course.get("name"), course.get("id"), now)
+                    for position, course in enumerate(plan["courses"])
+                ],
+            )
+        return job_id
+
+    def job(self, job_id):
+        row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def jobs(self, states=None):
+        if states:
+            marks = ",".join("?" * len(states))
+            rows = self.db.execute(
+                f"SELECT * FROM jobs WHERE state IN ({marks}) ORDER BY start_at, id", states
+            )
+        else:
+            rows = self.db.execute("SELECT * FROM jobs ORDER BY id")
+        return [dict(row) for row in rows]
+
+    def courses(self, job_id):
+        rows = self.db.execute(
+            "SELECT * FROM courses WHERE job_id = ? ORDER BY position", (job_id,)
+        )
+        return [dict(row) for row in rows]
+
+    def set_state(self, job_id, state, error=None):
+        with self.db:
+            self.db.execute(
+                "UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE id = ?",
+                (state, error, time.time(), job_id),
+            )
+            if state in FINISHED:
+                self.db.execute("UPDATE jobs SET password = NULL WHERE id = ?", (job_id,))
+
+    def set_class_ids(self, job_id, class_ids):
+        with self.db:
+            self.db.executemany(
+                "UPDATE courses SET class_id = ? WHERE job_id = ? AND position = ?",
+                [(class_id, job_id, position) for position, class_id in class_ids.items()],
+            )
+
+    def record_result(self, job_id, class_id, state, message):
+        """state 为抢课引擎判定的 "succeeded" / "failed"，还要重试时为 None"""
+        with self.db:
+            self.db.execute(
+                "UPDATE courses SET attempts = attempts + 1, message = ?, updated_at = ?,"
+                " state = COALESCE(?, state)"
+                " WHERE job_id = ? AND class_id = ?",
+                (message, time.time(), state, job_id, class_id),
+            )
+
+    def finish_courses(self, job_id):
+        """抢课结束时没选上的课标记为 failed"""
+        with self.db:
+            self.db.execute(
+                "UPDATE courses SET state = 'failed', updated_at = ?"
+                " WHERE job_id = ? AND state = 'pending'",
+                (time.time(), job_id),
+            )
+
+    def recover(self):
+        """上次退出时没结束的任务回到排队状态，返回数量"""
+        with self.db:
+            cursor = self.db.execute(
+                "UPDATE jobs SET state = 'pending', updated_at = ?"
+                " WHERE state IN ('warming', 'ready', 'running')",
+                (time.time(),),
+            )
+        return cursor.rowcount
+
+
+class CatalogCache:
+    """同一时间段内学期参数相同的任务共用一次课程目录查询"""
+
+    def __init__(self, ttl=600):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self._items = {}
+
+    def get(self, jwxt):
+        key = tuple(sorted(jwxt.term.items()))
+        # 持锁查询，同时预热的其他任务等这一次结果
+        with self.lock:
+            fetched_at, catalog = self._items.get(key, (0, None))
+            if catalog is None or time.time() - fetched_at > self.ttl:
+                catalog = jwxt.get_all_classes()
+                if catalog is None:
+                    raise PlanError("查询课程目录失败")
+                self._items[key] = (time.time(), catalog)
+            return catalog
+
+
+class HITSZJwService:
+    def __init__(
+        self,
+        store,
+        rate=3.0,
+        request_interval=1.4,
+        max_running=4,
+        warmup=300,
+        tick=1.0,
+        token=None,
+    ):
+        self.store = store
+        self.token = token or secrets.token_urlsafe(32)
+        self.request_interval = request_interval
+        self.max_running = max_running
+        self.warmup = warmup
+        self.tick = tick
+        self.limiter = FairRateLimiter(rate, request_interval)
+        self.catalogs = CatalogCache(ttl=max(warmup * 2, 600))
+        self._semaphore = None
+        self._tasks = {}
+        self._runner = None
+        self._scheduler = None
+        self._stopping = False
+        self.started_at = time.time()
+
+    # ---------- 任务执行 ----------
+    def _warm_up(self, job, rows):
+        """在线程里运行：登录或校验会话、解析课程ID、预编码选课请求"""
+        plan = json.loads(job["plan"])
+        account = plan["account"]
+        auth = use_account_files(
+            HITSZJwxtAuth(job["username"], job["password"]),
+            job["username"],
+            account.get("cookies_file"),
+        )
+        if not prepare_session(auth):
+            raise PlanError("登录失败")
+
+        jwxt = HITSZJwxt(auth)
+        jwxt.term = plan["term"]
+        # 单个账号的请求间隔按任务自己的计划，但不低于服务设定的下限
+        jwxt.request_interval = max(plan["request_interval"], self.request_interval)
+        jwxt.events = EventLog(event_log_path(job["username"]))
+        # 进度已经记在数据库里，不再写断点日志
+        jwxt.journal = None
+
+        # 已经选上的课（重启前的进度）不再请求
+        pending = [row for row in rows if row["state"] == "pending"]
+        catalog = None
+        if any(not row["class_id"] for row in pending):
+            catalog = self.catalogs.get(jwxt)
+        class_ids = {}
+        for row in pending:
+            course = {"id": row["class_id"], "name": row["name"]}
+            class_ids[row["position"]] = resolve_courses(jwxt, [course], catalog)[0]
+        jwxt.prepare_course_requests(list(dict.fromkeys(class_ids.values())))
+        return jwxt, class_ids
+
+    async def _run_job(self, job_id):
+        job = self.store.job(job_id)
+        try:
+            self.store.set_state(job_id, "warming")
+            wait = job["start_at"] - self.warmup - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            # 课程进度在事件循环线程里读好，预热线程不碰数据库
+            rows = self.store.courses(job_id)
+            jwxt, class_ids = await asyncio.to_thread(self._warm_up, job, rows)
+            self.store.set_class_ids(job_id, class_ids)
+            self.store.set_state(job_id, "ready")
+
+            wait = job["start_at"] - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            plan = json.loads(job["plan"])
+            async with self._semaphore:
+                grab_timeout = plan.get("grab_timeout")
+                if grab_timeout:
+                    # 时间窗口从原定开抢时间算起：排队等并发名额、重启后继续都只用剩下的
+                    grab_timeout = job["start_at"] + grab_timeout - time.time()
+                    if grab_timeout <= 0:
+                        self.store.finish_courses(job_id)
+                        self.store.set_state(job_id, "failed", "已超过抢课时间窗口")
+                        return
+
+                self.store.set_state(job_id, "running")
+                jwxt.rate_limiter = self.limiter
+                jwxt.grab_timeout = grab_timeout
+                jwxt.choose_start_time = job["start_at"]
+                jwxt.events.start_run(job["start_at"])
+                jwxt.on_result = lambda class_id, result, state: self.store.record_result(
+                    job_id, class_id, state, result.get("message")
+                )
+                ids = list(dict.fromkeys(class_ids.values()))
+                try:
+                    completed = await jwxt._async_auto_choose(ids)
+                finally:
+                    jwxt.events.close()
+
+            self.store.finish_courses(job_id)
+            state = "done" if len(completed) == len(ids) else "partial"
+            self.store.set_state(job_id, state)
+            ColorPrint.success(f"任务 {job_id} 结束: 选上 {len(completed)}/{len(ids)}")
+        except asyncio.CancelledError:
+            # 服务停止时保留原状态，下次启动由 recover() 放回队列
+            if not self._stopping:
+                self.store.set_state(job_id, "cancelled")
+            raise
+        except Exception as e:
+            self.store.finish_courses(job_id)
+            self.store.set_state(job_id, "failed", str(e))
+            ColorPrint.error(f"任务 {job_id} 失败: {e}")
+        finally:
+            self._tasks.pop(job_id, None)
+
+    async def _schedule(self):
+        """定期把排队中的任务交给 _run_job，提前 warmup 秒开始预热"""
+        while True:
+            horizon = time.time() + self.warmup + self.tick
+            for job in self.store.jobs(states=("pending",)):
+                if job["start_at"] <= horizon and job["id"] not in self._tasks:
+                    self._tasks[job["id"]] = asyncio.create_task(self._run_job(job["id"]))
+            await asyncio.sleep(self.tick)
+
+    # ---------- 提交和查询 ----------
+    def submit(self, data):
+        if not isinstance(data, dict):
+            raise PlanError("计划必须是 JSON 对象")
+        data = dict(data)
+        start_at = parse_start_at(data.pop("start_time", None))
+        # 服务进程的环境变量不给任务兜底密码
+        plan = parse_plan(data, environ={})
+        return self.store.add_job(plan, start_at)
+
+    def describe(self, job, with_courses=False):
+        item = {
+            "id": job["id"],
+            "username": job["username"],
+            "state": job["state"],
+            "start_at": datetime.fromtimestamp(job["start_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+            "error": job["error"],
+        }
+        courses = self.store.courses(job["id"])
+        item["succeeded"] = sum(1 for c in courses if c["state"] == "succeeded")
+        item["total"] = len(courses)
+        if with_courses:
+            item["courses"] = [
+                {k: c[k] for k in ("name", "class_id", "state", "attempts", "message")}
+                for c in courses
+            ]
+        return item
+
+    def cancel(self, job_id):
+        job = self.store.job(job_id)
+        if job is None or job["state"] in FINISHED:
+            return False
+        task = self._tasks.get(job_id)
+        if task:
+            task.cancel()
+        else:
+            self.store.set_state(job_id, "cancelled")
+        return True
+
+    def make_app(self):
+        from aiohttp import web
+
+        def reply(data, status=200):
+            return web.json_response(
+                data, status=status, dumps=lambda d: json.dumps(d, ensure_ascii=False)
+            )
+
+        async def create_job(request):
+            try:
+                job_id = self.submit(await request.json())
+            except ValueError as e:
+                # PlanError 和 JSON 解析错误
+                return reply({"error": str(e)}, 400)
+            ColorPrint.info(f"收到任务 {job_id}")
+            return reply(self.describe(self.store.job(job_id)), 201)
+
+        async def list_jobs(request):
+            return reply([self.describe(job) for job in self.store.jobs()])
+
+        async def get_job(request):
+            job = self.store.job(int(request.match_info["job_id"]))
+            if job is None:
+                return reply({"error": "任务不存在"}, 404)
+            return reply(self.describe(job, with_courses=True))
+
+        async def delete_job(request):
+            job_id = int(request.match_info["job_id"])
+            if not self.cancel(job_id):
+                return reply({"error": "任务不存在或已结束"}, 409)
+            return reply({"id": job_id, "cancelled": True})
+
+        async def status(request):
+            counts = {}
+            for job in self.store.jobs():
+                counts[job["state"]] = counts.get(job["state"], 0) + 1
+            return reply(
+                {
+                    "uptime_s": round(time.time() - self.started_at),
+                    "jobs": counts,
+                    "active": len(self._tasks),
+                    "max_running": self.max_running,
+                    "rate": 1 / self.limiter.interval,
+                }
+            )
+
+        @web.middleware
+        async def check_token(request, handler):
+            header = request.headers.get("Authorization", "")
+            supplied = header[len("Bearer ") :] if header.startswith("Bearer ") else ""
+            if not hmac.compare_digest(supplied.encode(), self.token.encode()):
+                return reply({"error": "缺少或错误的令牌"}, 401)
+            return await handler(request)
+
+        app = web.Application(middlewares=[check_token])
+        app.router.add_get("/", status)
+        app.router.add_get("/jobs", list_jobs)
+        app.router.add_post("/jobs", create_job)
+        app.router.add_get(r"/jobs/{job_id:\d+}", get_job)
+        app.router.add_delete(r"/jobs/{job_id:\d+}", delete_job)
+        return app
+
+    # ---------- 运行 ----------
+    async def start(self, host="127.0.0.1", port=8765):
+        from aiohttp import web
+
+        self._semaphore = asyncio.Semaphore(self.max_running)
+        recovered = self.store.recover()
+        if recovered:
+            ColorPrint.info(f"恢复 {recovered} 个未完成的任务")
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self._scheduler = asyncio.create_task(self._schedule())
+        ColorPrint.success(f"抢课任务服务已启动: http://{host}:{port}/")
+
+    async def stop(self):
+        from http_transport import get_transport
+
+        self._stopping = True
+        self._scheduler.cancel()
+        # 正在进行的任务直接中断，状态留在数据库里，下次启动时恢复
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._runner.cleanup()
+        await get_transport().close_connector()
+
+    async def serve_forever(self, host="127.0.0.1", port=8765):
+        await self.start(host, port)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="常驻抢课任务服务")
+    parser.add_argument("--db", default="hitsz_jw_jobs.db", help="SQLite 数据库文件")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--allow-remote", action="store_true", help="允许监听本机以外的地址"
+    )
+    parser.add_argument(
+        "--token-file", default="hitsz_jw_service.token", help="接口令牌文件"
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=3.0, help="全部任务合计每秒最多请求数")
+    parser.add_argument("--request-interval", type=float, default=1.4, help="单个账号请求间隔下限")
+    parser.add_argument("--max-running", type=int, default=4, help="同时抢课的任务数上限")
+    parser.add_argument("--warmup", type=float, default=300, help="提前多少秒预热")
+    args = parser.parse_args(argv)
+
+    if not is_loopback(args.host) and not args.allow_remote:
+        ColorPrint.error(
+            f"{args.host} 不是本机地址，接口会收到账号密码，确认需要时加 --allow-remote"
+        )
+        return 2
+
+    ColorPrint.header("哈尔滨工业大学（深圳）教务抢课任务服务")
+    if not is_loopback(args.host):
+        ColorPrint.warning(f"服务监听 {args.host}，其他机器也能访问，请妥善保管令牌")
+    service = HITSZJwService(
+        JobStore(args.db),
+        rate=args.rate,
+        request_interval=args.request_interval,
+        max_running=args.max_running,
+        warmup=args.warmup,
+        token=load_token(args.token_file),
+    )
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        ColorPrint.info("\n服务已停止，未完成的任务下次启动时继续")
+    finally:
+        service.store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 当前线程正在计时的阶段，http_transport 在同一个线程上记录连接耗时
+_local = threading.local()
+
+
+def current_phase():
+    return getattr(_local, "phase", None)
+
+
+def percentile(sorted_values, q):
+    """线性插值的百分位数，sorted_values 必须已排序"""
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (pos - low)
+
+
+class LatencyRecorder:
+    """按阶段记录耗时，只保留最近 capacity 条"""
+
+    def __init__(self, capacity=1024):
+        self.samples = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+
+    def record(self, phase, seconds):
+        with self.lock:
+            self.samples.append((phase, seconds, time.time()))
+
+    @contextmanager
+    def span(self, phase):
+        """计时一个阶段；阶段内发出的请求会记成 phase.dns / phase.connect / phase.tls / phase.ttfb"""
+        parent = current_phase()
+        _local.phase = f"{parent}.{phase}" if parent else phase
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(_local.phase, time.perf_counter() - start)
+            _local.phase = parent
+
+    def phases(self):
+        with self.lock:
+            return sorted({phase for phase, _, _ in self.samples})
+
+    def percentiles(self, phase=None, qs=(50, 90, 99), since=None):
+        """返回 {阶段: {count, p50, p90, p99, max}}，单位秒"""
+        with self.lock:
+            samples = list(self.samples)
+        grouped = {}
+        for name, seconds, at in samples:
+            if phase and name != phase:
+                continue
+            if since and at < since:
+                continue
+            grouped.setdefault(name, []).append(seconds)
+
+        stats = {}
+        for name, values in grouped.items():
+            values.sort()
+            item = {"count": len(values), "max": values[-1]}
+            for q in qs:
+                item[f"p{q}"] = percentile(values, q)
+            stats[name] = item
+        return stats
+
+    def dump(self, path):
+        """把原始样本和百分位写成 JSON，先写临时文件再替换"""
+        with self.lock:
+            samples = [
+                {"phase": phase, "seconds": seconds, "at": at}
+                for phase, seconds, at in self.samples
+            ]
+        data = {"stats": self.percentiles(), "samples": samples}
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, path)
+
+    def format_table(self, qs=(50, 90, 99)):
+        stats = self.percentiles(qs=qs)
+        header = f"{'阶段':<32}{'次数':>6}" + "".join(f"{'p' + str(q):>10}" for q in qs)
+        lines = [header]
+        for name in sorted(stats):
+            item = stats[name]
+            row = f"{name:<32}{item['count']:>6}"
+            row += "".join(f"{item[f'p{q}'] * 1000:>8.1f}ms" for q in qs)
+            lines.append(row)
+        return "\n".join(lines)
+
+
+# 未单独指定时所有认证对象共用这一个
+default_recorder = LatencyRecorder()
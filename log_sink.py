@@ -0,0 +1,157 @@
+import os
+import re
+import sys
+import queue
+import threading
+from contextlib import contextmanager
+
+LEVELS = {
+    "debug": 10,
+    "info": 20,
+    "process": 20,
+    "success": 25,
+    "warning": 30,
+    "error": 40,
+}
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+
+class LogSink:
+    """ColorPrint 的输出后端
+
+    - 级别过滤在拼接字符串之前完成，被过滤的消息不产生任何开销；
+    - buffered() 期间消息只进有界队列，由写线程批量写出，队列满时丢弃并计数；
+    - 输出不是终端时去掉 ANSI 颜色码；
+    - quiet 模式只显示成功、警告和错误，结束时用 summary() 汇总被省略的条数。
+    """
+
+    def __init__(self, level="info", quiet=False, maxsize=10000):
+        self.quiet = quiet
+        self.threshold = LEVELS.get(level, LEVELS["info"])
+        if quiet:
+            self.threshold = max(self.threshold, LEVELS["success"])
+        self.maxsize = maxsize
+        self.suppressed = {}
+        self.dropped = 0
+        self._queue = None
+        self._writer = None
+        # 保护 _queue 的切换，避免 stop_buffering 之后还有消息放进已经停止的队列
+        self._lock = threading.Lock()
+        self._tty = {}
+
+    @classmethod
+    def from_env(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        quiet = environ.get("HITSZ_LOG_QUIET", "").lower() in ("1", "true", "yes")
+        return cls(level=environ.get("HITSZ_LOG_LEVEL", "info").lower(), quiet=quiet)
+
+    def enabled(self, level):
+        if LEVELS.get(level, 0) >= self.threshold:
+            return True
+        self.suppressed[level] = self.suppressed.get(level, 0) + 1
+        return False
+
+    def set_level(self, level):
+        self.threshold = LEVELS.get(level, self.threshold)
+
+    # ---------- 写出 ----------
+    def _resolve(self, stream):
+        return sys.stderr if stream == "stderr" else sys.stdout
+
+    def _is_tty(self, stream):
+        key = id(stream)
+        if key not in self._tty:
+            try:
+                self._tty[key] = stream.isatty()
+            except (AttributeError, ValueError):
+                self._tty[key] = False
+        return self._tty[key]
+
+    def _write_now(self, message, end, stream):
+        out = self._resolve(stream)
+        if not self._is_tty(out):
+            message = ANSI_RE.sub("", message)
+        out.write(message + end)
+
+    def write(self, message, end="\n", stream="stdout"):
+        with self._lock:
+            pending = self._queue
+            if pending is not None:
+                try:
+                    # put_nowait 不会阻塞，持锁时间很短
+                    pending.put_nowait((message, end, stream))
+                except queue.Full:
+                    # 宁可丢日志也不能让抢课请求等终端
+                    self.dropped += 1
+                return
+        self._write_now(message, end, stream)
+        self._resolve(stream).flush()
+
+    def _drain(self, pending):
+        running = True
+        while running:
+            # 一次取完队列里已有的消息再 flush，减少系统调用
+            batch = [pending.get()]
+            try:
+                while True:
+                    batch.append(pending.get_nowait())
+            except queue.Empty:
+                pass
+            streams = set()
+            for item in batch:
+                if item is None:
+                    running = False
+                    continue
+                message, end, stream = item
+                self._write_now(message, end, stream)
+                streams.add(stream)
+            for stream in streams:
+                self._resolve(stream).flush()
+
+    # ---------- 缓冲 ----------
+    def start_buffering(self):
+        with self._lock:
+            if self._queue is not None:
+                return
+            pending = queue.Queue(self.maxsize)
+            self._writer = threading.Thread(target=self._drain, args=(pending,), daemon=True)
+            self._writer.start()
+            self._queue = pending
+
+    def stop_buffering(self):
+        with self._lock:
+            pending, writer = self._queue, self._writer
+            if pending is None:
+                return
+            # 写线程把剩下的消息写完后退出；期间其他线程的消息等在锁上，输出顺序不乱
+            pending.put(None)
+            writer.join()
+            self._queue = None
+            self._writer = None
+        if self.dropped:
+            self._write_now(f"⚠️  输出过快，丢弃了 {self.dropped} 条日志", "\n", "stderr")
+            self.dropped = 0
+
+    @contextmanager
+    def buffered(self):
+        """热循环里使用：消息交给写线程输出，调用方不等待终端"""
+        already = self._queue is not None
+        self.start_buffering()
+        try:
+            yield self
+        finally:
+            if not already:
+                self.stop_buffering()
+
+    def summary(self, reset=True):
+        """quiet 或提高级别后被省略的消息条数，没有省略时返回空字符串"""
+        if not self.suppressed:
+            return ""
+        text = "、".join(f"{level} {count} 条" for level, count in self.suppressed.items())
+        if reset:
+            self.suppressed = {}
+        return f"已省略日志: {text}"
+
+
+sink = LogSink.from_env()
@@ -0,0 +1,360 @@
+"""校园网无人值守守护进程
+
+面向路由器、开发板这类常开的小机器：只依赖标准库和 srun_crypto，
+不导入 requests / schedule / colorama，用一条长连接访问认证门户，
+两次检查之间只在一个 Event 上阻塞等待，不做轮询。
+
+配置来自 JSON 文件（--config）或环境变量，环境变量优先：
+    HITSZ_NET_USERNAME / HITSZ_NET_PASSWORD  账号密码（必填）
+    HITSZ_NET_IP                            本机IP，留空自动获取
+    HITSZ_NET_PORTAL                        门户地址，默认 https://net.hitsz.edu.cn
+    HITSZ_NET_INTERVAL                      检查间隔秒数，默认 300
+    HITSZ_NET_REPORT_INTERVAL               资源占用报告间隔秒数，默认 3600，0 关闭
+    HITSZ_PROFILE                           设置后剖析每轮检查，见 profiling.py
+"""
+
+import os
+import sys
+import time
+import json
+import signal
+import threading
+
+UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+DEFAULT_CONFIG = {
+    "username": None,
+    "password": None,
+    "ip": None,
+    "portal": "https://net.hitsz.edu.cn",
+    "interval": 300,
+    "max_attempts": 3,
+    "retry_wait": 30,
+    "timeout": 10,
+    "ac_id": "1",
+    "relogin_margin": 300,
+    "report_interval": 3600,
+}
+
+INT_KEYS = ("interval", "max_attempts", "retry_wait", "timeout", "relogin_margin", "report_interval")
+
+
+def log(message):
+    sys.stdout.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}\n")
+    sys.stdout.flush()
+
+
+def load_config(path=None, environ=None):
+    environ = os.environ if environ is None else environ
+    config = dict(DEFAULT_CONFIG)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("配置文件必须是 JSON 对象")
+        # null 表示使用默认值
+        config.update((key, value) for key, value in data.items() if value is not None)
+    for key in DEFAULT_CONFIG:
+        value = environ.get(f"HITSZ_NET_{key.upper()}")
+        if value:
+            config[key] = value
+    for key in INT_KEYS:
+        try:
+            config[key] = int(config[key])
+        except (TypeError, ValueError):
+            raise ValueError(f"{key} 必须是整数: {config[key]!r}")
+    return config
+
+
+def get_local_ip():
+    import socket
+
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except OSError:
+        return None
+
+
+def resource_usage():
+    """当前RSS、峰值RSS（KB）和累计CPU秒数"""
+    rss = None
+    try:
+        with open("/proc/self/statm", "r") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    peak = None
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            peak //= 1024
+    except ImportError:
+        pass
+    return rss, peak, time.process_time()
+
+
+class PortalClient:
+    """到认证门户的单条 keep-alive 连接，断开后自动重建"""
+
+    def __init__(self, base_url, timeout=10):
+        from urllib.parse import urlsplit
+
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            import http.client
+
+            if self.scheme == "https":
+                self._conn = http.client.HTTPSConnection(
+                    self.host, self.port, timeout=self.timeout
+                )
+            else:
+                self._conn = http.client.HTTPConnection(
+                    self.host, self.port, timeout=self.timeout
+                )
+        return self._conn
+
+    def get(self, path):
+        import http.client
+
+        # 服务端可能已关闭空闲连接，失败时重建连接再试一次
+        for attempt in range(2):
+            conn = self._connect()
+            try:
+                conn.request("GET", path, headers={"User-Agent": UA})
+                response = conn.getresponse()
+                body = response.read()
+                if response.will_close:
+                    self.close()
+                return response.status, body.decode("utf-8", "replace")
+            except (OSError, http.client.HTTPException):
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class NetDaemon:
+    def __init__(self, config):
+        self.config = config
+        self.callback = "jQueryCallback"
+        self.ip = config.get("ip")
+        self.client = PortalClient(config["portal"], config["timeout"])
+        self.stop_event = threading.Event()
+        self.started = time.time()
+        self.wakeups = 0
+        self.logins = 0
+        self.last_report = self.started
+
+    def _jsonp(self, text):
+        return json.loads(text[len(self.callback) + 1 : -1])
+
+    def _query(self, path, params):
+        from urllib.parse import urlencode
+
+        status, text = self.client.get(f"{path}?{urlencode(params)}")
+        if status != 200:
+            raise OSError(f"HTTP {status}")
+        return self._jsonp(text)
+
+    def online_info(self):
+        result = self._query(
+            "/cgi-bin/rad_user_info",
+            {"callback": self.callback, "ip": self.ip or "", "_": int(time.time() * 1000)},
+        )
+        return result if result.get("error") == "ok" else None
+
+    def _login_params(self):
+        import srun_crypto
+
+        username = self.config["username"]
+        challenge = self._query(
+            "/cgi-bin/get_challenge",
+            {"callback": self.callback, "username": username, "ip": self.ip},
+        )["challenge"]
+        return srun_crypto.login_query(
+            username,
+            self.config["password"],
+            self.ip,
+            challenge,
+            self.callback,
+            ac_id=self.config["ac_id"],
+            os_name="Linux",
+            timestamp_ms=int(time.time() * 1000),
+        )
+
+    def _submit_login(self, params):
+        result = self._query("/cgi-bin/srun_portal", params)
+        if result.get("res") == "ok":
+            self.logins += 1
+            return True
+        log(f"登录失败: {result.get('error', '未知错误')}")
+        return False
+
+    def login(self):
+        if not self.ip:
+            # 没有IP时门户会把 "None" 当成地址，登录不可能成功
+            log("无法获取本机IP，跳过登录，可以设置 HITSZ_NET_IP")
+            return False
+        return self._submit_login(self._login_params())
+
+    def logout(self):
+        result = self._query(
+            "/cgi-bin/srun_portal",
+            {
+                "callback": self.callback,
+                "action": "logout",
+                "username": self.config["username"],
+                "ip": self.ip,
+                "ac_id": self.config["ac_id"],
+                "_": int(time.time() * 1000),
+            },
+        )
+        return result.get("res") == "ok"
+
+    def relogin(self):
+        """在线时续期：门户不会给已在线的IP重新登录，先取好 challenge 和登录参数，
+        再注销并立即登录，把断网时间压到一次请求"""
+        if not self.ip:
+            log("无法获取本机IP，跳过登录，可以设置 HITSZ_NET_IP")
+            return False
+        params = self._login_params()
+        self.logout()
+        if self._submit_login(params):
+            return True
+        # 旧 challenge 可能随注销失效，重新走一次完整流程
+        return self.login()
+
+    def check(self):
+        if not self.config.get("ip"):
+            self.ip = get_local_ip() or self.ip
+        try:
+            info = self.online_info()
+        except Exception as e:
+            log(f"查询在线状态失败: {e}")
+            info = None
+
+        if info:
+            remain = int(info.get("remain_seconds") or 0)
+            if not remain or remain > self.config["relogin_margin"]:
+                return True
+            log(f"会话剩余 {remain} 秒，提前重新登录")
+            try:
+                if self.relogin():
+                    log(f"续期成功 ({self.ip})")
+                    return True
+            except Exception as e:
+                log(f"续期异常: {e}")
+            # 续期失败时已经不在线，按离线处理
+        else:
+            log("检测到离线，开始重新登录")
+
+        if not self.ip:
+            log("无法获取本机IP，跳过登录，可以设置 HITSZ_NET_IP")
+            return False
+        attempts = self.config["max_attempts"]
+        for attempt in range(1, attempts + 1):
+            try:
+                if self.login():
+                    log(f"第 {attempt} 次登录成功 ({self.ip})")
+                    return True
+            except Exception as e:
+                log(f"第 {attempt} 次登录异常: {e}")
+            if attempt < attempts and self.stop_event.wait(self.config["retry_wait"]):
+                break
+        log(f"{attempts} 次登录均失败，等待下次检查")
+        return False
+
+    def report(self):
+        rss, peak, cpu = resource_usage()
+        uptime = max(time.time() - self.started, 1e-6)
+        log(
+            f"资源占用: rss={rss}KB peak={peak}KB cpu={cpu:.2f}s "
+            f"wakeups={self.wakeups} ({self.wakeups * 3600 / uptime:.1f}/h) logins={self.logins}"
+        )
+        self.last_report = time.time()
+
+    def stop(self, *_):
+        self.stop_event.set()
+
+    def run(self, duration=None):
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                signal.signal(sig, self.stop)
+            except ValueError:
+                pass  # 非主线程
+
+        log(f"守护进程启动，账号 {self.config['username']}，每 {self.config['interval']} 秒检查一次")
+        deadline = self.started + duration if duration else None
+        report_interval = self.config["report_interval"]
+        while not self.stop_event.is_set():
+            self.wakeups += 1
+            self.check()
+            now = time.time()
+            if report_interval and now - self.last_report >= report_interval:
+                self.report()
+            wait = self.config["interval"]
+            if deadline is not None:
+                if now >= deadline:
+                    break
+                wait = min(wait, deadline - now)
+            self.stop_event.wait(wait)
+
+        self.client.close()
+        self.report()
+        log("守护进程已退出")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="校园网无人值守守护进程")
+    parser.add_argument("--config", help="JSON配置文件")
+    parser.add_argument("--once", action="store_true", help="只检查一次后退出")
+    parser.add_argument("--measure", type=float, help="运行指定秒数后输出资源占用并退出")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="cprofile",
+        help="剖析每轮检查（cprofile 或 sample），也可设置 HITSZ_PROFILE",
+    )
+    args = parser.parse_args(argv)
+
+    import profiling
+
+    profiling.install([(NetDaemon, "check")], mode=args.profile, log=log)
+
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        log(f"读取配置失败: {e}")
+        return 2
+    if not config["username"] or not config["password"]:
+        log("缺少账号或密码，请设置 HITSZ_NET_USERNAME / HITSZ_NET_PASSWORD 或使用 --config")
+        return 2
+
+    daemon = NetDaemon(config)
+    if args.once:
+        ok = daemon.check()
+        daemon.client.close()
+        return 0 if ok else 1
+    daemon.run(duration=args.measure)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
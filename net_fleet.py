@@ -0,0 +1,215 @@
+import sys
+import json
+import time
+import asyncio
+from datetime import datetime
+from color_print import ColorPrint
+from http_transport import get_transport
+from net_login_async import AsyncHITSZNetAuth
+
+
+class FleetTarget:
+    """一台需要保持在线的主机（账号 + IP）"""
+
+    def __init__(self, username, password, ip, name=None):
+        self.username = username
+        self.password = password
+        self.ip = ip
+        self.name = name or ip
+        self.online = None
+        self.last_check = None
+        self.last_login = None
+        self.login_count = 0
+        self.fail_count = 0
+
+    def status_row(self):
+        if self.online is None:
+            state = "未知"
+        else:
+            state = "在线" if self.online else "离线"
+        last_check = (
+            datetime.fromtimestamp(self.last_check).strftime("%H:%M:%S")
+            if self.last_check
+            else "-"
+        )
+        return (self.name, self.username, self.ip, state, self.login_count, last_check)
+
+
+class AccountRateLimiter:
+    """按账号限制登录频率：同一账号两次登录之间至少间隔 min_interval 秒"""
+
+    def __init__(self, min_interval=10):
+        self.min_interval = min_interval
+        self._locks = {}
+        self._last = {}
+
+    async def acquire(self, account):
+        lock = self._locks.setdefault(account, asyncio.Lock())
+        async with lock:
+            wait = self._last.get(account, 0) + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last[account] = time.monotonic()
+
+
+class HITSZNetFleet:
+    """在一个事件循环里并发探测多台主机，只为掉线的主机重新登录"""
+
+    def __init__(self, max_concurrency=8, account_interval=10):
+        self.targets = []
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = AccountRateLimiter(account_interval)
+        # 所有目标共用一个 aiohttp 连接池，在事件循环内创建
+        self.session = None
+        self._auths = {}
+
+    def add_target(self, username, password, ip, name=None):
+        target = FleetTarget(username, password, ip, name)
+        self.targets.append(target)
+        return target
+
+    def load_targets(self, config_file):
+        with open(config_file, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        accounts = config.get("accounts", {})
+        for item in config.get("targets", []):
+            username = item["username"]
+            password = item.get("password") or accounts.get(username)
+            if not password:
+                ColorPrint.warning(f"目标 {item.get('ip')} 缺少账号 {username} 的密码，跳过")
+                continue
+            self.add_target(username, password, item["ip"], item.get("name"))
+
+        self.max_concurrency = config.get("max_concurrency", self.max_concurrency)
+        self.rate_limiter.min_interval = config.get(
+            "account_interval", self.rate_limiter.min_interval
+        )
+        ColorPrint.success(f"已加载 {len(self.targets)} 个目标")
+        return config
+
+    def _ensure_session(self):
+        # 用传输层共用的连接器，并发数由 check_once 的信号量控制
+        if self.session is None or self.session.closed:
+            self.session = get_transport().aiohttp_session()
+        return self.session
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+            await get_transport().close_connector()
+
+    def _get_auth(self, target):
+        auth = self._auths.get(id(target))
+        if auth is None:
+            auth = AsyncHITSZNetAuth(
+                target.username, target.password, session=self._ensure_session()
+            )
+            auth.long_term_mode = True  # 静默模式，由管理器统一输出
+            auth.ip = target.ip
+            self._auths[id(target)] = auth
+        return auth
+
+    async def probe(self, target, semaphore):
+        auth = self._get_auth(target)
+        async with semaphore:
+            info = await auth.get_online_info(target.ip)
+        target.online = info is not None
+        target.last_check = time.time()
+        return target.online
+
+    async def relogin(self, target, semaphore):
+        await self.rate_limiter.acquire(target.username)
+        auth = self._get_auth(target)
+        async with semaphore:
+            ok = await auth.login()
+        target.last_login = time.time()
+        if ok:
+            target.login_count += 1
+            target.online = True
+            ColorPrint.success(f"[{target.name}] 重新登录成功")
+        else:
+            target.fail_count += 1
+            ColorPrint.error(f"[{target.name}] 重新登录失败")
+        return ok
+
+    async def check_once(self):
+        self._ensure_session()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self.probe(t, semaphore) for t in self.targets), return_exceptions=True
+        )
+        dropped = [t for t, online in zip(self.targets, results) if online is not True]
+        if not dropped:
+            ColorPrint.success(f"全部 {len(self.targets)} 个目标在线")
+            return 0
+
+        ColorPrint.warning(f"{len(dropped)}/{len(self.targets)} 个目标离线，开始重新登录")
+        await asyncio.gather(
+            *(self.relogin(t, semaphore) for t in dropped), return_exceptions=True
+        )
+        return len(dropped)
+
+    async def run_forever(self, check_interval=300):
+        ColorPrint.success(
+            f"启动批量保活服务，共 {len(self.targets)} 个目标，每 {check_interval} 秒检查一次"
+        )
+        try:
+            while True:
+                ColorPrint.subheader(
+                    f"批量检查 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+                    style="bracket",
+                )
+                try:
+                    await self.check_once()
+                except Exception as e:
+                    ColorPrint.error(f"批量检查异常: {e}")
+                await asyncio.sleep(check_interval)
+        finally:
+            await self.close()
+
+    async def run_once(self):
+        try:
+            return await self.check_once()
+        finally:
+            await self.close()
+
+    def show_status(self):
+        widths = [16, 14, 16, 8, 8, 10]
+        ColorPrint.table_header("名称", "账号", "IP", "状态", "登录次数", "上次检查", widths=widths)
+        for target in self.targets:
+            ColorPrint.table_row(*target.status_row(), widths=widths)
+
+
+def main():
+    ColorPrint.header("SRUN校园网批量保活工具")
+
+    if len(sys.argv) < 2:
+        ColorPrint.info("用法: python net_fleet.py <fleet.json> [--once]")
+        return
+
+    fleet = HITSZNetFleet()
+    try:
+        config = fleet.load_targets(sys.argv[1])
+    except Exception as e:
+        ColorPrint.error(f"加载配置失败: {e}")
+        return
+
+    if not fleet.targets:
+        ColorPrint.error("没有可用的目标")
+        return
+
+    try:
+        if "--once" in sys.argv:
+            asyncio.run(fleet.run_once())
+            fleet.show_status()
+        else:
+            asyncio.run(fleet.run_forever(config.get("check_interval", 300)))
+    except KeyboardInterrupt:
+        ColorPrint.info("\n收到停止信号...")
+        fleet.show_status()
+        ColorPrint.info("拜拜喵！")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,16 @@
 import time
 import json
-import hashlib
-import hmac
-import base64
-import math
 import socket
+import sys
 import threading
 import schedule
 from typing import Union
 from urllib.parse import urlencode
 from datetime import datetime
 from color_print import ColorPrint
-import requests
+import srun_crypto
+import profiling
+from http_transport import get_transport
 import platform
 
 
@@ -21,7 +20,8 @@ class HITSZNetAuth:
         self.password = password
         self.ip = None
         self.cookies_file = "hitsz_net_cookies.json"
-        self.session = requests.Session()
+        # srun_portal 的登录/注销都是 GET，不能在 502/503/504 时自动重发
+        self.session = get_transport().session(retry_status=False)
         # SRUN认证参数
         self.base_url = "https://net.hitsz.edu.cn"
         self.callback = "jQueryCallback"
@@ -31,6 +31,11 @@ class HITSZNetAuth:
         self.N = "200"
         self.ENC = "srun_bx1"
         self.ACID = "1"
+        # 联网探测地址
+        self.probe_urls = ["https://www.baidu.com"]
+        # 重连节奏（秒）
+        self.settle_wait = 3  # 登录后等待网络生效
+        self.retry_wait = 30  # 两次重连尝试之间的间隔
 
         # 长期使用相关
         self.long_term_mode = False
@@ -38,6 +43,15 @@ class HITSZNetAuth:
         self.is_running = False
         self.auto_approve_ip = False  # 长期模式下自动同意IP
 
+        # 在线会话信息（rad_user_info）缓存与主动续期
+        self.online_info = None
+        self.online_info_time = None
+        self.session_max_seconds = None  # 门户强制下线时长，未知时只依赖remain_seconds
+        self.relogin_margin = 300  # 预计下线前多少秒开始主动续期
+        self.proactive_check_minutes = 5
+        self.quiet_bytes_per_second = 50 * 1024  # 低于该速率视为网络空闲
+        self._net_sample = None
+
     def get_local_ip(self):
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
@@ -136,12 +150,10 @@ class HITSZNetAuth:
             return False
 
     def hmd5(self, msg: str, key: str) -> str:
-        msg = msg.encode()
-        key = key.encode()
-        return hmac.new(key, msg, hashlib.md5).hexdigest()
+        return srun_crypto.hmd5(msg, key)
 
     def sha1(self, msg: str) -> str:
-        return hashlib.sha1(msg.encode()).hexdigest()
+        return srun_crypto.sha1(msg)
 
     def chkstr(
         self,
@@ -154,107 +166,43 @@ class HITSZNetAuth:
         type_: str,
         info: str,
     ) -> str:
-        result = token + username
-        result += token + hmd5
-        result += token + ac_id
-        result += token + ip
-        result += token + n
-        result += token + type_
-        result += token + info
-        return result
+        return srun_crypto.chkstr(token, username, hmd5, ac_id, ip, n, type_, info)
 
     def trans_b64encode(self, s: str, alpha: Union[str, None] = None) -> str:
-        result = base64.b64encode(s.encode(encoding="latin-1")).decode()
-        if not alpha:
-            return result
-        assert len(alpha) == 64, "base64字母表的长度必须为64"
-        table = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
-        trans_table = str.maketrans(table, alpha)
-        return result.translate(trans_table)
-
-    class String(str):
-        def charCodeAt(self, i: int) -> int:
-            if len(self) > i:
-                return ord(self[i])
-            return 0
-
-        @classmethod
-        def fromCharCode(cls, *charCodes: list[int]) -> str:
-            result = ""
-            for c in charCodes:
-                result += chr(c)
-            return result
-
-    def s(self, a, b: bool) -> list[int]:
-        c = len(a)
-        v = []
-        for i in range(0, c, 4):
-            v.append(
-                a.charCodeAt(i)
-                | a.charCodeAt(i + 1) << 8
-                | a.charCodeAt(i + 2) << 16
-                | a.charCodeAt(i + 3) << 24
-            )
-        if b:
-            v.append(c)
-        return v
-
-    def l(self, a: list[int], b: bool):
-        d = len(a)
-        c = (d - 1) << 2
-        if b:
-            m = a[d - 1]
-            if m < c - 3 or m > c:
-                return None
-            c = m
-        for i in range(0, d):
-            a[i] = self.String.fromCharCode(
-                a[i] & 0xFF, a[i] >> 8 & 0xFF, a[i] >> 16 & 0xFF, a[i] >> 24 & 0xFF
-            )
-        return "".join(a)[0:c] if b else "".join(a)
+        return srun_crypto.trans_b64encode(s, alpha)
 
     def xxtea(self, str_: str, key: str) -> str:
-        str_, key = self.String(str_), self.String(key)
-
-        if str_ == "":
-            return ""
-        v = self.s(str_, True)
-        k = self.s(key, False)
-        if len(k) < 4:
-            k = k + [0] * (4 - len(k))
-        n = len(v) - 1
-        z = v[n]
-        y = v[0]
-        c = 0x86014019 | 0x183639A0
-        m = 0
-        e = 0
-        p = 0
-        q = math.floor(6 + 52 / (n + 1))
-        d = 0
-        while 0 < q:
-            d = d + c & (0x8CE0D9BF | 0x731F2640)
-            e = d >> 2 & 3
-            p = 0
-            while p < n:
-                y = v[p + 1]
-                m = z >> 5 ^ y << 2
-                m += y >> 3 ^ z << 4 ^ (d ^ y)
-                m += k[p & 3 ^ e] ^ z
-                z = v[p] = v[p] + m & (0xEFB8D130 | 0x10472ECF)
-                p += 1
-            y = v[0]
-            m = z >> 5 ^ y << 2
-            m += y >> 3 ^ z << 4 ^ (d ^ y)
-            m += k[p & 3 ^ e] ^ z
-            z = v[n] = v[n] + m & (0xBB390742 | 0x44C6F8BD)
-            q -= 1
-        return self.l(v, False)
+        return srun_crypto.xxtea(str_, key)
 
     def info_(self, info: dict, token: str) -> str:
-        alpha = "LVoJPiCN2R8G90yg+hmFHuacZ1OWMnrsSTXkYpUq/3dlbfKwv6xztjI7DeBE45QA"
-        json_data = json.dumps(info).replace(" ", "")
-        result = self.trans_b64encode(self.xxtea(json_data, token), alpha)
-        return f"{{SRBX1}}{result}"
+        return srun_crypto.info_(info, token)
+
+    def _parse_jsonp(self, text):
+        """去掉JSONP回调包装，返回JSON对象"""
+        return json.loads(text[len(self.callback) + 1 : -1])
+
+    def get_online_info(self, ip=None):
+        """查询rad_user_info，返回指定IP的在线信息，不在线或失败时返回None"""
+        ip = ip or self.ip
+        params = urlencode(
+            {"callback": self.callback, "ip": ip or "", "_": int(time.time() * 1000)}
+        )
+        try:
+            resp = self.session.get(
+                url=f"{self.base_url}/cgi-bin/rad_user_info?{params}",
+                headers={"User-Agent": self.UA},
+                timeout=10,
+            )
+            if resp.status_code != 200:
+                return None
+            result = self._parse_jsonp(resp.text)
+            if result.get("error") == "ok":
+                return result
+            return None
+        except Exception as e:
+            if not self.long_term_mode:
+                ColorPrint.warning(f"查询在线信息异常: {e}")
+            return None
 
     def get_challenge(self):
         if not self.long_term_mode:
@@ -275,8 +223,7 @@ class HITSZNetAuth:
             )
 
             if resp.status_code == 200:
-                get_challenge = resp.text[len(self.callback) + 1 : -1]
-                token = json.loads(get_challenge)["challenge"]
+                token = self._parse_jsonp(resp.text)["challenge"]
                 if not self.long_term_mode:
                     ColorPrint.success(f"获取challenge成功: {token[:20]}...")
                 return token
@@ -301,6 +248,24 @@ class HITSZNetAuth:
         else:
             return "Windows"
 
+    def build_login_params(self, token):
+        """根据challenge生成srun_portal登录请求的查询串"""
+        return urlencode(
+            srun_crypto.login_query(
+                self.username,
+                self.password,
+                self.ip,
+                token,
+                self.callback,
+                ac_id=self.ACID,
+                n=self.N,
+                type_=self.TYPE,
+                enc=self.ENC,
+                os_name=self.get_os(),
+                timestamp_ms=int(time.time() * 1000),
+            )
+        )
+
     def srun_login(self):
         if not self.long_term_mode:
             ColorPrint.process("执行SRUN校园网登录...")
@@ -309,55 +274,10 @@ class HITSZNetAuth:
         token = self.get_challenge()
         if not token:
             return False
-        # 加密密码
-        hmd5_password = self.hmd5(self.password, token)
-        # 生成info字段
-        info = self.info_(
-            {
-                "username": self.username,
-                "password": self.password,
-                "ip": self.ip,
-                "acid": self.ACID,
-                "enc_ver": self.ENC,
-            },
-            token,
-        )
-        # 生成校验和
-        chksum = self.sha1(
-            self.chkstr(
-                token,
-                self.username,
-                hmd5_password,
-                self.ACID,
-                self.ip,
-                self.N,
-                self.TYPE,
-                info,
-            )
-        )
-        # 获取操作系统信息
-        os_name = self.get_os()
-        # 构建登录参数
-        params = urlencode(
-            {
-                "callback": self.callback,
-                "action": "login",
-                "username": self.username,
-                "password": "{MD5}" + hmd5_password,
-                "os": os_name,
-                "name": os_name,
-                "nas_ip": "",
-                "double_stack": 0,
-                "chksum": chksum,
-                "info": info,
-                "ac_id": self.ACID,
-                "ip": self.ip,
-                "n": self.N,
-                "type": self.TYPE,
-                "captchaVal": "",
-                "_": int(time.time() * 1000),
-            }
-        )
+        params = self.build_login_params(token)
+        return self._submit_login(params)
+
+    def _submit_login(self, params):
         try:
             resp = self.session.get(
                 url=f"{self.base_url}/cgi-bin/srun_portal?{params}",
@@ -365,8 +285,7 @@ class HITSZNetAuth:
                 timeout=15,
             )
             if resp.status_code == 200:
-                result_text = resp.text[len(self.callback) + 1 : -1]
-                result = json.loads(result_text)
+                result = self._parse_jsonp(resp.text)
 
                 if result.get("res") == "ok":
                     if not self.long_term_mode:
@@ -387,17 +306,128 @@ class HITSZNetAuth:
                 ColorPrint.error(f"SRUN登录异常: {e}")
             return False
 
+    def srun_logout(self):
+        params = urlencode(
+            {
+                "callback": self.callback,
+                "action": "logout",
+                "username": self.username,
+                "ip": self.ip,
+                "ac_id": self.ACID,
+                "_": int(time.time() * 1000),
+            }
+        )
+        try:
+            resp = self.session.get(
+                url=f"{self.base_url}/cgi-bin/srun_portal?{params}",
+                headers={"User-Agent": self.UA},
+                timeout=10,
+            )
+            return resp.status_code == 200
+        except Exception as e:
+            if not self.long_term_mode:
+                ColorPrint.error(f"SRUN注销异常: {e}")
+            return False
+
+    def refresh_online_info(self):
+        """查询并缓存当前IP的在线会话信息"""
+        info = self.get_online_info()
+        self.online_info = info
+        self.online_info_time = time.time()
+        return info
+
+    def predict_logout_time(self):
+        """根据缓存的在线信息预测被强制下线的时间戳，无法预测时返回None"""
+        info = self.online_info
+        if not info:
+            return None
+        try:
+            remain = int(info.get("remain_seconds") or 0)
+            if remain > 0:
+                return self.online_info_time + remain
+            add_time = int(info.get("add_time") or 0)
+            if self.session_max_seconds and add_time > 0:
+                return add_time + self.session_max_seconds
+        except (TypeError, ValueError):
+            pass
+        return None
+
+    def _read_net_bytes(self):
+        try:
+            total = 0
+            with open("/proc/net/dev", "r") as f:
+                for line in f.readlines()[2:]:
+                    name, data = line.split(":", 1)
+                    if name.strip() == "lo":
+                        continue
+                    fields = data.split()
+                    total += int(fields[0]) + int(fields[8])
+            return total
+        except Exception:
+            return None
+
+    def is_network_quiet(self):
+        """最近两次采样之间的收发速率低于阈值时认为网络空闲，无法采样时视为空闲"""
+        now = time.time()
+        current = self._read_net_bytes()
+        previous = self._net_sample
+        self._net_sample = (now, current)
+        if current is None or previous is None or previous[1] is None:
+            return True
+        elapsed = now - previous[0]
+        if elapsed <= 0:
+            return True
+        return (current - previous[1]) / elapsed < self.quiet_bytes_per_second
+
+    def proactive_relogin(self):
+        """先取好challenge和登录参数，再注销并立即重新登录，把断网时间压到一次请求"""
+        token = self.get_challenge()
+        if not token:
+            return False
+        params = self.build_login_params(token)
+        self.srun_logout()
+        if self._submit_login(params):
+            return True
+        # 旧challenge可能随注销失效，重新走一次完整流程
+        return self.srun_login()
+
+    def proactive_check(self):
+        try:
+            if not self.ip:
+                self.get_ip_address(auto_mode=True)
+            info = self.refresh_online_info()
+            quiet = self.is_network_quiet()
+            if not info:
+                return
+            logout_at = self.predict_logout_time()
+            if not logout_at:
+                return
+
+            remaining = logout_at - time.time()
+            # 空闲时在续期窗口内动手；网络繁忙时最多拖到窗口的三分之一
+            if remaining > self.relogin_margin:
+                return
+            if not quiet and remaining > self.relogin_margin / 3:
+                return
+
+            ColorPrint.warning(f"预计 {int(max(remaining, 0))} 秒后被强制下线，主动续期...")
+            if self.proactive_relogin():
+                ColorPrint.success("主动续期成功")
+                self.refresh_online_info()
+            else:
+                # 已经注销过，不能等下一次定时检查，立即按断网处理重连
+                ColorPrint.error("主动续期失败，立即重连")
+                self.auto_reconnect()
+        except Exception as e:
+            ColorPrint.error(f"主动续期检查异常: {e}")
+
     def check_network_status(self):
         if not self.long_term_mode:
             ColorPrint.process("检查网络连接状态...")
 
-        test_urls = [
-            "https://www.baidu.com",
-        ]
-
-        for url in test_urls:
+        for url in self.probe_urls:
             try:
-                response = requests.get(url, timeout=5)
+                response = get_transport().probe(url, timeout=5)
                 if response.status_code == 200:
                     if not self.long_term_mode:
                         ColorPrint.success("网络连接正常，已联网")
@@ -450,7 +480,7 @@ class HITSZNetAuth:
                 if self.login():
                     ColorPrint.success(f"第 {attempt} 次重连成功！")
                     # 等待网络生效
-                    time.sleep(3)
+                    time.sleep(self.settle_wait)
                     # 验证连接
                     if self.check_network_status():
                         ColorPrint.success("网络重连验证成功")
@@ -464,8 +494,8 @@ class HITSZNetAuth:
                 ColorPrint.error(f"第 {attempt} 次重连异常: {e}")
             # 如果不是最后一次尝试，等待一段时间再重试
             if attempt < max_attempts:
-                ColorPrint.info("等待30秒后重试...")
-                time.sleep(30)
+                ColorPrint.info(f"等待{self.retry_wait}秒后重试...")
+                time.sleep(self.retry_wait)
         ColorPrint.error(f"所有 {max_attempts} 次重连尝试均失败")
         return False
 
@@ -492,9 +522,11 @@ class HITSZNetAuth:
         schedule.clear()
         # 设置定时任务
         schedule.every(check_interval_hours).hours.do(self.scheduled_check)
+        schedule.every(self.proactive_check_minutes).minutes.do(self.proactive_check)
         # 立即执行一次检查
         ColorPrint.info("执行初始网络检查...")
         self.auto_reconnect(max_attempts=3)
+        self.proactive_check()
         # 启动调度器线程
         self.scheduler_thread = threading.Thread(
             target=self._run_scheduler, daemon=True
@@ -535,6 +567,12 @@ class HITSZNetAuth:
                 ColorPrint.info(f"长期服务运行中，下次检查时间: {next_run_str}")
             else:
                 ColorPrint.info("长期服务运行中")
+            logout_at = self.predict_logout_time()
+            if logout_at:
+                logout_str = datetime.fromtimestamp(logout_at).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                )
+                ColorPrint.info(f"预计强制下线时间: {logout_str}")
             return True
         else:
             ColorPrint.info("长期服务未运行")
@@ -547,6 +585,13 @@ class HITSZNetAuth:
             error_msg="请输入1-24之间的数字",
         )
         interval = int(check_interval) if check_interval else 1
+        max_hours = ColorPrint.input_with_validation(
+            "请输入门户强制下线时长（小时，留空则按剩余时长自动判断）",
+            validator=lambda x: x == "" or (x.isdigit() and int(x) > 0),
+            error_msg="请输入正整数",
+        )
+        if max_hours:
+            self.session_max_seconds = int(max_hours) * 3600
         self.start_long_term_service(check_interval_hours=interval)
         ColorPrint.info("长期服务已启动，程序将在后台监控网络状态")
         ColorPrint.info("在长期模式下，程序将自动同意使用检测到的IP地址")
@@ -605,6 +650,15 @@ def check_dependencies():
 
 # 使用示例
 def main():
+    # HITSZ_PROFILE 或 --profile 打开时剖析登录和长期服务的每轮检查
+    profiling.install(
+        [
+            (HITSZNetAuth, "login"),
+            (HITSZNetAuth, "scheduled_check"),
+            (HITSZNetAuth, "proactive_check"),
+        ],
+        argv=sys.argv,
+    )
     ColorPrint.header("SRUN校园网登录工具")
 
     # 检查依赖
@@ -0,0 +1,384 @@
+import json
+import time
+import asyncio
+import aiohttp
+from datetime import datetime
+from urllib.parse import urlencode
+from color_print import ColorPrint
+from net_login import HITSZNetAuth
+from http_transport import get_transport
+
+
+def _sync_only(name):
+    def blocked(self, *args, **kwargs):
+        raise TypeError(
+            f"AsyncHITSZNetAuth 不支持同步的 {name}()，长期服务请使用 run_long_term_service()"
+        )
+
+    blocked.__name__ = name
+    return blocked
+
+
+class AsyncHITSZNetAuth(HITSZNetAuth):
+    """HITSZNetAuth 的 asyncio 版本
+
+    复用父类的 JSONP 解析和 SRUN 加密，网络请求全部走 aiohttp。
+    探测、获取challenge、登录和状态查询共用一个事件循环，
+    重连过程中依旧可以响应状态查询。
+    """
+
+    # 父类的这些同步入口会调用这里已经改成协程的方法（拿到的协程对象永远为真），
+    # 或者用 requests 的方式使用 aiohttp 会话，直接禁用，避免静默地什么都不做
+    network_login = _sync_only("network_login")
+    long_term_work = _sync_only("long_term_work")
+    start_long_term_service = _sync_only("start_long_term_service")
+    stop_long_term_service = _sync_only("stop_long_term_service")
+    _run_scheduler = _sync_only("_run_scheduler")
+    proactive_check = _sync_only("proactive_check")
+    proactive_relogin = _sync_only("proactive_relogin")
+    srun_logout = _sync_only("srun_logout")
+    _submit_login = _sync_only("_submit_login")
+
+    def __init__(self, username=None, password=None, session=None):
+        super().__init__(username, password)
+        # aiohttp.ClientSession 需要在事件循环内创建，传入时由调用方负责关闭
+        self.session = session
+        self._owns_session = session is None
+        # 超时设置（秒）
+        self.challenge_timeout = 10
+        self.login_timeout = 15
+        self.probe_timeout = 5
+        # 运行状态
+        self.state = "idle"
+        self.last_check = None
+        self.last_online = None
+        self.next_check = None
+        self.reconnect_count = 0
+        self._reconnect_lock = asyncio.Lock()
+        self._status_server = None
+
+    async def _ensure_session(self):
+        if self.session is None or self.session.closed:
+            self.session = get_transport().aiohttp_session(
+                headers={"User-Agent": self.UA}
+            )
+            self._owns_session = True
+        return self.session
+
+    async def close(self):
+        if self._status_server:
+            self._status_server.close()
+            await self._status_server.wait_closed()
+            self._status_server = None
+        if self._owns_session and self.session and not self.session.closed:
+            await self.session.close()
+            await get_transport().close_connector()
+
+    async def _get_text(self, url, timeout):
+        session = await self._ensure_session()
+        async with session.get(
+            url,
+            headers={"User-Agent": self.UA},
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as resp:
+            return resp.status, await resp.text()
+
+    async def get_online_info(self, ip=None):
+        ip = ip or self.ip
+        params = urlencode(
+            {"callback": self.callback, "ip": ip or "", "_": int(time.time() * 1000)}
+        )
+        try:
+            status, text = await self._get_text(
+                f"{self.base_url}/cgi-bin/rad_user_info?{params}",
+                self.challenge_timeout,
+            )
+            if status != 200:
+                return None
+            result = self._parse_jsonp(text)
+            if result.get("error") == "ok":
+                return result
+            return None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not self.long_term_mode:
+                ColorPrint.warning(f"查询在线信息异常: {e}")
+            return None
+
+    async def refresh_online_info(self):
+        """查询并缓存当前IP的在线会话信息"""
+        info = await self.get_online_info()
+        self.online_info = info
+        self.online_info_time = time.time()
+        return info
+
+    async def get_challenge(self):
+        if not self.long_term_mode:
+            ColorPrint.process("获取认证challenge...")
+
+        if not self.ip:
+            self.get_ip_address(auto_mode=True)
+
+        params = urlencode(
+            {"callback": self.callback, "username": self.username, "ip": self.ip}
+        )
+
+        try:
+            status, text = await self._get_text(
+                f"{self.base_url}/cgi-bin/get_challenge?{params}",
+                self.challenge_timeout,
+            )
+            if status == 200:
+                token = self._parse_jsonp(text)["challenge"]
+                if not self.long_term_mode:
+                    ColorPrint.success(f"获取challenge成功: {token[:20]}...")
+                return token
+            else:
+                if not self.long_term_mode:
+                    ColorPrint.error(f"获取challenge失败，状态码: {status}")
+                return None
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not self.long_term_mode:
+                ColorPrint.error(f"获取challenge异常: {e}")
+            return None
+
+    async def srun_login(self):
+        if not self.long_term_mode:
+            ColorPrint.process("执行SRUN校园网登录...")
+
+        token = await self.get_challenge()
+        if not token:
+            return False
+        params = self.build_login_params(token)
+        try:
+            status, text = await self._get_text(
+                f"{self.base_url}/cgi-bin/srun_portal?{params}", self.login_timeout
+            )
+            if status == 200:
+                result = self._parse_jsonp(text)
+
+                if result.get("res") == "ok":
+                    if not self.long_term_mode:
+                        ColorPrint.success("SRUN校园网登录成功")
+                    return True
+                else:
+                    error_msg = result.get("error", "未知错误")
+                    if not self.long_term_mode:
+                        ColorPrint.error(f"SRUN登录失败: {error_msg}")
+                    return False
+            else:
+                if not self.long_term_mode:
+                    ColorPrint.error(f"SRUN登录请求失败，状态码: {status}")
+                return False
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not self.long_term_mode:
+                ColorPrint.error(f"SRUN登录异常: {e}")
+            return False
+
+    async def check_network_status(self):
+        if not self.long_term_mode:
+            ColorPrint.process("检查网络连接状态...")
+
+        session = await self._ensure_session()
+        for url in self.probe_urls:
+            try:
+                async with session.get(
+                    url, timeout=aiohttp.ClientTimeout(total=self.probe_timeout)
+                ) as response:
+                    if response.status == 200:
+                        self.last_online = time.time()
+                        if not self.long_term_mode:
+                            ColorPrint.success("网络连接正常，已联网")
+                        return True
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                continue
+
+        if not self.long_term_mode:
+            ColorPrint.warning("无法访问外网，需要校园网认证")
+        return False
+
+    async def login(self, username=None, password=None):
+        if username:
+            self.username = username
+        if password:
+            self.password = password
+
+        if not self.username or not self.password:
+            if not self.long_term_mode:
+                ColorPrint.error("用户名或密码未设置")
+            return False
+
+        return await self.srun_login()
+
+    async def auto_reconnect(self, max_attempts=3):
+        # 同一时刻只允许一个重连流程，后来者等待其结果
+        async with self._reconnect_lock:
+            return await self._auto_reconnect(max_attempts)
+
+    async def _auto_reconnect(self, max_attempts):
+        ColorPrint.subheader(
+            f"自动重连检查 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            style="bracket",
+        )
+        self.state = "checking"
+        self.last_check = time.time()
+
+        if await self.check_network_status():
+            ColorPrint.success("网络连接正常，无需重连")
+            self.state = "online"
+            return True
+
+        ColorPrint.warning("检测到网络断开，开始自动重连...")
+        self.state = "reconnecting"
+
+        for attempt in range(1, max_attempts + 1):
+            ColorPrint.info(f"第 {attempt}/{max_attempts} 次重连尝试")
+
+            try:
+                old_ip = self.ip
+                self.ip = None
+                new_ip = self.get_ip_address(auto_mode=True)
+                if new_ip and new_ip != old_ip:
+                    ColorPrint.info(f"IP地址已更新: {old_ip} -> {new_ip}")
+                if await self.login():
+                    ColorPrint.success(f"第 {attempt} 次重连成功！")
+                    await asyncio.sleep(self.settle_wait)
+                    if await self.check_network_status():
+                        ColorPrint.success("网络重连验证成功")
+                        self.reconnect_count += 1
+                        self.state = "online"
+                        return True
+                    else:
+                        ColorPrint.warning("认证成功但网络验证失败，继续下次尝试")
+                else:
+                    ColorPrint.error(f"第 {attempt} 次重连失败")
+
+            except asyncio.CancelledError:
+                self.state = "cancelled"
+                raise
+            except Exception as e:
+                ColorPrint.error(f"第 {attempt} 次重连异常: {e}")
+            if attempt < max_attempts:
+                ColorPrint.info(f"等待{self.retry_wait}秒后重试...")
+                await asyncio.sleep(self.retry_wait)
+        ColorPrint.error(f"所有 {max_attempts} 次重连尝试均失败")
+        self.state = "offline"
+        return False
+
+    async def scheduled_check(self):
+        try:
+            await self.auto_reconnect(max_attempts=3)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            ColorPrint.error(f"定时检查异常: {e}")
+
+    def get_service_status(self):
+        def fmt(ts):
+            return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts else None
+
+        return {
+            "running": self.is_running,
+            "state": self.state,
+            "ip": self.ip,
+            "last_check": fmt(self.last_check),
+            "last_online": fmt(self.last_online),
+            "next_check": fmt(self.next_check),
+            "reconnect_count": self.reconnect_count,
+        }
+
+    async def _handle_status(self, reader, writer):
+        try:
+            # 读掉请求行即可，nc 或 curl 都能拿到结果
+            await asyncio.wait_for(reader.readline(), timeout=2)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        body = json.dumps(self.get_service_status(), ensure_ascii=False).encode("utf-8")
+        writer.write(
+            b"HTTP/1.0 200 OK\r\nContent-Type: application/json; charset=utf-8\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def start_status_server(self, port, host="127.0.0.1"):
+        self._status_server = await asyncio.start_server(self._handle_status, host, port)
+        ColorPrint.info(f"状态查询地址: http://{host}:{port}/")
+
+    async def run_long_term_service(self, check_interval_hours=1, status_port=None):
+        self.long_term_mode = True
+        self.is_running = True
+        self.auto_approve_ip = True
+        interval = check_interval_hours * 3600
+
+        ColorPrint.success(
+            f"启动长期服务模式，每 {check_interval_hours} 小时检查一次网络状态"
+        )
+        if status_port:
+            await self.start_status_server(status_port)
+
+        try:
+            while self.is_running:
+                await self.scheduled_check()
+                self.next_check = time.time() + interval
+                await asyncio.sleep(interval)
+        finally:
+            self.is_running = False
+            self.long_term_mode = False
+            self.auto_approve_ip = False
+            self.state = "stopped"
+            await self.close()
+            ColorPrint.success("长期服务模式已停止")
+
+
+def main():
+    ColorPrint.header("SRUN校园网登录工具 (asyncio)")
+
+    username = ColorPrint.input_with_validation(
+        "请输入学号", validator=lambda x: len(x) > 0, error_msg="学号不能为空"
+    )
+    if not username:
+        return
+    password = ColorPrint.input_with_validation(
+        "请输入密码", validator=lambda x: len(x) > 0, error_msg="密码不能为空"
+    )
+    if not password:
+        return
+    check_interval = ColorPrint.input_with_validation(
+        "请输入检查间隔（小时，默认1小时）",
+        validator=lambda x: x == "" or (x.isdigit() and 1 <= int(x) <= 24),
+        error_msg="请输入1-24之间的数字",
+    )
+    status_port = ColorPrint.input_with_validation(
+        "请输入状态查询端口（留空则不开启）",
+        validator=lambda x: x == "" or (x.isdigit() and 0 < int(x) < 65536),
+        error_msg="请输入有效端口",
+    )
+
+    net_auth = AsyncHITSZNetAuth(username, password)
+    try:
+        asyncio.run(
+            net_auth.run_long_term_service(
+                check_interval_hours=int(check_interval) if check_interval else 1,
+                status_port=int(status_port) if status_port else None,
+            )
+        )
+    except KeyboardInterrupt:
+        ColorPrint.info("\n收到停止信号...")
+        ColorPrint.info("拜拜喵！")
+
+
+if __name__ == "__main__":
+    main()
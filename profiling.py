@@ -0,0 +1,212 @@
+"""按需性能剖析
+
+默认关闭，install() 直接返回，不替换任何函数，也不导入剖析相关模块。
+设置环境变量 HITSZ_PROFILE 或在命令行加 --profile 后，install() 给登记的入口套上剖析：
+- cprofile（默认）：每次调用输出一个 cProfile 文件（.prof，可用 pstats / snakeviz 查看），
+  并用 tracemalloc 记录调用前后的内存快照差异（-mem.txt）；
+- sample：装了 pyinstrument 时改用采样剖析，开销更小，输出 .html 和 .txt；没装时退回 cprofile。
+文件写到 HITSZ_PROFILE_DIR（默认 profiles/），每次调用结束打印累计耗时最多的
+HITSZ_PROFILE_TOP 个函数（默认 10），程序退出时汇总各入口的调用次数和耗时。
+
+    HITSZ_PROFILE=1 python jw.py
+    python net_login.py --profile=sample
+"""
+
+import os
+import sys
+import time
+import atexit
+import functools
+import threading
+
+MODES = ("cprofile", "sample")
+FALSE_VALUES = ("", "0", "false", "no", "off")
+
+
+def _default_log(message):
+    from color_print import ColorPrint
+
+    ColorPrint.info(message)
+
+
+def mode_from_env(environ=None):
+    environ = os.environ if environ is None else environ
+    value = environ.get("HITSZ_PROFILE", "").strip().lower()
+    if value in FALSE_VALUES:
+        return None
+    return value if value in MODES else "cprofile"
+
+
+def mode_from_argv(argv):
+    """找出并移除 --profile / --profile=sample，返回剖析模式，没有时返回 None"""
+    mode = None
+    for arg in list(argv):
+        if arg == "--profile":
+            mode = "cprofile"
+        elif arg.startswith("--profile="):
+            value = arg.split("=", 1)[1].lower()
+            mode = value if value in MODES else "cprofile"
+        else:
+            continue
+        argv.remove(arg)
+    return mode
+
+
+class Profiler:
+    def __init__(self, mode="cprofile", directory="profiles", top=10, log=None):
+        self.mode = mode
+        self.directory = directory
+        self.top = top
+        self.log = log or _default_log
+        # cProfile 同一时间只能有一个在工作，嵌套调用和其他线程的调用直接执行
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.counter = 0
+        self.records = {}
+        self.skipped = 0
+        if mode == "sample":
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                self.log("未安装 pyinstrument，改用 cProfile")
+                self.mode = "cprofile"
+
+    def wrap(self, func, name):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(self.local, "active", False):
+                return func(*args, **kwargs)
+            if not self.lock.acquire(blocking=False):
+                self.skipped += 1
+                return func(*args, **kwargs)
+            self.local.active = True
+            try:
+                return self._run(name, func, args, kwargs)
+            finally:
+                self.local.active = False
+                self.lock.release()
+
+        return wrapper
+
+    def _base_path(self, name):
+        self.counter += 1
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.directory, f"{name}-{stamp}-{self.counter}")
+
+    def _run(self, name, func, args, kwargs):
+        if self.mode == "sample":
+            return self._run_sampling(name, func, args, kwargs)
+        return self._run_cprofile(name, func, args, kwargs)
+
+    def _run_cprofile(self, name, func, args, kwargs):
+        import cProfile
+        import tracemalloc
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(10)
+        before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            after = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            base = self._base_path(name)
+            profile.dump_stats(f"{base}.prof")
+            with open(f"{base}-mem.txt", "w", encoding="utf-8") as f:
+                for stat in after.compare_to(before, "lineno")[:50]:
+                    f.write(f"{stat}\n")
+            self._report(name, elapsed, base, self._top_functions(profile))
+
+    def _run_sampling(self, name, func, args, kwargs):
+        from pyinstrument import Profiler as SamplingProfiler
+
+        profiler = SamplingProfiler()
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.stop()
+            elapsed = time.perf_counter() - start
+            base = self._base_path(name)
+            with open(f"{base}.html", "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+            with open(f"{base}.txt", "w", encoding="utf-8") as f:
+                f.write(profiler.output_text())
+            self._report(name, elapsed, base, [])
+
+    def _top_functions(self, profile):
+        """按累计耗时排序的前 top 个函数: [(累计秒, 调用次数, 函数)]"""
+        import pstats
+
+        stats = pstats.Stats(profile).stats
+        rows = []
+        for (filename, line, func), (_, calls, _, cumtime, _) in stats.items():
+            if filename == "~":
+                continue  # 内置函数和 profiler 自己
+            rows.append((cumtime, calls, f"{os.path.basename(filename)}:{line}({func})"))
+        rows.sort(reverse=True)
+        return rows[: self.top]
+
+    def _report(self, name, elapsed, base, top):
+        # 在持有 self.lock 时调用，记录不需要另外加锁
+        self.records.setdefault(name, []).append(elapsed)
+        lines = [f"[剖析] {name} 用时 {elapsed:.3f} 秒，结果: {base}.*"]
+        for cumtime, calls, func in top:
+            lines.append(f"    {cumtime * 1000:9.1f}ms {calls:>7}  {func}")
+        self.log("\n".join(lines))
+
+    def summary(self):
+        if not self.records:
+            return
+        lines = ["[剖析汇总]"]
+        for name, times in sorted(self.records.items()):
+            lines.append(
+                f"    {name}: {len(times)} 次，合计 {sum(times):.3f} 秒，"
+                f"最长 {max(times):.3f} 秒"
+            )
+        if self.skipped:
+            lines.append(f"    另有 {self.skipped} 次调用因其他剖析进行中而未剖析")
+        lines.append(f"    结果目录: {os.path.abspath(self.directory)}")
+        self.log("\n".join(lines))
+
+
+def install(targets, argv=None, mode=None, log=None, environ=None):
+    """给 targets 里的 (类, 方法名) 套上剖析；未开启时什么都不做，返回 None
+
+    mode 优先，其次是 argv 里的 --profile，最后是环境变量 HITSZ_PROFILE。
+    """
+    environ = os.environ if environ is None else environ
+    if argv is not None:
+        mode = mode or mode_from_argv(argv)
+    mode = mode or mode_from_env(environ)
+    if not mode:
+        return None
+
+    profiler = Profiler(
+        mode=mode,
+        directory=environ.get("HITSZ_PROFILE_DIR", "profiles"),
+        top=int(environ.get("HITSZ_PROFILE_TOP", 10)),
+        log=log,
+    )
+    for owner, attr in targets:
+        name = f"{owner.__name__}.{attr}"
+        setattr(owner, attr, profiler.wrap(getattr(owner, attr), name))
+    atexit.register(profiler.summary)
+    profiler.log(f"[剖析] 已开启 {profiler.mode}，共 {len(targets)} 个入口")
+    return profiler
+
+
+if __name__ == "__main__":
+    # 查看某个 .prof 文件: python profiling.py profiles/xxx.prof [条数]
+    import pstats
+
+    pstats.Stats(sys.argv[1]).sort_stats("cumulative").print_stats(
+        int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    )
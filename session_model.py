@@ -0,0 +1,168 @@
+import json
+import os
+import tempfile
+import time
+
+
+class SessionLifetimeModel:
+    """根据历史验证结果估计会话的空闲超时和绝对有效期
+
+    每次请求证明会话有效时记录一次 valid，被重定向到登录页时记录一次 invalid。
+    空闲超时夹在「见过的最长有效空闲」和「见过的最短失效空闲」之间；
+    如果失效时的空闲时间并不长，就把这次失效归因于绝对有效期。
+    """
+
+    def __init__(self, model_file=None, default_idle_timeout=1200, safety=0.5):
+        self.model_file = model_file
+        self.default_idle_timeout = default_idle_timeout
+        self.safety = safety
+        # 学到的边界（秒）
+        self.idle_valid = 0
+        self.idle_invalid = None
+        self.life_valid = 0
+        self.life_invalid = None
+        # 当前会话
+        self.login_at = None
+        self.last_active = None
+        # 保活请求没有结论时推迟下一次探测，连续没有结论时间隔翻倍
+        self.probe_after = None
+        self.probe_backoff = 0
+
+    def load(self):
+        if not self.model_file or not os.path.exists(self.model_file):
+            return False
+        try:
+            with open(self.model_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key in (
+                "idle_valid",
+                "idle_invalid",
+                "life_valid",
+                "life_invalid",
+                "login_at",
+                "last_active",
+            ):
+                setattr(self, key, data.get(key, getattr(self, key)))
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def save(self):
+        if not self.model_file:
+            return
+        data = {
+            "idle_valid": self.idle_valid,
+            "idle_invalid": self.idle_invalid,
+            "life_valid": self.life_valid,
+            "life_invalid": self.life_invalid,
+            "login_at": self.login_at,
+            "last_active": self.last_active,
+        }
+        try:
+            # 多个线程可能同时保存，各自写独立的临时文件再替换
+            fd, tmp_file = tempfile.mkstemp(
+                prefix=f"{os.path.basename(self.model_file)}.",
+                suffix=".tmp",
+                dir=os.path.dirname(os.path.abspath(self.model_file)),
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_file, self.model_file)
+            except BaseException:
+                os.unlink(tmp_file)
+                raise
+        except OSError:
+            pass
+
+    # ---------- 观测 ----------
+    def record_login(self, now=None):
+        now = now or time.time()
+        self.login_at = now
+        self.last_active = now
+        self._reset_probe()
+        self.save()
+
+    def record_valid(self, now=None):
+        now = now or time.time()
+        self._reset_probe()
+        if self.last_active:
+            self.idle_valid = max(self.idle_valid, now - self.last_active)
+        if self.login_at:
+            self.life_valid = max(self.life_valid, now - self.login_at)
+        self.last_active = now
+
+    def record_invalid(self, now=None):
+        now = now or time.time()
+        if self.last_active:
+            idle = now - self.last_active
+            if idle > self.idle_valid:
+                # 空闲时间超过了见过的有效空闲，归因于空闲超时
+                if self.idle_invalid is None or idle < self.idle_invalid:
+                    self.idle_invalid = idle
+            elif self.login_at:
+                age = now - self.login_at
+                if age > self.life_valid and (
+                    self.life_invalid is None or age < self.life_invalid
+                ):
+                    self.life_invalid = age
+        self.last_active = None
+        self.login_at = None
+        self._reset_probe()
+        self.save()
+
+    def record_inconclusive(self, now=None):
+        """保活请求没能判断会话是否有效（网络异常、意外的状态码），推迟下一次探测"""
+        now = now or time.time()
+        self.probe_backoff = min(
+            max(30, self.probe_backoff * 2), self.keepalive_interval()
+        )
+        self.probe_after = now + self.probe_backoff
+
+    def _reset_probe(self):
+        self.probe_after = None
+        self.probe_backoff = 0
+
+    # ---------- 预测 ----------
+    def idle_timeout(self):
+        if self.idle_invalid is not None:
+            return self.idle_invalid
+        return max(self.default_idle_timeout, self.idle_valid)
+
+    def keepalive_interval(self):
+        """在估计的空闲超时之前留足余量的保活间隔"""
+        return max(30, self.idle_timeout() * self.safety)
+
+    def needs_keepalive(self, now=None):
+        now = now or time.time()
+        if not self.last_active:
+            return False
+        if self.probe_after and now < self.probe_after:
+            return False
+        return now - self.last_active >= self.keepalive_interval()
+
+    def absolute_expiry(self):
+        """按学到的绝对有效期预测的失效时间，未学到时返回None"""
+        if self.life_invalid is None or not self.login_at:
+            return None
+        # 真正的有效期在 life_valid 和 life_invalid 之间，取中点
+        return self.login_at + (self.life_valid + self.life_invalid) / 2
+
+    def expires_before(self, deadline):
+        """会话是否会在 deadline 之前失效（空闲超时靠保活解决，这里只看绝对有效期）"""
+        if self.life_invalid is None:
+            return False
+        if not self.login_at:
+            # 不知道会话何时建立，只能按可能失效处理
+            return True
+        return self.absolute_expiry() < deadline
+
+    def describe(self):
+        expiry = self.absolute_expiry()
+        return {
+            "idle_timeout": self.idle_timeout(),
+            "keepalive_interval": self.keepalive_interval(),
+            "absolute_expiry": expiry,
+            "idle_bounds": (self.idle_valid, self.idle_invalid),
+            "life_bounds": (self.life_valid, self.life_invalid),
+        }
@@ -0,0 +1,186 @@
+import json
+import hmac
+import base64
+import hashlib
+import math
+from typing import Union
+
+# SRUN 门户 {SRBX1} 编码使用的 base64 字母表
+SRBX1_ALPHA = "LVoJPiCN2R8G90yg+hmFHuacZ1OWMnrsSTXkYpUq/3dlbfKwv6xztjI7DeBE45QA"
+
+
+def hmd5(msg: str, key: str) -> str:
+    msg = msg.encode()
+    key = key.encode()
+    return hmac.new(key, msg, hashlib.md5).hexdigest()
+
+
+def sha1(msg: str) -> str:
+    return hashlib.sha1(msg.encode()).hexdigest()
+
+
+def chkstr(
+    token: str,
+    username: str,
+    hmd5: str,
+    ac_id: str,
+    ip: str,
+    n: str,
+    type_: str,
+    info: str,
+) -> str:
+    result = token + username
+    result += token + hmd5
+    result += token + ac_id
+    result += token + ip
+    result += token + n
+    result += token + type_
+    result += token + info
+    return result
+
+
+def trans_b64encode(s: str, alpha: Union[str, None] = None) -> str:
+    result = base64.b64encode(s.encode(encoding="latin-1")).decode()
+    if not alpha:
+        return result
+    assert len(alpha) == 64, "base64字母表的长度必须为64"
+    table = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+    trans_table = str.maketrans(table, alpha)
+    return result.translate(trans_table)
+
+
+class String(str):
+    def charCodeAt(self, i: int) -> int:
+        if len(self) > i:
+            return ord(self[i])
+        return 0
+
+    @classmethod
+    def fromCharCode(cls, *charCodes: list[int]) -> str:
+        result = ""
+        for c in charCodes:
+            result += chr(c)
+        return result
+
+
+def _s(a, b: bool) -> list[int]:
+    c = len(a)
+    v = []
+    for i in range(0, c, 4):
+        v.append(
+            a.charCodeAt(i)
+            | a.charCodeAt(i + 1) << 8
+            | a.charCodeAt(i + 2) << 16
+            | a.charCodeAt(i + 3) << 24
+        )
+    if b:
+        v.append(c)
+    return v
+
+
+def _l(a: list[int], b: bool):
+    d = len(a)
+    c = (d - 1) << 2
+    if b:
+        m = a[d - 1]
+        if m < c - 3 or m > c:
+            return None
+        c = m
+    for i in range(0, d):
+        a[i] = String.fromCharCode(
+            a[i] & 0xFF, a[i] >> 8 & 0xFF, a[i] >> 16 & 0xFF, a[i] >> 24 & 0xFF
+        )
+    return "".join(a)[0:c] if b else "".join(a)
+
+
+def xxtea(str_: str, key: str) -> str:
+    str_, key = String(str_), String(key)
+
+    if str_ == "":
+        return ""
+    v = _s(str_, True)
+    k = _s(key, False)
+    if len(k) < 4:
+        k = k + [0] * (4 - len(k))
+    n = len(v) - 1
+    z = v[n]
+    y = v[0]
+    c = 0x86014019 | 0x183639A0
+    m = 0
+    e = 0
+    p = 0
+    q = math.floor(6 + 52 / (n + 1))
+    d = 0
+    while 0 < q:
+        d = d + c & (0x8CE0D9BF | 0x731F2640)
+        e = d >> 2 & 3
+        p = 0
+        while p < n:
+            y = v[p + 1]
+            m = z >> 5 ^ y << 2
+            m += y >> 3 ^ z << 4 ^ (d ^ y)
+            m += k[p & 3 ^ e] ^ z
+            z = v[p] = v[p] + m & (0xEFB8D130 | 0x10472ECF)
+            p += 1
+        y = v[0]
+        m = z >> 5 ^ y << 2
+        m += y >> 3 ^ z << 4 ^ (d ^ y)
+        m += k[p & 3 ^ e] ^ z
+        z = v[n] = v[n] + m & (0xBB390742 | 0x44C6F8BD)
+        q -= 1
+    return _l(v, False)
+
+
+def info_(info: dict, token: str) -> str:
+    json_data = json.dumps(info).replace(" ", "")
+    result = trans_b64encode(xxtea(json_data, token), SRBX1_ALPHA)
+    return f"{{SRBX1}}{result}"
+
+
+def login_query(
+    username: str,
+    password: str,
+    ip: str,
+    token: str,
+    callback: str,
+    ac_id: str = "1",
+    n: str = "200",
+    type_: str = "1",
+    enc: str = "srun_bx1",
+    os_name: str = "Windows",
+    timestamp_ms: Union[int, None] = None,
+) -> dict:
+    """根据challenge生成srun_portal登录请求的参数"""
+    # 加密密码
+    hmd5_password = hmd5(password, token)
+    # 生成info字段
+    info = info_(
+        {
+            "username": username,
+            "password": password,
+            "ip": ip,
+            "acid": ac_id,
+            "enc_ver": enc,
+        },
+        token,
+    )
+    # 生成校验和
+    chksum = sha1(chkstr(token, username, hmd5_password, ac_id, ip, n, type_, info))
+    return {
+        "callback": callback,
+        "action": "login",
+        "username": username,
+        "password": "{MD5}" + hmd5_password,
+        "os": os_name,
+        "name": os_name,
+        "nas_ip": "",
+        "double_stack": 0,
+        "chksum": chksum,
+        "info": info,
+        "ac_id": ac_id,
+        "ip": ip,
+        "n": n,
+        "type": type_,
+        "captchaVal": "",
+        "_": timestamp_ms if timestamp_ms is not None else 0,
+    }
@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests.cookies import create_cookie
+
+from hitsz_auth import COOKIE_SNAPSHOT_VERSION, HITSZAuth
+from session_model import SessionLifetimeModel
+
+
+def new_auth(cookies_file):
+    auth = HITSZAuth("2024000000", "password")
+    auth.cookies_file = cookies_file
+    auth.session_model = SessionLifetimeModel()
+    return auth
+
+
+class CookieSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.file = os.path.join(self.dir.name, "cookies.json")
+
+    def test_v2_round_trip_keeps_attributes(self):
+        expires = int(time.time()) + 3600
+        auth = new_auth(self.file)
+        auth.session.cookies.set_cookie(
+            create_cookie(
+                "CASTGC",
+                "TGT-1",
+                domain="ids.hit.edu.cn",
+                path="/authserver",
+                secure=True,
+                expires=expires,
+                rest={"HttpOnly": None},
+            )
+        )
+        auth.session.cookies.set_cookie(
+            create_cookie("route", "abc", domain=".hitsz.edu.cn", path="/")
+        )
+        auth.validated_at = time.time()
+        self.assertTrue(auth.save_cookies(quiet=True))
+
+        with open(self.file, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        self.assertEqual(snapshot["version"], COOKIE_SNAPSHOT_VERSION)
+        self.assertEqual(snapshot["service_url"], auth.service_url)
+        # 临时文件已经替换成正式文件
+        self.assertEqual(os.listdir(self.dir.name), ["cookies.json"])
+
+        loaded = new_auth(self.file)
+        self.assertTrue(loaded.load_cookies())
+        cookies = {c.name: c for c in loaded.session.cookies}
+        self.assertEqual(set(cookies), {"CASTGC", "route"})
+        tgc = cookies["CASTGC"]
+        self.assertEqual(
+            (tgc.value, tgc.domain, tgc.path, tgc.secure, tgc.expires),
+            ("TGT-1", "ids.hit.edu.cn", "/authserver", True, expires),
+        )
+        self.assertTrue(tgc.has_nonstandard_attr("HttpOnly"))
+        self.assertEqual(cookies["route"].domain, ".hitsz.edu.cn")
+        self.assertEqual(loaded.validated_at, auth.validated_at)
+        self.assertTrue(loaded.is_cookie_cache_fresh())
+        self.assertEqual(loaded.cookie_fingerprint(), auth.cookie_fingerprint())
+
+    def test_expired_cookies_are_dropped_on_load(self):
+        auth = new_auth(self.file)
+        auth.session.cookies.set_cookie(
+            create_cookie(
+                "old", "1", domain="jw.hitsz.edu.cn", expires=int(time.time()) - 1
+            )
+        )
+        auth.session.cookies.set_cookie(
+            create_cookie("JSESSIONID", "2", domain="jw.hitsz.edu.cn")
+        )
+        auth.save_cookies(quiet=True)
+
+        loaded = new_auth(self.file)
+        loaded.load_cookies()
+        self.assertEqual([c.name for c in loaded.session.cookies], ["JSESSIONID"])
+
+    def test_legacy_name_value_file(self):
+        with open(self.file, "w", encoding="utf-8") as f:
+            json.dump({"JSESSIONID": "abc", "route": "r1"}, f)
+
+        loaded = new_auth(self.file)
+        self.assertTrue(loaded.load_cookies())
+        self.assertEqual(
+            {c.name: c.value for c in loaded.session.cookies},
+            {"JSESSIONID": "abc", "route": "r1"},
+        )
+        # 旧格式不知道上次验证时间，启动时要重新验证
+        self.assertIsNone(loaded.validated_at)
+        self.assertFalse(loaded.is_cookie_cache_fresh())
+
+        # 再保存就升级成新格式
+        loaded.save_cookies(quiet=True)
+        with open(self.file, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["version"], COOKIE_SNAPSHOT_VERSION)
+
+    def test_missing_file(self):
+        self.assertFalse(new_auth(self.file).load_cookies())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jw_multi import FairRateLimiter
+
+# 计时容差，事件循环调度和 sleep 会有少量提前/延迟
+SLACK = 0.005
+
+
+async def grab(limiter, account, until, grants, interval=None):
+    """模拟一个账号的抢课循环：每拿到一次配额记一次"""
+    while time.monotonic() < until:
+        await limiter.acquire(account, interval)
+        grants.append((account, time.monotonic()))
+
+
+def run_accounts(limiter, accounts, duration, intervals=None):
+    grants = []
+    intervals = intervals or {}
+
+    async def main():
+        until = time.monotonic() + duration
+        await asyncio.gather(
+            *(grab(limiter, a, until, grants, intervals.get(a)) for a in accounts)
+        )
+
+    asyncio.run(main())
+    return grants
+
+
+class FairRateLimiterTest(unittest.TestCase):
+    def test_global_interval(self):
+        limiter = FairRateLimiter(rate=50)
+        grants = run_accounts(limiter, ["a", "b", "c", "d"], 0.5)
+        times = [t for _, t in grants]
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        self.assertGreaterEqual(min(gaps), limiter.interval - SLACK)
+        # 繁忙时配额不会闲置（留出机器负载高时的余量）
+        self.assertGreaterEqual(len(grants), 0.5 * 50 * 0.5)
+
+    def test_busy_accounts_take_turns(self):
+        accounts = ["a", "b", "c"]
+        # 第一个账号拿第一次配额时不用等待，在其他账号排队前还能再排一次，从第二次算起
+        grants = run_accounts(FairRateLimiter(rate=60), accounts, 0.6)[1:]
+        counts = [sum(1 for a, _ in grants if a == account) for account in accounts]
+        self.assertLessEqual(max(counts) - min(counts), 1, counts)
+        # 依次轮流：任意连续三次发放各属于不同账号
+        order = [a for a, _ in grants]
+        for i in range(len(order) - 2):
+            self.assertEqual(len(set(order[i : i + 3])), 3, order[i : i + 3])
+
+    def test_account_interval(self):
+        limiter = FairRateLimiter(rate=100, account_interval=0.1)
+        grants = run_accounts(limiter, ["a", "b"], 0.5)
+        for account in ("a", "b"):
+            times = [t for a, t in grants if a == account]
+            gaps = [y - x for x, y in zip(times, times[1:])]
+            self.assertGreaterEqual(min(gaps), 0.1 - SLACK, account)
+
+    def test_per_account_interval_does_not_slow_others(self):
+        # 请求间隔长的账号在排队前等待，不占用全局配额
+        limiter = FairRateLimiter(rate=100, account_interval=0.0)
+        grants = run_accounts(
+            limiter, ["slow", "fast"], 0.5, intervals={"slow": 0.2, "fast": 0.02}
+        )
+        slow = [t for a, t in grants if a == "slow"]
+        fast = [t for a, t in grants if a == "fast"]
+        self.assertGreaterEqual(
+            min(y - x for x, y in zip(slow, slow[1:])), 0.2 - SLACK
+        )
+        self.assertLessEqual(len(slow), 4)
+        self.assertGreaterEqual(len(fast), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
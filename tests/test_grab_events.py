@@ -0,0 +1,38 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grab_events import classify_outcome
+from grab_journal import final_state
+
+
+class ClassifyOutcomeTest(unittest.TestCase):
+    def test_already_selected(self):
+        for message in ("该课程已选", "已选", "已选该课程"):
+            self.assertEqual(classify_outcome(200, message), "already", message)
+            self.assertEqual(final_state(classify_outcome(200, message)), "succeeded")
+
+    def test_conflict_with_selected_course_is_not_already(self):
+        outcome = classify_outcome(200, "该课程与已选课程上课时间冲突")
+        self.assertEqual(outcome, "conflict")
+        self.assertEqual(final_state(outcome), "failed")
+
+    def test_full_is_not_already(self):
+        for message in ("已选人数已满", "课程已选满", "课程已满，无余量"):
+            outcome = classify_outcome(200, message)
+            self.assertEqual(outcome, "full", message)
+            self.assertIsNone(final_state(outcome))
+
+    def test_other_outcomes(self):
+        self.assertEqual(classify_outcome(200, "选课成功", success=True), "success")
+        self.assertEqual(classify_outcome(200, "选课未开放"), "not_open")
+        self.assertEqual(classify_outcome(None, "请求超时"), "timeout")
+        self.assertEqual(classify_outcome(503), "server_error")
+        self.assertEqual(classify_outcome(200, "其他原因"), "rejected")
+        self.assertIsNone(final_state("not_open"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grab_journal import GrabJournal, final_state
+
+SCOPE = "2024000000:2025-2026-1"
+
+
+class GrabJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.path = os.path.join(self.dir.name, "journal.jsonl")
+        self.journal = GrabJournal(self.path)
+        self.addCleanup(self.journal.close)
+
+    def lines(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read().split("\n")
+
+    def test_missing_file(self):
+        self.assertEqual(self.journal.load(SCOPE), {})
+
+    def test_record_and_resume(self):
+        self.journal.record(SCOPE, "A", "succeeded", "success", "选课成功")
+        self.journal.record(SCOPE, "B", "failed", "conflict", "时间冲突")
+        self.journal.record("2024000001:2025-2026-1", "C", "succeeded", "success")
+        self.journal.close()
+
+        # 新进程重新打开同一个文件
+        resumed = GrabJournal(self.path).load(SCOPE)
+        self.assertEqual(resumed, {"A": "succeeded", "B": "failed"})
+
+    def test_last_record_wins(self):
+        self.journal.record(SCOPE, "A", "failed", "conflict")
+        self.journal.record(SCOPE, "A", "succeeded", "already")
+        self.assertEqual(self.journal.load(SCOPE), {"A": "succeeded"})
+
+    def test_torn_tail_is_ignored_and_next_record_starts_a_new_line(self):
+        self.journal.record(SCOPE, "A", "succeeded", "success")
+        self.journal.close()
+        # 模拟写到一半时进程被杀
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"ts": 1, "scope": "' + SCOPE + '", "course_id": "B", "sta')
+        self.assertEqual(self.journal.load(SCOPE), {"A": "succeeded"})
+
+        journal = GrabJournal(self.path)
+        journal.record(SCOPE, "C", "succeeded", "success")
+        journal.close()
+        lines = self.lines()
+        self.assertEqual(lines[-1], "")
+        self.assertEqual(json.loads(lines[-2])["course_id"], "C")
+        self.assertEqual(journal.load(SCOPE), {"A": "succeeded", "C": "succeeded"})
+
+    def test_old_records_expire(self):
+        two_days_ago = time.time() - 2 * 24 * 3600
+        with mock.patch("grab_journal.time.time", return_value=two_days_ago):
+            self.journal.record(SCOPE, "A", "succeeded", "success")
+        self.journal.record(SCOPE, "B", "succeeded", "success")
+        self.assertEqual(self.journal.load(SCOPE), {"B": "succeeded"})
+
+    def test_clear_only_resets_its_scope(self):
+        other = "2024000001:2025-2026-1"
+        self.journal.record(SCOPE, "A", "succeeded", "success")
+        self.journal.record(other, "A", "succeeded", "success")
+        self.journal.clear(SCOPE)
+        self.assertEqual(self.journal.load(SCOPE), {})
+        self.assertEqual(self.journal.load(other), {"A": "succeeded"})
+
+        # 重置之后的新记录照常生效
+        self.journal.record(SCOPE, "B", "failed", "conflict")
+        self.assertEqual(self.journal.load(SCOPE), {"B": "failed"})
+
+    def test_final_state(self):
+        self.assertEqual(final_state("success"), "succeeded")
+        self.assertEqual(final_state("already"), "succeeded")
+        self.assertEqual(final_state("conflict"), "failed")
+        for outcome in (
+            "full",
+            "not_open",
+            "expired",
+            "timeout",
+            "server_error",
+            "rejected",
+        ):
+            self.assertIsNone(final_state(outcome), outcome)
+
+
+class ResumeTest(unittest.TestCase):
+    """断点日志里有结果的课，重新运行时不再发选课请求"""
+
+    def test_resume_skips_finished_courses(self):
+        from benchmarks.jw_stub import JwState, JwStub, STUDENT_ID, make_courses
+        from grab_events import EventLog
+        from hitsz_auth import HITSZJwxtAuth
+        from jw import HITSZJwxt
+        from session_model import SessionLifetimeModel
+
+        courses = make_courses(3, seats=30)
+        state = JwState(courses, latency=0, jitter=0)
+        stub = JwStub(state).start()
+        self.addCleanup(stub.stop)
+
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        auth = HITSZJwxtAuth()
+        auth.cookies_file = os.path.join(workdir.name, "cookies.json")
+        auth.session_model = SessionLifetimeModel()
+        stub.login(auth.session)
+        jwxt = HITSZJwxt(auth)
+        jwxt.base_url = stub.base_url
+        jwxt.events = EventLog()
+        jwxt.journal = GrabJournal(os.path.join(workdir.name, "journal.jsonl"))
+        jwxt.grab_timeout = 20
+
+        ids = [c.id for c in courses]
+        # 只用 Cookie 登录，断点日志的学号从个人信息里查
+        scope = f"{STUDENT_ID}:{jwxt.term['p_xn']}-{jwxt.term['p_xq']}"
+        jwxt.journal.record(scope, ids[0], "succeeded", "success")
+        jwxt.journal.record(scope, ids[1], "failed", "conflict")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            completed = jwxt.auto_choose_class(ids)
+
+        chosen = {cid: c["chosen"] for cid, c in state.stats()["courses"].items()}
+        self.assertEqual(chosen, {ids[0]: 0, ids[1]: 0, ids[2]: 1})
+        self.assertEqual(completed, {ids[0], ids[2]})
+        self.assertEqual(
+            GrabJournal(jwxt.journal.path).load(scope),
+            {ids[0]: "succeeded", ids[1]: "failed", ids[2]: "succeeded"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
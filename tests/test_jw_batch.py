@@ -0,0 +1,129 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jw import DEFAULT_TERM
+from jw_batch import PlanError, parse_plan, parse_start_time, resolve_start_time
+
+
+def plan(**overrides):
+    data = {
+        "account": {"username": "2024000000", "password": "password"},
+        "courses": ["高等数学"],
+    }
+    data.update(overrides)
+    return data
+
+
+class ParsePlanTest(unittest.TestCase):
+    def test_defaults(self):
+        parsed = parse_plan(plan(), environ={})
+        self.assertEqual(parsed["term"], DEFAULT_TERM)
+        self.assertEqual(parsed["request_interval"], 1.4)
+        self.assertIsNone(parsed["grab_timeout"])
+        self.assertIsNone(parsed["start_time"])
+        self.assertEqual(parsed["courses"], [{"name": "高等数学", "priority": 1000}])
+
+    def test_courses_sorted_by_priority(self):
+        parsed = parse_plan(
+            plan(
+                courses=[
+                    "大学物理",
+                    {"id": "0123456789ABCDEF", "priority": 2},
+                    {"name": "高等数学", "priority": 1},
+                ]
+            ),
+            environ={},
+        )
+        self.assertEqual(
+            [c.get("name") or c.get("id") for c in parsed["courses"]],
+            ["高等数学", "0123456789ABCDEF", "大学物理"],
+        )
+
+    def test_password_from_environment(self):
+        data = plan(account={"username": "2024000000"})
+        parsed = parse_plan(data, environ={"HITSZ_JW_PASSWORD": "from-env"})
+        self.assertEqual(parsed["account"]["password"], "from-env")
+        # 原计划不被修改
+        self.assertNotIn("password", data["account"])
+        self.assertIsNone(parse_plan(data, environ={})["account"]["password"])
+
+    def test_term_override(self):
+        parsed = parse_plan(plan(term={"p_xn": "2026-2027"}), environ={})
+        self.assertEqual(parsed["term"], {**DEFAULT_TERM, "p_xn": "2026-2027"})
+
+    def test_invalid_plans(self):
+        cases = [
+            [],
+            plan(account="2024000000"),
+            plan(account={"password": "password"}),
+            plan(account={"username": 2024000000}),
+            plan(courses=[]),
+            plan(courses="高等数学"),
+            plan(courses=[{"priority": 1}]),
+            plan(courses=[{"name": "高等数学", "priority": "1"}]),
+            plan(courses=[{"id": 123}]),
+            plan(term={"p_xn": 2025}),
+            plan(term={"unknown": "1"}),
+            plan(request_interval=0),
+            plan(request_interval=True),
+            plan(request_interval="1.4"),
+            plan(grab_timeout=-1),
+            plan(start_time=1230),
+            plan(start_time="12点30"),
+        ]
+        for data in cases:
+            with self.assertRaises(PlanError, msg=repr(data)):
+                parse_plan(data, environ={})
+
+
+class ParseStartTimeTest(unittest.TestCase):
+    def test_accepted_formats_are_returned_unchanged(self):
+        for value in (None, "", "12:30", "2025-07-01 12:30", "2025-07-01 12:30:05"):
+            self.assertEqual(parse_start_time(value), value)
+
+    def test_rejected_formats(self):
+        for value in ("25:00", "12:30:00", "2025/07/01 12:30", "明天 12:30", 1230):
+            with self.assertRaises(PlanError, msg=repr(value)):
+                parse_start_time(value)
+
+
+
+class ResolveStartTimeTest(unittest.TestCase):
+    def resolve(self, start_time, now):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return resolve_start_time(start_time, now.timestamp())
+
+    def test_not_set(self):
+        self.assertIsNone(resolve_start_time(None))
+        self.assertIsNone(resolve_start_time(""))
+
+    def test_later_today(self):
+        t0 = self.resolve("12:30", datetime(2025, 7, 1, 9, 0))
+        self.assertEqual(t0, datetime(2025, 7, 1, 12, 30).timestamp())
+
+    def test_recently_passed_stays_today(self):
+        # 中断后重新运行：刚过去不久的开抢时间立即开抢，不等到明天
+        t0 = self.resolve("12:30", datetime(2025, 7, 1, 14, 0))
+        self.assertEqual(t0, datetime(2025, 7, 1, 12, 30).timestamp())
+
+    def test_long_passed_rolls_to_tomorrow(self):
+        # 头天晚上准备第二天早上的计划
+        t0 = self.resolve("08:00", datetime(2025, 7, 1, 22, 0))
+        self.assertEqual(t0, datetime(2025, 7, 2, 8, 0).timestamp())
+        # 跨月
+        t0 = self.resolve("08:00", datetime(2025, 7, 31, 23, 0))
+        self.assertEqual(t0, datetime(2025, 8, 1, 8, 0).timestamp())
+
+    def test_dated_start_time_never_rolls(self):
+        t0 = self.resolve("2025-07-01 08:00", datetime(2025, 7, 1, 22, 0))
+        self.assertEqual(t0, datetime(2025, 7, 1, 8, 0).timestamp())
+
+
+if __name__ == "__main__":
+    unittest.main()
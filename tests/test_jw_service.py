@@ -0,0 +1,49 @@
+import os
+import sys
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jw_batch import PlanError
+from jw_service import parse_start_at
+
+NOW = datetime(2025, 7, 1, 9, 0).timestamp()
+YEAR = 366 * 86400
+
+
+class ParseStartAtTest(unittest.TestCase):
+    def test_empty_means_now(self):
+        self.assertEqual(parse_start_at(None, NOW), NOW)
+        self.assertEqual(parse_start_at("", NOW), NOW)
+
+    def test_timestamp_bounds(self):
+        for value in (NOW, NOW - YEAR + 1, NOW + YEAR - 1, int(NOW) + 60):
+            self.assertEqual(parse_start_at(value, NOW), float(value))
+        # 12 这样的小数字不能当成 1970 年的时间戳
+        for value in (12, 0, -1, NOW - YEAR, NOW + YEAR, NOW * 1000):
+            with self.assertRaises(PlanError, msg=repr(value)):
+                parse_start_at(value, NOW)
+
+    def test_strings(self):
+        self.assertEqual(
+            parse_start_at("2025-07-01 12:30", NOW),
+            datetime(2025, 7, 1, 12, 30).timestamp(),
+        )
+        self.assertEqual(
+            parse_start_at("2025-07-01 12:30:15", NOW),
+            datetime(2025, 7, 1, 12, 30, 15).timestamp(),
+        )
+        # 只写时刻时取 now 当天
+        self.assertEqual(
+            parse_start_at("08:30", NOW), datetime(2025, 7, 1, 8, 30).timestamp()
+        )
+
+    def test_rejected_values(self):
+        for value in (True, False, [], {}, "12点30", "2025/07/01 12:30", "24:00"):
+            with self.assertRaises(PlanError, msg=repr(value)):
+                parse_start_at(value, NOW)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hitsz_auth import (
+    CAPTCHA_BACKOFF_BASE,
+    CAPTCHA_BACKOFF_MAX,
+    HITSZAuth,
+    LoginResult,
+)
+from session_model import SessionLifetimeModel
+
+
+class LoginResultTest(unittest.TestCase):
+    def test_truthiness(self):
+        self.assertTrue(LoginResult(LoginResult.OK))
+        for status in (
+            LoginResult.BAD_CREDENTIALS,
+            LoginResult.CAPTCHA_REQUIRED,
+            LoginResult.THROTTLED,
+            LoginResult.ERROR,
+        ):
+            self.assertFalse(LoginResult(status), status)
+
+    def test_only_plain_errors_are_retryable(self):
+        self.assertTrue(LoginResult(LoginResult.ERROR).retryable)
+        for status in (
+            LoginResult.OK,
+            LoginResult.BAD_CREDENTIALS,
+            LoginResult.CAPTCHA_REQUIRED,
+            LoginResult.THROTTLED,
+        ):
+            self.assertFalse(LoginResult(status).retryable, status)
+
+    def test_classify_login_failure(self):
+        auth = HITSZAuth()
+        cases = {
+            "您提供的用户名或者密码有误": LoginResult.BAD_CREDENTIALS,
+            "请输入验证码": LoginResult.CAPTCHA_REQUIRED,
+            "<html></html>": LoginResult.ERROR,
+        }
+        for text, status in cases.items():
+            self.assertEqual(auth.classify_login_failure(401, text).status, status)
+
+
+class CaptchaBackoffTest(unittest.TestCase):
+    def setUp(self):
+        HITSZAuth._captcha_backoff.clear()
+        self.auth = HITSZAuth("2024000000", "password")
+        self.auth.session_model = SessionLifetimeModel()
+        self.now = 1700000000.0
+        patcher = mock.patch("hitsz_auth.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(HITSZAuth._captcha_backoff.clear)
+
+    def captcha(self):
+        return self.auth.note_login_result(
+            "2024000000", LoginResult(LoginResult.CAPTCHA_REQUIRED, "需要验证码")
+        )
+
+    def test_backoff_doubles_and_is_capped(self):
+        waits = [self.captcha().retry_after for _ in range(8)]
+        self.assertEqual(
+            waits[:3],
+            [CAPTCHA_BACKOFF_BASE, CAPTCHA_BACKOFF_BASE * 2, CAPTCHA_BACKOFF_BASE * 4],
+        )
+        self.assertEqual(waits[-1], CAPTCHA_BACKOFF_MAX)
+        self.assertEqual(self.auth.captcha_backoff_remaining(), CAPTCHA_BACKOFF_MAX)
+
+    def test_backoff_is_per_account_and_shared_between_objects(self):
+        self.captcha()
+        other = HITSZAuth("2024000001", "password")
+        self.assertEqual(other.captcha_backoff_remaining(), 0)
+        same = HITSZAuth("2024000000", "password")
+        self.assertEqual(same.captcha_backoff_remaining(), CAPTCHA_BACKOFF_BASE)
+
+    def test_precheck_throttles_without_asking_the_server(self):
+        self.captcha()
+        self.now += 10
+        with mock.patch.object(self.auth, "check_need_captcha") as check:
+            result = self.auth.precheck_login("2024000000")
+        check.assert_not_called()
+        self.assertEqual(result.status, LoginResult.THROTTLED)
+        self.assertEqual(result.retry_after, CAPTCHA_BACKOFF_BASE - 10)
+
+        # 退避期过后重新询问服务器
+        self.now += CAPTCHA_BACKOFF_BASE
+        with mock.patch.object(self.auth, "check_need_captcha", return_value=False):
+            self.assertIsNone(self.auth.precheck_login("2024000000"))
+
+    def test_precheck_starts_backoff_when_captcha_needed(self):
+        with mock.patch.object(self.auth, "check_need_captcha", return_value=True):
+            result = self.auth.precheck_login("2024000000")
+        self.assertEqual(result.status, LoginResult.CAPTCHA_REQUIRED)
+        self.assertEqual(result.retry_after, CAPTCHA_BACKOFF_BASE)
+
+    def test_success_clears_backoff(self):
+        self.captcha()
+        self.captcha()
+        self.auth.note_login_result("2024000000", LoginResult(LoginResult.OK))
+        self.assertEqual(self.auth.captcha_backoff_remaining(), 0)
+        self.assertEqual(self.captcha().retry_after, CAPTCHA_BACKOFF_BASE)
+
+    def test_login_blocked_during_backoff_never_posts_password(self):
+        self.captcha()
+        with mock.patch.object(self.auth, "perform_login") as perform:
+            result = self.auth.login()
+        perform.assert_not_called()
+        self.assertFalse(result)
+        self.assertEqual(result.status, LoginResult.THROTTLED)
+
+
+if __name__ == "__main__":
+    unittest.main()
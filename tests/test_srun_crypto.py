@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import srun_crypto
+from benchmarks.srun_portal_stub import decode_srbx1
+
+# 以下期望值由拆分前 net_login.HITSZNetAuth 里的实现算出，拆出来的模块必须逐字节一致
+TOKEN = "4f2bd8c0a1e94d1b9f1c2e3d4a5b6c7d8e9f0a1b2c3d4e5f6a7b8c9d0e1f2a3b"
+USERNAME = "2024000000"
+PASSWORD = "p@ss 中文!"
+IP = "10.249.1.2"
+INFO = (
+    "{SRBX1}oQ/ieQcFdIOGPUcCKrXMKYj0wlMm2JEHjQi9fL34zQMsEBmuCFuGeAe+uKR0342nAe5MjWiJC5L8"
+    "FesZ7+GbtiPrdfEckBaR1br9wMCrizknMa8X4l75fNarqfoc33duU1356jo+WuAg8PbN77gHIv=="
+)
+LOGIN_QUERY = (
+    "callback=jQueryCallback&action=login&username=2024000000"
+    "&password=%7BMD5%7D727d0085e4050392ed9f8a9901143c24&os=Linux&name=Linux"
+    "&nas_ip=&double_stack=0&chksum=4bcb15604c15e5d31e2df0fbd015a20b41968178"
+    "&info=%7BSRBX1%7DoQ%2FieQcFdIOGPUcCKrXMKYj0wlMm2JEHjQi9fL34zQMsEBmuCFuGeAe%2BuKR0342n"
+    "Ae5MjWiJC5L8FesZ7%2BGbtiPrdfEckBaR1br9wMCrizknMa8X4l75fNarqfoc33duU1356jo%2BWuAg8PbN"
+    "77gHIv%3D%3D&ac_id=1&ip=10.249.1.2&n=200&type=1&captchaVal=&_=1700000000123"
+)
+
+
+class SrunCryptoTest(unittest.TestCase):
+    def test_hmd5_and_sha1(self):
+        self.assertEqual(
+            srun_crypto.hmd5(PASSWORD, TOKEN), "727d0085e4050392ed9f8a9901143c24"
+        )
+        self.assertEqual(
+            srun_crypto.sha1("abc" + TOKEN), "84c8736a55d163bc99709c87f3328760ae31c027"
+        )
+
+    def test_xxtea(self):
+        encoded = srun_crypto.trans_b64encode(
+            srun_crypto.xxtea('{"a":1,"b":"xyz"}', TOKEN), srun_crypto.SRBX1_ALPHA
+        )
+        self.assertEqual(encoded, "47WnlaBOeLn0tkAdGAS93+g/qwpwclig")
+        self.assertEqual(srun_crypto.xxtea("", TOKEN), "")
+
+    def test_info_round_trip(self):
+        data = {
+            "username": USERNAME,
+            "password": PASSWORD,
+            "ip": IP,
+            "acid": "1",
+            "enc_ver": "srun_bx1",
+        }
+        info = srun_crypto.info_(data, TOKEN)
+        self.assertEqual(info, INFO)
+        # 门户替身按门户的算法解码，得到原来的字段（序列化时去掉了所有空格）
+        data["password"] = "p@ss中文!"
+        self.assertEqual(decode_srbx1(info, TOKEN), data)
+
+    def test_login_query(self):
+        params = srun_crypto.login_query(
+            USERNAME,
+            PASSWORD,
+            IP,
+            TOKEN,
+            "jQueryCallback",
+            os_name="Linux",
+            timestamp_ms=1700000000123,
+        )
+        self.assertEqual(urlencode(params), LOGIN_QUERY)
+
+
+if __name__ == "__main__":
+    unittest.main()